@@ -0,0 +1,105 @@
+"""
+Хранилище артефактов (скриншотов) между захватом и сборкой отчётов.
+
+ARTIFACT_MODE=disk   — как раньше: каждый шот пишется в папку отеля.
+ARTIFACT_MODE=memory — шоты живут в памяти процесса от захвата до DOCX/HTML;
+                       на диск (в ту же папку отеля) пишутся только при
+                       ARTIFACT_SPILL=True — для отладки или докачки после падения.
+
+Записанный на диск шот регистрируется в results_store (таблица artifacts):
+по ней, а не по содержимому папок, ищут отели и шоты повторы и сборка.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from config_app import ARTIFACT_MODE, ARTIFACT_SPILL, IMAGE_EXTENSIONS
+from results_store import results
+from utils import get_screenshot_path
+
+ShotSource = Union[bytes, Path]
+Shots = List[Tuple[str, ShotSource]]
+
+
+class ArtifactStore:
+    """(hotel_id, hotel_title) -> {имя файла: байты}. Потокобезопасно."""
+
+    def __init__(self) -> None:
+        self._data: Dict[Tuple[str, str], Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, hotel_id: str, hotel_title: str, name: str, data: bytes) -> None:
+        with self._lock:
+            self._data.setdefault((hotel_id, str(hotel_title)), {})[name] = data
+
+    def shots(self, hotel_id: str, hotel_title: str) -> List[Tuple[str, bytes]]:
+        """Шоты отеля в порядке имён (как sorted(os.listdir) для папки)."""
+        with self._lock:
+            items = self._data.get((hotel_id, str(hotel_title)), {})
+            return sorted(items.items())
+
+    def shot_stems(self, hotel_id: str) -> set[str]:
+        """Имена шотов без расширения по всем заголовкам отеля."""
+        with self._lock:
+            return {
+                Path(name).stem
+                for (hid, _), items in self._data.items()
+                if hid == hotel_id
+                for name in items
+            }
+
+    def hotels(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return sorted(self._data)
+
+    def drop(self, hotel_id: str, hotel_title: str) -> None:
+        with self._lock:
+            self._data.pop((hotel_id, str(hotel_title)), None)
+
+    def load_spilled(self) -> int:
+        """
+        Подтягивает в память шоты, ранее сброшенные на диск (ARTIFACT_SPILL),
+        чтобы докачка после падения не начинала с нуля. Возвращает число файлов.
+        Пути шотов берутся из results_store.
+        """
+        loaded = 0
+        for hotel_id, hotel_title in results.hotels():
+            for name, path in results.artifacts(hotel_id):
+                if path.exists():
+                    self.put(hotel_id, hotel_title, name, path.read_bytes())
+                    loaded += 1
+        return loaded
+
+
+artifacts = ArtifactStore()
+
+
+def in_memory() -> bool:
+    return ARTIFACT_MODE == "memory"
+
+
+def save_shot_bytes(hotel_id: str, hotel_title: str, name: str, data: bytes) -> None:
+    """Единая точка сохранения шота: память и/или файл в папке отеля."""
+    if in_memory():
+        artifacts.put(hotel_id, hotel_title, name, data)
+        if not ARTIFACT_SPILL:
+            return
+    path = get_screenshot_path(hotel_id, hotel_title, name)
+    path.write_bytes(data)
+    results.add_artifact(hotel_id, hotel_title, name, path)
+
+
+def folder_shots(folder_path: Path) -> Shots:
+    """Шоты из папки отеля как (имя, путь) в порядке имён."""
+    return [
+        (name, folder_path / name)
+        for name in sorted(p.name for p in folder_path.iterdir())
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def read_shot(source: ShotSource) -> bytes:
+    return source if isinstance(source, bytes) else Path(source).read_bytes()
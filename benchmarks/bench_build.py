@@ -0,0 +1,346 @@
+"""
+Бенчмарк фазы сборки отчётов (word_modules) на синтетическом портфеле.
+
+Генерирует папки отелей как после захвата: шоты ENABLED_SHOTS в PNG
+реалистичных размеров (ширина окна, таблицы с текстом и графики) и
+results.db портфеля (заголовки и метаданные, см. results_store). Для 10, 100
+и 1 000 отелей по отдельности меряет:
+
+    resize — _resize_all_images по всем папкам (меняет папки на месте);
+    meta   — create_meta_data;
+    docx   — create_word_file (по уже приведённым картинкам);
+    html   — _build_inline_html;
+    all    — всё подряд на каждый отель, на свежей копии портфеля.
+
+Каждый этап идёт в отдельном процессе: время, пиковый RSS (и RSS после
+импортов, чтобы отделить сам этап) и байты результата. Итог — JSON; его
+можно сохранить базовым и сравнивать с ним следующие коммиты:
+
+    python -m benchmarks.bench_build [--hotels 10 100 1000]
+        [--stages resize meta docx html all] [--width 1200]
+        [--save-baseline main] [--compare main] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from benchmarks.bench_capture import BASELINES, _git_commit
+
+REPO = Path(__file__).resolve().parent.parent
+STAGES = ("resize", "meta", "docx", "html", "all")
+MB = 2**20
+
+# высота шота при ширине окна ~1000 px, как на реальных страницах
+_SHOT_HEIGHTS = {
+    "01_top_element": 420,
+    "02_populars_element": 520,
+    "03_reviews": 900,
+    "04_attendance": 760,
+    "06_service_prices": 1100,
+    "07_rating_in_hurghada": 1500,
+    "08_activity": 1800,
+}
+_VARIANTS = 6  # разных наборов картинок на весь портфель
+
+
+# --- портфель -----------------------------------------------------------------
+
+
+def _synthetic_png(shot: str, height: int, rnd: random.Random) -> bytes:
+    """Скрин «как настоящий»: строки таблицы с текстом, полосы графика, шум."""
+    width = 1005
+    im = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(im)
+    for y in range(0, height, 26):
+        if (y // 26) % 2:
+            draw.rectangle((0, y, width, y + 25), fill=(246, 248, 250))
+        draw.line((0, y, width, y), fill=(220, 220, 220))
+        for x in range(10, width - 120, 160):
+            label = f"{shot[:6]} {rnd.randint(10, 99999)}"
+            draw.text((x, y + 7), label, fill=(0, 0, 0))
+    # график: столбцы с градиентом — плохо сжимаемая часть, как на канвасах
+    top = height // 3
+    for i in range(40):
+        h = rnd.randint(20, top)
+        x = 20 + i * 24
+        for dy in range(h):
+            c = 80 + (dy * 120) // max(h, 1)
+            draw.line((x, top + 20 - dy, x + 16, top + 20 - dy), fill=(c, 120, 200))
+    noise = Image.effect_noise((width, height), 6).convert("RGB")
+    im = Image.blend(im, noise, 0.01)
+    buf = io.BytesIO()
+    im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _make_portfolio(root: Path, hotels: int, shots: List[str]) -> Path:
+    """screenshots/<id>/ с шотами и screenshots/results.db для hotels отелей."""
+    from results_store import ResultsStore
+
+    rnd = random.Random(43)
+    variants = [
+        {
+            shot: _synthetic_png(shot, _SHOT_HEIGHTS.get(shot, 800), rnd)
+            for shot in shots
+        }
+        for _ in range(_VARIANTS)
+    ]
+    screens = root / "screenshots"
+    store = ResultsStore(screens / "results.db", screens)
+    for i in range(hotels):
+        hotel_id, title = f"al{1000 + i}", f"Bench Hotel {i} 5*"
+        folder = store.hotel_folder(hotel_id)
+        folder.mkdir(parents=True)
+        for shot, data in variants[i % _VARIANTS].items():
+            (folder / f"{shot}.png").write_bytes(data)
+            store.add_artifact(hotel_id, title, f"{shot}.png", folder / f"{shot}.png")
+        links = {
+            "star": "5*",
+            "city": ("Hurghada", "Sharm El Sheikh", "Marsa Alam")[i % 3],
+            "chain": f"Bench Chain {i % 7}",
+            "rating_url": f"https://tophotels.pro/hotel/{hotel_id}/new_stat/rating",
+            "rating_status": "in rating",
+        }
+        store.save_metadata(hotel_id, title, links)
+    return screens
+
+
+def _folder_bytes(screens: Path) -> int:
+    return sum(
+        p.stat().st_size
+        for p in screens.rglob("*")
+        if p.is_file() and not p.name.startswith("results.db")
+    )
+
+
+# --- этап в дочернем процессе ---------------------------------------------------
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows: пиковый рабочий набор через psutil
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return round(psutil.Process().memory_info().peak_wset / MB, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux — килобайты, macOS — байты
+    return round(peak / (MB if sys.platform == "darwin" else 1024), 1)
+
+
+def _hotels(screens: Path) -> List[Tuple[str, str, Path]]:
+    from results_store import ResultsStore
+
+    # копия портфеля: пути в artifacts указывают на оригинал, папки — по hotel_id
+    store = ResultsStore(screens / "results.db", screens)
+    return [(hid, title, store.hotel_folder(hid)) for hid, title in store.hotels()]
+
+
+def _child(stage: str, screens: Path, width: Optional[int]) -> dict:
+    """Один этап по всем отелям портфеля; вызывается в отдельном процессе."""
+    from word_modules.create_html_version import _build_inline_html
+    from word_modules.create_meta_data import create_meta_data
+    from word_modules.create_word_file import create_word_file
+    from word_modules.docs_helpers import report_safe_name
+    from word_modules.resize_all_images import _resize_all_images
+
+    # метаданные читаются из results.db портфеля (RESULTS_DB задаёт _spawn)
+    hotels = _hotels(screens)
+    # docx/html меряются без чтения метаданных: его меряет этап meta
+    metas = {}
+    if stage in ("docx", "html"):
+        metas = {hid: create_meta_data(hid, title) for hid, title, _ in hotels}
+    import_rss = _peak_rss_mb()
+    output = 0
+
+    def docx(title, folder, meta) -> int:
+        url, mapping, reports_dir = meta
+        path = reports_dir / f"{report_safe_name(title)}.docx"
+        create_word_file(title, folder, url, mapping, reports_dir, docx_path=path)
+        return path.stat().st_size
+
+    def html(title, folder, meta) -> int:
+        url, mapping, _ = meta
+        return len(_build_inline_html(title, url, mapping, folder).encode("utf-8"))
+
+    t = perf_counter()
+    if stage == "resize":
+        for _, _, folder in hotels:
+            _resize_all_images(folder, width)
+        output = _folder_bytes(screens)
+    elif stage == "meta":
+        for hotel_id, title, _ in hotels:
+            create_meta_data(hotel_id, title)
+        output = None
+    elif stage in ("docx", "html"):
+        build = docx if stage == "docx" else html
+        output = sum(build(title, folder, metas[hid]) for hid, title, folder in hotels)
+    else:
+        for hotel_id, title, folder in hotels:
+            _resize_all_images(folder, width)
+            meta = create_meta_data(hotel_id, title)
+            output += docx(title, folder, meta) + html(title, folder, meta)
+    return {
+        "wall_s": round(perf_counter() - t, 3),
+        "import_rss_mb": import_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": output,
+    }
+
+
+def _spawn(stage: str, screens: Path, reports: Path, width: Optional[int]) -> dict:
+    with tempfile.NamedTemporaryFile("r", suffix=".json", delete=False) as f:
+        out = Path(f.name)
+    cmd = [sys.executable, "-m", "benchmarks.bench_build", "--child", stage]
+    cmd += ["--screens", str(screens), "--out", str(out)]
+    if width:
+        cmd += ["--width", str(width)]
+    env = dict(
+        os.environ,
+        PATH_FOR_REPORTS=str(reports),
+        RESULTS_DB=str(screens / "results.db"),
+    )
+    try:
+        proc = subprocess.run(cmd, cwd=REPO, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"этап {stage} упал:\n{proc.stderr[-2000:]}")
+        return json.loads(out.read_text(encoding="utf-8"))
+    finally:
+        out.unlink(missing_ok=True)
+
+
+# --- прогон ---------------------------------------------------------------------
+
+
+def run(sizes: List[int], stages: List[str], width: Optional[int]) -> dict:
+    from config_app import ENABLED_SHOTS
+
+    stages = [s for s in STAGES if s in stages]
+    results: Dict[str, Dict[str, dict]] = {}
+    for hotels in sizes:
+        row: Dict[str, dict] = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            raw = _make_portfolio(root / "raw", hotels, ENABLED_SHOTS)
+            work = root / "work"
+            shutil.copytree(raw, work)
+            input_mb = round(_folder_bytes(raw) / MB, 1)
+            print(f"▶ {hotels} отелей, {input_mb} MB шотов")
+            if "resize" not in stages:
+                # docx/html собираются из уже приведённых картинок
+                _spawn("resize", work, root / "reports", width)
+            for stage in stages:
+                screens = work
+                if stage == "all":
+                    screens = root / "fresh"
+                    shutil.copytree(raw, screens)
+                row[stage] = _spawn(stage, screens, root / f"reports_{stage}", width)
+                print(f"  {stage:<8}{row[stage]['wall_s']:>10} s")
+        results[str(hotels)] = {"input_mb": input_mb} | row
+    return {
+        "commit": _git_commit(),
+        "params": {"hotels": sizes, "stages": stages, "width": width},
+        "results": results,
+    }
+
+
+def _print(report: dict) -> None:
+    print(f"\ncommit {report['commit']}, ширина {report['params']['width'] or '—'}")
+    print(
+        f"  {'отелей':>7}  {'этап':<8}{'время s':>10}{'мс/отель':>10}"
+        f"{'RSS импорт MB':>15}{'пик RSS MB':>12}{'выход MB':>10}"
+    )
+    for hotels, row in report["results"].items():
+        for stage in STAGES:
+            r = row.get(stage)
+            if r is None:
+                continue
+            out = r["output_bytes"]
+            print(
+                f"  {hotels:>7}  {stage:<8}{r['wall_s']:>10}"
+                f"{r['wall_s'] * 1000 / int(hotels):>10.1f}"
+                f"{r['import_rss_mb'] or '—':>15}{r['peak_rss_mb'] or '—':>12}"
+                f"{round(out / MB, 1) if out is not None else '—':>10}"
+            )
+
+
+def _compare(report: dict, baseline: dict) -> None:
+    def delta(new, old) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "—"
+
+    print(f"\nСравнение с {baseline['commit']} (было → стало):")
+    for hotels, row in report["results"].items():
+        old_row = baseline["results"].get(hotels, {})
+        for stage in STAGES:
+            new, old = row.get(stage), old_row.get(stage)
+            if not new or not old:
+                continue
+            line = f"  {hotels:>5} {stage:<8}"
+            for key in ("wall_s", "peak_rss_mb"):
+                a, b = old[key], new[key]
+                if a is not None and b is not None:
+                    line += f"  {key} {a} → {b} {delta(b, a)}"
+            print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument(
+        "--width", type=int, default=None, help="по умолчанию WIDTH_TABLES"
+    )
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--json", type=Path, default=None)
+    # внутренние: запуск одного этапа в дочернем процессе
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--screens", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--out", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = _child(args.child, args.screens, args.width)
+        args.out.write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    width = args.width
+    if width is None:
+        from config_app import WIDTH_TABLES
+
+        width = WIDTH_TABLES
+    report = run(args.hotels, args.stages, width)
+    _print(report)
+    if args.compare:
+        baseline = json.loads(
+            (BASELINES / f"build_{args.compare}.json").read_text(encoding="utf-8")
+        )
+        _compare(report, baseline)
+    if args.save_baseline:
+        BASELINES.mkdir(exist_ok=True)
+        path = BASELINES / f"build_{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ Базовый результат: {path}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Бенчмарк захвата шотов офлайн: настоящий run_concurrent (логин, воркеры,
+process_hotel и все модули шагов) против локального replay_server.
+
+Сеть отрезана (Chromium резолвит только 127.0.0.1), шоты — в памяти
+(ARTIFACT_MODE=memory), метрики и auth_state — во временной папке.
+Выводит отелей в минуту (по всему прогону и «установившуюся» — от первого
+до последнего отеля), долю полностью собранных отелей и p50/p95 по шагам и
+фазам goto_strict (из спанов perf_trace). При нескольких --rounds берётся
+медиана по кругам.
+
+Базовые результаты для сравнения коммитов — benchmarks/baselines/<имя>.json:
+
+    python -m benchmarks.bench_capture [--hotels 20] [--workers 4] [--rounds 3]
+        [--latency-ms 80] [--jitter-ms 40] [--popup-rate 0.2] [--har run.har]
+        [--save-baseline main] [--compare main] [--json out.json]
+
+Модули проекта импортируются после настройки окружения: config_app читает
+его при импорте.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from benchmarks.replay_server import ReplayServer
+
+BASELINES = Path(__file__).resolve().parent / "baselines"
+
+
+def _configure(server: ReplayServer, workers: int, tmp: Path) -> None:
+    os.environ.update(
+        BASE_URL_TH=server.th_url,
+        BASE_URL_PRO=server.pro_url,
+        EMAIL="replay@example.com",
+        PASSWORD="replay",
+        HEADLESS="True",
+        BROWSER_ARGS='--host-resolver-rules="MAP * ~NOTFOUND, EXCLUDE 127.0.0.1"',
+        CONCURRENCY=str(workers),
+        ARTIFACT_MODE="memory",
+        ARTIFACT_SPILL="False",
+        METRICS_PORT="0",
+        PERF_DIR=str(tmp / "perf"),
+        RESULTS_DB=str(tmp / "results.db"),
+        FORENSICS_DIR=str(tmp / "forensics"),
+        INSTRUMENT_TRACE=str(tmp / "loop_trace.jsonl"),
+    )
+    # AUTH_STATE — относительный путь: не трогаем auth_state.json проекта
+    os.chdir(tmp)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _round(hotel_ids: List[str]) -> dict:
+    from config_app import SCREENSHOTS_DIR
+    from parce_screenshots_moduls.concurrent_runner import (
+        hotels_needing_retry,
+        run_concurrent,
+    )
+    from perf_trace import _percentile, tracer
+
+    tracer.clear()
+    t = perf_counter()
+    asyncio.run(run_concurrent(hotel_ids))
+    elapsed = perf_counter() - t
+
+    spans = tracer.snapshot()
+    hotels = [s for s in spans if s["cat"] == "hotel"]
+    steady = (
+        max(s["ts"] + s["dur"] for s in hotels) - min(s["ts"] for s in hotels)
+        if hotels
+        else 0
+    )
+    durations: Dict[str, List[float]] = {}
+    for s in spans:
+        if s["cat"] in ("step", "goto"):
+            key = s["name"] if s["cat"] == "step" else f"goto:{s['name']}"
+            durations.setdefault(key, []).append(s["dur"])
+    complete = len(hotel_ids) - len(hotels_needing_retry(SCREENSHOTS_DIR, hotel_ids))
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "hotels_per_min": round(len(hotels) * 60 / elapsed, 2) if elapsed else 0,
+        "steady_hotels_per_min": round(len(hotels) * 60 / steady, 2) if steady else 0,
+        "complete": complete,
+        "steps": {
+            name: {
+                "n": len(d),
+                "p50_s": round(_percentile(sorted(d), 0.50), 3),
+                "p95_s": round(_percentile(sorted(d), 0.95), 3),
+            }
+            for name, d in sorted(durations.items())
+        },
+    }
+
+
+def _median(rounds: List[dict]) -> dict:
+    def med(values):
+        return round(statistics.median(values), 3)
+
+    steps = {}
+    for name in rounds[0]["steps"]:
+        rows = [r["steps"][name] for r in rounds if name in r["steps"]]
+        steps[name] = {
+            "n": rows[0]["n"],
+            "p50_s": med(r["p50_s"] for r in rows),
+            "p95_s": med(r["p95_s"] for r in rows),
+        }
+    return {
+        key: med(r[key] for r in rounds)
+        for key in ("elapsed_s", "hotels_per_min", "steady_hotels_per_min", "complete")
+    } | {"steps": steps}
+
+
+def run(
+    hotels: int,
+    workers: int,
+    rounds: int,
+    latency_ms: float,
+    jitter_ms: float,
+    popup_rate: float,
+    seed: int,
+    har: List[Path],
+) -> dict:
+    server = ReplayServer(
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        popup_rate=popup_rate,
+        seed=seed,
+        har=har,
+    ).start()
+    cwd = Path.cwd()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            _configure(server, workers, Path(tmp))
+            try:
+                hotel_ids = [f"al{1000 + i}" for i in range(hotels)]
+                results = [_round(hotel_ids) for _ in range(rounds)]
+            finally:
+                os.chdir(cwd)
+    finally:
+        server.stop()
+    return {
+        "commit": _git_commit(),
+        "params": {
+            "hotels": hotels,
+            "workers": workers,
+            "rounds": rounds,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "popup_rate": popup_rate,
+            "seed": seed,
+            "har": [str(p) for p in har],
+        },
+        "requests": server.requests,
+        "result": _median(results),
+        "rounds": results,
+    }
+
+
+def _print(report: dict) -> None:
+    r, p = report["result"], report["params"]
+    print(
+        f"commit {report['commit']}: {p['hotels']} отелей × {p['rounds']} кругов, "
+        f"{p['workers']} воркеров, задержка {p['latency_ms']}±{p['jitter_ms']} ms, "
+        f"попапы {p['popup_rate']:.0%}"
+    )
+    print(
+        f"  отелей/мин {r['hotels_per_min']} (установившаяся "
+        f"{r['steady_hotels_per_min']}), собрано полностью {r['complete']}"
+        f"/{p['hotels']}, {r['elapsed_s']} s"
+    )
+    print(f"  {'шаг':<32}{'n':>6}{'p50 s':>9}{'p95 s':>9}")
+    for name, s in r["steps"].items():
+        print(f"  {name:<32}{s['n']:>6}{s['p50_s']:>9}{s['p95_s']:>9}")
+
+
+def _compare(report: dict, baseline: dict) -> None:
+    def delta(new, old) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "—"
+
+    new, old = report["result"], baseline["result"]
+    print(f"\nСравнение с {baseline['commit']} (было → стало):")
+    if baseline["params"] != report["params"]:
+        print("  ⚠ параметры прогона отличаются от базовых")
+    for key in ("hotels_per_min", "steady_hotels_per_min"):
+        print(f"  {key:<32}{old[key]:>9} → {new[key]:<9}{delta(new[key], old[key])}")
+    for name, s in new["steps"].items():
+        if name in old["steps"]:
+            o = old["steps"][name]
+            print(
+                f"  {name + ' p50':<32}{o['p50_s']:>9} → {s['p50_s']:<9}"
+                f"{delta(s['p50_s'], o['p50_s'])}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--popup-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--har", type=Path, action="append", default=[])
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = run(
+        args.hotels,
+        args.workers,
+        max(1, args.rounds),
+        args.latency_ms,
+        args.jitter_ms,
+        args.popup_rate,
+        args.seed,
+        [p.resolve() for p in args.har],
+    )
+    _print(report)
+    if args.compare:
+        baseline = json.loads(
+            (BASELINES / f"{args.compare}.json").read_text(encoding="utf-8")
+        )
+        _compare(report, baseline)
+    if args.save_baseline:
+        BASELINES.mkdir(exist_ok=True)
+        path = BASELINES / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ Базовый результат: {path}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
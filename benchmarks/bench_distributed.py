@@ -0,0 +1,186 @@
+"""
+Распределённый сбор на одной машине: координатор (work_queue.py) и несколько
+процессов `cli.py node` против локального replay_server.
+
+Очередь и папка выгрузки — во временной папке, каждый узел — свой процесс со
+своей рабочей папкой (auth_state.json) и своим Chromium. --kill-after убивает
+первый узел через N секунд вместе с его арендой: отели должны достаться
+другим узлам, когда аренда (--lease-ttl) истечёт.
+
+Выводит время, отелей в минуту, итог очереди (done/failed), сколько отелей
+собрано каждым узлом, сколько аренд переходило к другому узлу (attempts > 1)
+и все ли готовые отели лежат в папке выгрузки.
+
+    python -m benchmarks.bench_distributed [--nodes 3] [--hotels 30]
+        [--workers 2] [--lease-ttl 30] [--kill-after 20] [--latency-ms 80]
+        [--jitter-ms 40] [--seed 1] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.bench_capture import _configure, _git_commit
+from benchmarks.replay_server import ReplayServer
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def _spawn(name: str, workdir: Path) -> subprocess.Popen:
+    workdir.mkdir(parents=True, exist_ok=True)
+    return subprocess.Popen(
+        [sys.executable, str(REPO / "cli.py"), "node", "--name", name],
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def run(
+    nodes: int,
+    hotels: int,
+    workers: int,
+    lease_ttl: int,
+    kill_after: Optional[float],
+    latency_ms: float,
+    jitter_ms: float,
+    seed: int,
+) -> dict:
+    server = ReplayServer(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=seed)
+    server.start()
+    cwd = Path.cwd()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            _configure(server, workers, tmp)
+            shared = tmp / "shared"
+            os.environ.update(
+                WORK_QUEUE_DB=str(shared / "work_queue.db"),
+                WORK_ARTIFACTS_DIR=str(shared / "screenshots"),
+                WORK_LEASE_TTL_S=str(lease_ttl),
+            )
+            try:
+                from work_queue import WorkQueue
+
+                queue = WorkQueue()
+                queue.seed([f"al{1000 + i}" for i in range(hotels)], reset=True)
+                t = time.perf_counter()
+                procs = [
+                    _spawn(f"node{i + 1}", tmp / f"node{i + 1}") for i in range(nodes)
+                ]
+                killed: List[str] = []
+                while any(p.poll() is None for p in procs):
+                    late = kill_after and time.perf_counter() - t > kill_after
+                    if late and not killed:
+                        procs[0].kill()
+                        killed.append("node1")
+                    time.sleep(0.5)
+                elapsed = time.perf_counter() - t
+
+                rows = queue.hotels()
+                done = [h for h in rows if h["status"] == "done"]
+                uploads = shared / "screenshots"
+                uploaded = {
+                    p.name.split("_", 1)[0]
+                    for p in (uploads.iterdir() if uploads.exists() else [])
+                    if p.is_dir() and not p.name.startswith(".")
+                }
+                result = {
+                    "elapsed_s": round(elapsed, 2),
+                    "hotels_per_min": round(len(done) * 60 / elapsed, 2),
+                    "queue": queue.stats(),
+                    "nodes": {
+                        n["node"]: {"done": n["done"], "failed": n["failed"]}
+                        for n in queue.nodes()
+                    },
+                    "killed": killed,
+                    "re_leased": sum(1 for h in rows if h["attempts"] > 1),
+                    "missing_uploads": sorted(
+                        h["hotel_id"] for h in done if h["hotel_id"] not in uploaded
+                    ),
+                    "failed_steps": {
+                        h["hotel_id"]: [s for s, ok in h["steps"].items() if not ok]
+                        for h in rows
+                        if h["status"] != "done"
+                    },
+                }
+            finally:
+                os.chdir(cwd)
+    finally:
+        server.stop()
+    return {
+        "commit": _git_commit(),
+        "params": {
+            "nodes": nodes,
+            "hotels": hotels,
+            "workers": workers,
+            "lease_ttl": lease_ttl,
+            "kill_after": kill_after,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "seed": seed,
+        },
+        "result": result,
+    }
+
+
+def _print(report: dict) -> None:
+    p, r = report["params"], report["result"]
+    print(
+        f"commit {report['commit']}: {p['nodes']} узлов × {p['workers']} воркеров, "
+        f"{p['hotels']} отелей, аренда {p['lease_ttl']} s"
+        + (f", node1 убит через {p['kill_after']} s" if r["killed"] else "")
+    )
+    q = r["queue"]
+    print(
+        f"  {r['elapsed_s']} s, отелей/мин {r['hotels_per_min']}; "
+        f"готово {q['done']}, не собрано {q['failed']}, осталось "
+        f"{q['pending'] + q['leased']}; перешло к другому узлу {r['re_leased']}"
+    )
+    for node, n in r["nodes"].items():
+        print(f"  {node:<10}собрано {n['done']:>4}, не собрано {n['failed']:>3}")
+    if r["missing_uploads"]:
+        print(f"  ⚠ done без выгрузки: {', '.join(r['missing_uploads'])}")
+    for hid, steps in r["failed_steps"].items():
+        print(f"  ✖ {hid}: {', '.join(steps) or 'шаги не дошли'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--hotels", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--lease-ttl", type=int, default=30)
+    parser.add_argument("--kill-after", type=float, default=None)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = run(
+        max(1, args.nodes),
+        args.hotels,
+        args.workers,
+        args.lease_ttl,
+        args.kill_after,
+        args.latency_ms,
+        args.jitter_ms,
+        args.seed,
+    )
+    _print(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Бенчмарк движков DOCX: python-docx против прямой записи OOXML (ooxml_writer).
+
+Собирает один и тот же синтетический отчёт обоими движками, проверяет, что
+документы эквивалентны (текст абзацев, стили, ссылки, картинки байт-в-байт),
+и меряет пропускную способность (отчётов в секунду) и размер файла.
+
+    python -m benchmarks.bench_docx_engines [--reports 50] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from benchmarks.bench_docx_template import _synthetic_shots
+from config_app import DOCX_ENGINE_CHOICES
+from word_modules.create_word_file import _template, create_word_file
+from word_modules.docs_helpers import build_mapping
+
+
+def _fingerprint(docx_path: Path) -> list:
+    """Содержимое документа без служебных идентификаторов (rId, имена media)."""
+    doc = Document(docx_path)
+    rels = doc.part.rels
+    out = []
+    for p in doc.element.body.iter(qn("w:p")):
+        style = p.find(f"{qn('w:pPr')}/{qn('w:pStyle')}")
+        links = [
+            rels[h.get(qn("r:id"))].target_ref for h in p.iter(qn("w:hyperlink"))
+        ]
+        images = [
+            rels[b.get(qn("r:embed"))].target_part.blob
+            for b in p.iter(qn("a:blip"))
+        ]
+        text = "".join(t.text or "" for t in p.iter(qn("w:t")))
+        style_id = style.get(qn("w:val")) if style is not None else None
+        out.append((style_id, text, links, images))
+    return out
+
+
+def run(n: int) -> dict:
+    shots = _synthetic_shots()
+    mapping = build_mapping("al1", city="Hurghada", star="5*")
+    _template()  # каркас строится один раз за процесс — вне замера
+
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        paths = {}
+        for engine in DOCX_ENGINE_CHOICES:
+            path = out_dir / f"{engine}.docx"
+
+            def build():
+                create_word_file(
+                    "Bench Hotel",
+                    out_dir,
+                    "https://e.com",
+                    mapping,
+                    out_dir,
+                    shots,
+                    docx_path=path,
+                    engine=engine,
+                )
+
+            build()  # прогрев (в т.ч. разбор каркаса для ooxml)
+            timings = []
+            for _ in range(n):
+                t = perf_counter()
+                build()
+                timings.append(perf_counter() - t)
+            paths[engine] = path
+            result[engine] = {
+                "median_ms": round(statistics.median(timings) * 1000, 2),
+                "reports_per_s": round(1 / statistics.mean(timings), 1),
+                "size_kb": round(path.stat().st_size / 1024, 1),
+            }
+
+        first, *rest = DOCX_ENGINE_CHOICES
+        for engine in rest:
+            assert _fingerprint(paths[first]) == _fingerprint(paths[engine]), (
+                f"{engine}: документ отличается от {first}"
+            )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=50)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    result = run(args.reports)
+    print(f"{'engine':<14}{'median ms':>11}{'reports/s':>11}{'size KB':>10}")
+    for engine, row in result.items():
+        print(
+            f"{engine:<14}{row['median_ms']:>11}{row['reports_per_s']:>11}"
+            f"{row['size_kb']:>10}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
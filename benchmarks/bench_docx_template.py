@@ -0,0 +1,103 @@
+"""
+Бенчмарк сборки DOCX: каркас с нуля на каждый отчёт (как раньше) против
+копии готового шаблона (_new_report_document).
+
+Меряет отдельно создание каркаса и полный create_word_file на синтетическом
+отеле (шоты в памяти, чтобы не мерить диск).
+
+    python -m benchmarks.bench_docx_template [--reports 50] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import statistics
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from PIL import Image, ImageDraw
+
+from config_app import ENABLED_SHOTS
+from word_modules import create_word_file as cwf
+from word_modules.docs_helpers import build_mapping
+
+
+def _synthetic_shots() -> list[tuple[str, bytes]]:
+    shots = []
+    for i, shot in enumerate(ENABLED_SHOTS):
+        im = Image.new("RGB", (900, 300 + 40 * i), "white")
+        draw = ImageDraw.Draw(im)
+        for y in range(0, im.height, 24):
+            draw.line((0, y, 900, y), fill=(210, 210, 210))
+            draw.text((10, y + 4), f"{shot} row {y // 24}", fill=(0, 0, 0))
+        buf = io.BytesIO()
+        im.save(buf, "PNG")
+        shots.append((f"{shot}.png", buf.getvalue()))
+    return shots
+
+
+def _time(fn, n: int) -> list[float]:
+    out = []
+    for _ in range(n):
+        t = perf_counter()
+        fn()
+        out.append(perf_counter() - t)
+    return out
+
+
+def run(n: int) -> dict:
+    shots = _synthetic_shots()
+    mapping = build_mapping("al1", city="Hurghada", star="5*")
+    cwf._template()  # шаблон строится один раз за прогон — вне замера
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        def report(fresh: bool):
+            original = cwf._new_report_document
+            cwf._new_report_document = lambda: original(fresh=fresh)
+            try:
+                cwf.create_word_file(
+                    "Bench Hotel", out_dir, "https://e.com", mapping, out_dir, shots
+                )
+            finally:
+                cwf._new_report_document = original
+
+        timings = {
+            "scaffold_fresh": _time(lambda: cwf._new_report_document(fresh=True), n),
+            "scaffold_template": _time(lambda: cwf._new_report_document(), n),
+            "report_fresh": _time(lambda: report(True), n),
+            "report_template": _time(lambda: report(False), n),
+        }
+
+    return {
+        name: {
+            "median_ms": round(statistics.median(v) * 1000, 2),
+            "mean_ms": round(statistics.mean(v) * 1000, 2),
+        }
+        for name, v in timings.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=50)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    result = run(args.reports)
+    for name, row in result.items():
+        print(
+            f"{name:<20}{row['median_ms']:>10} ms (median)"
+            f"{row['mean_ms']:>10} ms (mean)"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
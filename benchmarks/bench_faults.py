@@ -0,0 +1,238 @@
+"""
+Бенчмарк ретраев под сбоями: сколько времени стек повторов (tenacity в шагах,
+повторы goto_strict, 10 попыток посещаемости, круги MAX_ATTEMPTS_RUN) тратит
+впустую и как быстро восстанавливается при каждом профиле replay_server.
+
+Для каждого профиля (и сначала для профиля none) те же отели гоняются
+кругами, как в parce_screenshots: первый круг — все, следующие — только
+недособранные, до --rounds. Сервер один на весь бенчмарк (config_app читает
+адреса при импорте), между профилями меняется только профиль сбоев и
+очищаются шоты в памяти.
+
+    потеряно, s       — сумма по отелям: время отеля под профилем (все круги)
+                        минус время того же отеля без сбоев; включает паузы
+                        tenacity и посещаемости, которых нет в спанах;
+    goto повторов     — переходы goto_strict с retry > 0;
+    goto впустую, s   — фазы goto_strict, закончившиеся ошибкой;
+    шаги упали, s     — шаги, упавшие после всех повторов tenacity;
+    восстановление    — по журналу сервера: от первого ломающего ответа
+                        страницы до первого здорового (p50 / max), и сколько
+                        страниц так и не получили здоровый ответ.
+
+    python -m benchmarks.bench_faults [--profiles http_burst,missing]
+        [--hotels 20] [--workers 4] [--rounds 3] [--latency-ms 80]
+        [--jitter-ms 40] [--seed 1] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from collections import defaultdict
+from dataclasses import asdict
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from benchmarks.bench_capture import _configure, _git_commit
+from benchmarks.replay_server import BREAKING_FAULTS, PROFILES, ReplayServer
+
+
+def _reset_artifacts() -> None:
+    from artifact_store import artifacts
+
+    for hotel_id, title in artifacts.hotels():
+        artifacts.drop(hotel_id, title)
+
+
+def _run_rounds(hotel_ids: List[str], rounds: int) -> dict:
+    """Круги как в run_create_report; спаны и время всех кругов."""
+    from config_app import SCREENSHOTS_DIR
+    from parce_screenshots_moduls.concurrent_runner import (
+        hotels_needing_retry,
+        run_concurrent,
+    )
+    from perf_trace import current_attempt, tracer
+
+    _reset_artifacts()
+    tracer.clear()
+    ids, used = hotel_ids, 0
+    t = perf_counter()
+    for attempt in range(1, rounds + 1):
+        current_attempt.set(attempt)
+        asyncio.run(run_concurrent(ids))
+        used = attempt
+        ids = hotels_needing_retry(SCREENSHOTS_DIR, hotel_ids)
+        if not ids:
+            break
+    return {
+        "elapsed_s": perf_counter() - t,
+        "rounds_used": used,
+        "complete": len(hotel_ids) - len(ids),
+        "spans": tracer.snapshot(),
+    }
+
+
+def _summarize(run: dict, recovery: List[dict], base: dict | None) -> dict:
+    spans = run.pop("spans")
+    hotel_s: Dict[str, float] = defaultdict(float)
+    for s in spans:
+        if s["cat"] == "hotel" and s.get("hotel"):
+            hotel_s[s["hotel"]] += s["dur"]
+
+    by_fault: Dict[str, List[dict]] = defaultdict(list)
+    for page in recovery:
+        for kind in page["faults"]:
+            by_fault[kind].append(page)
+    recover = {}
+    for kind in BREAKING_FAULTS:
+        pages = by_fault.get(kind, [])
+        times = sorted(p["recover_s"] for p in pages if p["recover_s"] is not None)
+        recover[kind] = {
+            "pages": len(pages),
+            "unrecovered": len(pages) - len(times),
+            "p50_s": round(times[len(times) // 2], 2) if times else None,
+            "max_s": round(times[-1], 2) if times else None,
+        }
+
+    gotos = [s for s in spans if s["cat"] == "goto"]
+    steps_failed = [s for s in spans if s["cat"] == "step" and not s["ok"]]
+    summary = {
+        "elapsed_s": round(run["elapsed_s"], 2),
+        "rounds_used": run["rounds_used"],
+        "complete": run["complete"],
+        "goto_retries": sum(1 for s in gotos if s["name"] == "goto" and s["retry"]),
+        "goto_failed_s": round(sum(s["dur"] for s in gotos if not s["ok"]), 2),
+        "steps_failed": len(steps_failed),
+        "steps_failed_s": round(sum(s["dur"] for s in steps_failed), 2),
+        "recovery": recover,
+        "hotel_s": {h: round(v, 3) for h, v in sorted(hotel_s.items())},
+    }
+    if base is not None:
+        paired = [h for h in hotel_s if h in base["hotel_s"]]
+        summary["wasted_s"] = round(
+            sum(hotel_s[h] - base["hotel_s"][h] for h in paired), 2
+        )
+        summary["wall_extra_s"] = round(summary["elapsed_s"] - base["elapsed_s"], 2)
+    return summary
+
+
+def run(
+    profiles: List[str],
+    hotels: int,
+    workers: int,
+    rounds: int,
+    latency_ms: float,
+    jitter_ms: float,
+    seed: int,
+) -> dict:
+    profiles = ["none"] + [p for p in profiles if p != "none"]
+    server = ReplayServer(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=seed)
+    server.start()
+    cwd = Path.cwd()
+    results: Dict[str, dict] = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            _configure(server, workers, Path(tmp))
+            try:
+                hotel_ids = [f"al{1000 + i}" for i in range(hotels)]
+                for name in profiles:
+                    print(f"▶ Профиль {name}…")
+                    server.set_faults(PROFILES[name])
+                    results[name] = _summarize(
+                        _run_rounds(hotel_ids, rounds),
+                        server.recovery(),
+                        results.get("none"),
+                    )
+            finally:
+                os.chdir(cwd)
+    finally:
+        server.stop()
+    return {
+        "commit": _git_commit(),
+        "params": {
+            "hotels": hotels,
+            "workers": workers,
+            "rounds": rounds,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "seed": seed,
+        },
+        "profiles": {name: asdict(PROFILES[name]) for name in profiles},
+        "results": results,
+    }
+
+
+def _print(report: dict) -> None:
+    p = report["params"]
+    print(
+        f"\ncommit {report['commit']}: {p['hotels']} отелей, {p['workers']} воркеров, "
+        f"до {p['rounds']} кругов, задержка {p['latency_ms']}±{p['jitter_ms']} ms, "
+        f"seed {p['seed']}"
+    )
+    print(
+        f"  {'профиль':<16}{'время s':>9}{'кругов':>8}{'собрано':>9}"
+        f"{'потеряно s':>12}{'goto повт.':>11}{'goto s':>8}{'шаги упали':>12}"
+    )
+    for name, r in report["results"].items():
+        failed = f"{r['steps_failed']}/{r['steps_failed_s']}s"
+        print(
+            f"  {name:<16}{r['elapsed_s']:>9}{r['rounds_used']:>8}"
+            f"{r['complete']:>6}/{p['hotels']:<2}{r.get('wasted_s', '—'):>12}"
+            f"{r['goto_retries']:>11}{r['goto_failed_s']:>8}{failed:>12}"
+        )
+    print(
+        f"\n  {'восстановление':<16}{'сбой':<16}{'страниц':>8}{'p50 s':>8}"
+        f"{'max s':>8}{'не восст.':>11}"
+    )
+    for name, r in report["results"].items():
+        for kind, rec in r["recovery"].items():
+            if rec["pages"]:
+                print(
+                    f"  {name:<16}{kind:<16}{rec['pages']:>8}"
+                    f"{rec['p50_s'] if rec['p50_s'] is not None else '—':>8}"
+                    f"{rec['max_s'] if rec['max_s'] is not None else '—':>8}"
+                    f"{rec['unrecovered']:>11}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--profiles",
+        default=",".join(p for p in PROFILES if p != "none"),
+        help=f"через запятую из: {', '.join(PROFILES)}",
+    )
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        parser.error(f"неизвестные профили: {', '.join(unknown)}")
+    report = run(
+        profiles,
+        args.hotels,
+        args.workers,
+        max(1, args.rounds),
+        args.latency_ms,
+        args.jitter_ms,
+        args.seed,
+    )
+    _print(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
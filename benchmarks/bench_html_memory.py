@@ -0,0 +1,112 @@
+"""
+Бенчмарк памяти HTML-отчёта: сборка строкой (_build_inline_html + write_text)
+против потоковой записи в файл (write_inline_html_file).
+
+Для каждого суммарного объёма картинок генерирует синтетическую папку отеля
+и меряет пиковое выделение памяти Python (tracemalloc) на сборку.
+У потоковой записи пик должен оставаться постоянным при любом объёме.
+
+    python -m benchmarks.bench_html_memory [--sizes-mb 1 4 16 64] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+from config_app import ENABLED_SHOTS
+from word_modules.create_html_version import (
+    _build_inline_html,
+    write_inline_html_file,
+)
+
+MAPPING = {
+    shot: f"Caption for {shot}: https://example.com/{shot}\n" for shot in ENABLED_SHOTS
+}
+
+
+def _make_folder(root: Path, total_mb: int) -> Path:
+    """Папка отеля: по одному файлу на шот, суммарно total_mb мегабайт."""
+    folder = root / f"al1_Bench {total_mb}MB"
+    folder.mkdir(parents=True)
+    per_file = total_mb * 1024 * 1024 // len(ENABLED_SHOTS)
+    for shot in ENABLED_SHOTS:
+        # содержимое для base64 не важно — важен только объём
+        (folder / f"{shot}.png").write_bytes(os.urandom(per_file))
+    return folder
+
+
+def _measure(fn) -> tuple[float, float]:
+    """(пик памяти МБ, время с) для вызова fn()."""
+    tracemalloc.start()
+    t = perf_counter()
+    fn()
+    elapsed = perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+def run(sizes_mb: list[int]) -> list[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for total_mb in sizes_mb:
+            folder = _make_folder(root, total_mb)
+            out_join = root / f"join_{total_mb}.html"
+            out_stream = root / f"stream_{total_mb}.html"
+
+            def build_join():
+                html = _build_inline_html("Bench", "https://e.com", MAPPING, folder)
+                out_join.write_text(html, encoding="utf-8")
+
+            def build_stream():
+                write_inline_html_file(
+                    out_stream, "Bench", "https://e.com", MAPPING, folder
+                )
+
+            join_peak, join_s = _measure(build_join)
+            stream_peak, stream_s = _measure(build_stream)
+            assert out_join.read_bytes() == out_stream.read_bytes(), "вывод различается"
+
+            rows.append(
+                {
+                    "images_mb": total_mb,
+                    "join_peak_mb": round(join_peak, 2),
+                    "join_s": round(join_s, 3),
+                    "stream_peak_mb": round(stream_peak, 2),
+                    "stream_s": round(stream_s, 3),
+                    "html_mb": round(out_stream.stat().st_size / 1024 / 1024, 2),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    rows = run(args.sizes_mb)
+    print(
+        f"{'images MB':>10}{'join peak MB':>15}{'join s':>9}"
+        f"{'stream peak MB':>17}{'stream s':>10}"
+    )
+    for r in rows:
+        print(
+            f"{r['images_mb']:>10}{r['join_peak_mb']:>15}{r['join_s']:>9}"
+            f"{r['stream_peak_mb']:>17}{r['stream_s']:>10}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
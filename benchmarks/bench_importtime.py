@@ -0,0 +1,127 @@
+"""
+Время импорта по этапам cli.py (сводка `python -X importtime`).
+
+Для каждого этапа в свежем процессе импортируются модули, которые этап
+подтягивает при запуске, и из вывода -X importtime берётся суммарное время
+импорта (cumulative модулей верхнего уровня), время процесса целиком и самые
+тяжёлые пакеты. Строка «config_app» — цена .env и логирования, которую
+платит любой этап; «report» — то, что раньше платил каждый запуск
+run_create_report.py.
+
+    python -m benchmarks.bench_importtime [--repeat 5] [--top 8] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+REPO = Path(__file__).resolve().parent.parent
+
+# этап -> код, повторяющий импорты этапа (см. cmd_* в cli.py)
+STAGES = {
+    "cli --help": "import cli; cli._parser()",
+    "config_app": "import config_app",
+    "scrape": "import parce_screenshots",
+    "build": "import move_shot_to_word",
+    "upload": "import run_to_google_drive",
+    "collect-ids": "import run_collect_id_hotels",
+    "report": "import move_shot_to_word, parce_screenshots",
+}
+
+
+def _parse(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """(сумма cumulative верхнего уровня, self-время по корневым пакетам), мкс."""
+    total = 0
+    packages: Dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        if len(name) - len(name.lstrip()) == 1:  # модуль верхнего уровня
+            total += int(cumulative)
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return total, packages
+
+
+def _measure(code: str) -> Tuple[float, float, Dict[str, int]]:
+    """(импорт ms, процесс ms, пакеты) одного запуска."""
+    t = perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+    )
+    wall = (perf_counter() - t) * 1000
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ""
+        raise RuntimeError(error or f"код выхода {proc.returncode}")
+    total, packages = _parse(proc.stderr)
+    return total / 1000, wall, packages
+
+
+def run(repeat: int, top: int) -> dict:
+    results = {}
+    for stage, code in STAGES.items():
+        try:
+            runs = [_measure(code) for _ in range(repeat)]
+        except RuntimeError as e:
+            results[stage] = {"error": str(e)}
+            continue
+        packages: Dict[str, List[int]] = defaultdict(list)
+        for _, _, pk in runs:
+            for name, us in pk.items():
+                packages[name].append(us)
+        heaviest = sorted(
+            ((name, statistics.median(v) / 1000) for name, v in packages.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:top]
+        results[stage] = {
+            "import_ms": round(statistics.median(r[0] for r in runs), 1),
+            "process_ms": round(statistics.median(r[1] for r in runs), 1),
+            "modules": len(packages),
+            "heaviest": {name: round(ms, 1) for name, ms in heaviest},
+        }
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _print(report: dict) -> None:
+    print(f"Python {report['python']}, медиана {report['repeat']} запусков")
+    print(f"  {'этап':<14}{'импорт ms':>11}{'процесс ms':>12}  самые тяжёлые (self ms)")
+    for stage, r in report["results"].items():
+        if "error" in r:
+            print(f"  {stage:<14}{'—':>11}{'—':>12}  ошибка импорта: {r['error']}")
+            continue
+        heavy = ", ".join(f"{n} {ms}" for n, ms in list(r["heaviest"].items())[:4])
+        print(f"  {stage:<14}{r['import_ms']:>11}{r['process_ms']:>12}  {heavy}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    report = run(max(1, args.repeat), args.top)
+    _print(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
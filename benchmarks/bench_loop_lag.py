@@ -0,0 +1,107 @@
+"""
+Бенчмарк задержек event loop: N «воркеров» имитируют обработку отеля —
+ожидание браузера (asyncio.sleep) + кроп PNG и запись шота на диск.
+Кроп/запись выполняются прямо в корутине (как раньше) или через run_blocking;
+LoopLagMonitor показывает, насколько loop был занят.
+
+    python -m benchmarks.bench_loop_lag [--workers 4] [--hotels 20] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from PIL import Image, ImageDraw
+
+from parce_screenshots_moduls.blocking_io import run_blocking, shutdown_blocking_io
+from parce_screenshots_moduls.loop_monitor import LoopLagMonitor
+from parce_screenshots_moduls.utils import crop_png
+
+
+def _raw_png() -> bytes:
+    """Скрин таблицы ~1400x3000: такой же порядок размера, как у 08_activity."""
+    im = Image.new("RGB", (1400, 3000), "white")
+    draw = ImageDraw.Draw(im)
+    for y in range(0, im.height, 20):
+        draw.line((0, y, 1400, y), fill=(200, 200, 200))
+        draw.text((10, y + 4), f"row {y // 20} activity 2026-10-01", fill=(0, 0, 0))
+    buf = io.BytesIO()
+    im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _crop_and_write(raw: bytes, path: Path) -> None:
+    path.write_bytes(crop_png(raw, lambda w, h: (0, 0, w, h // 2)))
+
+
+async def _worker(queue: asyncio.Queue, raw: bytes, out: Path, offload: bool) -> None:
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        for step in range(3):
+            await asyncio.sleep(0.05)  # ожидание страницы
+            path = out / f"{i}_{step}.png"
+            if offload:
+                await run_blocking(_crop_and_write, raw, path)
+            else:
+                _crop_and_write(raw, path)
+
+
+async def _run(workers: int, hotels: int, offload: bool, raw: bytes) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(hotels):
+        queue.put_nowait(i)
+    monitor = LoopLagMonitor(interval=0.02)
+    monitor.start()
+    t = perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        await asyncio.gather(
+            *(_worker(queue, raw, Path(tmp), offload) for _ in range(workers))
+        )
+    elapsed = perf_counter() - t
+    await monitor.stop()
+    return {**monitor.summary(), "elapsed_s": round(elapsed, 2)}
+
+
+def run(workers: int, hotels: int) -> dict:
+    raw = _raw_png()
+    result = {
+        mode: asyncio.run(_run(workers, hotels, mode == "run_blocking", raw))
+        for mode in ("inline", "run_blocking")
+    }
+    shutdown_blocking_io()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    result = run(args.workers, args.hotels)
+    print(
+        f"{'mode':<14}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'stalls':>8}{'total s':>9}"
+    )
+    for mode, r in result.items():
+        print(
+            f"{mode:<14}{r['p50_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+            f"{r['stalls']:>8}{r['elapsed_s']:>9}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Бенчмарк политик формата шотов на реальных скринах.
+
+Для каждой картинки из папок отелей кодирует её всеми политиками
+(png / png8 / jpeg) в памяти и меряет размер файла и время кодирования.
+Итог — по типу шота и по политике.
+
+    python -m benchmarks.bench_shot_formats [--dir screenshots] [--width 900] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+
+from PIL import Image
+
+from config_app import SCREENSHOTS_DIR, SHOT_FORMAT_CHOICES, IMAGE_EXTENSIONS
+from word_modules.shot_formats import encode_image, shot_policy
+
+
+def _iter_images(root: Path):
+    for p in sorted(root.rglob("*")):
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS:
+            yield p
+
+
+def run(root: Path, width_px: int | None, repeat: int) -> dict:
+    # (шот, политика) -> списки замеров
+    sizes = defaultdict(list)
+    times = defaultdict(list)
+    originals = defaultdict(list)
+
+    for p in _iter_images(root):
+        shot = p.stem
+        originals[shot].append(p.stat().st_size)
+        with Image.open(p) as im:
+            im.load()
+            if im.mode == "P":
+                im = im.convert("RGBA")  # сравниваем от полноцветного исходника
+            if width_px and im.width != width_px:
+                h = max(1, round(im.height * width_px / im.width))
+                im = im.convert("RGBA").resize((width_px, h), Image.LANCZOS)
+            for policy in SHOT_FORMAT_CHOICES:
+                best = None
+                for _ in range(repeat):
+                    t = perf_counter()
+                    data = encode_image(im, policy)
+                    dt = perf_counter() - t
+                    best = dt if best is None else min(best, dt)
+                sizes[(shot, policy)].append(len(data))
+                times[(shot, policy)].append(best)
+
+    result = {"root": str(root), "width_px": width_px, "shots": {}}
+    for shot in sorted(originals):
+        row = {
+            "count": len(originals[shot]),
+            "original_kb": round(statistics.mean(originals[shot]) / 1024, 1),
+            "configured": shot_policy(shot),
+            "policies": {},
+        }
+        for policy in SHOT_FORMAT_CHOICES:
+            row["policies"][policy] = {
+                "mean_kb": round(statistics.mean(sizes[(shot, policy)]) / 1024, 1),
+                "mean_ms": round(statistics.mean(times[(shot, policy)]) * 1000, 1),
+            }
+        result["shots"][shot] = row
+    return result
+
+
+def print_table(result: dict) -> None:
+    head = f"{'shot':<28}{'n':>5}{'orig KB':>10}"
+    for policy in SHOT_FORMAT_CHOICES:
+        head += f"{policy + ' KB':>12}{policy + ' ms':>11}"
+    print(head)
+    print("-" * len(head))
+    for shot, row in result["shots"].items():
+        line = f"{shot:<28}{row['count']:>5}{row['original_kb']:>10}"
+        for policy in SHOT_FORMAT_CHOICES:
+            cell = row["policies"][policy]
+            mark = "*" if row["configured"] == policy else " "
+            line += f"{cell['mean_kb']:>11}{mark}{cell['mean_ms']:>11}"
+        print(line)
+    print("\n* — политика из SHOT_FORMATS")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dir", type=Path, default=Path(SCREENSHOTS_DIR))
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    if not args.dir.is_dir():
+        raise NotADirectoryError(f"Папка со скринами не найдена: {args.dir}")
+
+    result = run(args.dir, args.width, args.repeat)
+    print_table(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"✔ JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+// Дешёвая имитация графиков статистики: столбики на canvas по data-bars/data-seed
+document.querySelectorAll("canvas[data-bars]").forEach(function (c) {
+  var ctx = c.getContext("2d"), n = +c.dataset.bars, seed = +c.dataset.seed || 1;
+  var w = c.width / n;
+  for (var i = 0; i < n; i++) {
+    seed = (seed * 16807) % 2147483647;
+    var h = (seed % 1000) / 1000 * (c.height - 20);
+    ctx.fillStyle = i % 2 ? "#4a7bd0" : "#7fa8ea";
+    ctx.fillRect(i * w + 2, c.height - h, w - 4, h);
+  }
+});
@@ -0,0 +1,522 @@
+"""
+Локальная замена tophotels.ru и PRO для бенчмарков шагов захвата (без сети).
+
+Страницы отелей строятся из шаблонов benchmarks/fixtures/replay/*.html для
+любого hotel_id (те же селекторы, что в moduls/locators.py), либо отдаются из
+записанных HAR (--har): записанный ответ важнее шаблона, ссылки на
+tophotels.ru / *.tophotels.pro в нём переписываются на этот сервер.
+
+    BASE_URL_TH  = http://127.0.0.1:<port>/th/en/
+    BASE_URL_PRO = http://127.0.0.1:<port>/pro/
+
+Каждый ответ задерживается на latency_ms ± jitter_ms; в страницу с
+вероятностью popup_rate вставляется попап-опрос (его снимает nuke_poll_overlay).
+Случайность детерминирована seed.
+
+Профиль сбоев (--faults, см. PROFILES) портит страницы отелей: медленный
+ответ, пачка 429/503, пропавший основной блок, баннер «incorrect data» и
+требование активации на посещаемости, неубираемый попап. Какая страница
+сломана и сколько загрузок подряд (burst), решает хеш seed + путь, а не
+порядок запросов — при любом числе воркеров сбои одни и те же. Журнал
+загрузок страниц отелей (page_log) даёт время восстановления: от первого
+сбойного ответа до первого здорового по тому же пути.
+
+    python -m benchmarks.replay_server [--port 8800] [--latency-ms 80]
+        [--jitter-ms 40] [--popup-rate 0.2] [--faults mixed] [--har run.har ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "replay"
+
+_TH_HOST_RE = re.compile(r"https?://(?:www\.)?tophotels\.ru")
+_PRO_HOST_RE = re.compile(r"https?://(?:[\w-]+\.)?tophotels\.pro")
+
+_TEXT_TYPES = ("text/", "application/javascript", "application/json")
+
+# (регулярка пути, шаблон) — путь без префикса /th/en или /pro, с одним «/»
+_TH_ROUTES = [
+    (re.compile(r"^/hotel/(?P<hotel_id>[\w-]+)/?$"), "th_hotel"),
+    (re.compile(r"^/hotel/(?P<hotel_id>[\w-]+)/reviews/?$"), "th_reviews"),
+]
+_HOTEL = r"/hotel/(?P<hotel_id>[\w-]+)"
+_PRO_ROUTES = [
+    (re.compile(r"^/?$"), "pro_index"),
+    (re.compile(r"^/auth/login/?$"), "pro_login"),
+    (re.compile(rf"^{_HOTEL}/new_stat/attendance$"), "pro_attendance"),
+    (re.compile(r"^/al/(?P<num>\d+)/stat/profile$"), "pro_profile"),
+    (re.compile(rf"^{_HOTEL}/new_stat/rating-hotels$"), "pro_rating"),
+    (re.compile(rf"^{_HOTEL}/activity/index$"), "pro_activity"),
+]
+
+# основной блок страницы отеля, который пропадает при сбое "missing"
+_MAIN_BLOCKS = {
+    "th_hotel": "section.stata-bubble",
+    "th_reviews": "div.card-hotel-wrap",
+    "pro_attendance": "#pg-container-stat",
+    "pro_profile": "table.hotel-stat-section",
+    "pro_rating": "#tab-pjax-index",
+    "pro_activity": "#tab-pjax-index",
+}
+_INCORRECT_DATA = (
+    '<div class="js-filter-info filter-new__info-wrap">At the moment, the service '
+    "may show incorrect data. We are already working on it.</div>"
+)
+_ACTIVATION = (
+    '<p class="stat-notice">Attention! For this report you need an additional '
+    "activation.</p>"
+)
+# попап без рабочего крестика, который возвращается после удаления/скрытия
+_STUCK_OVERLAY_JS = """<script>
+setInterval(function () {
+  var shown = false;
+  document.querySelectorAll('.lsfw-popup-wrap').forEach(function (w) {
+    var cs = getComputedStyle(w);
+    if (cs.visibility === 'hidden' || cs.display === 'none') w.remove();
+    else shown = true;
+  });
+  if (!shown) document.body.insertAdjacentHTML('beforeend', %s);
+}, 250);
+</script>"""
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Доли страниц отелей со сбоем; burst — сколько загрузок подряд он держится."""
+
+    slow_rate: float = 0  # доля медленных ответов (на каждую загрузку)
+    slow_ms: float = 5000
+    error_rate: float = 0  # 429/503 вместо страницы
+    missing_rate: float = 0  # нет основного блока
+    incorrect_data_rate: float = 0  # баннер на посещаемости
+    activation_rate: float = 0  # требование активации — постоянно, без burst
+    stuck_overlay_rate: float = 0
+    burst: int = 2
+
+
+PROFILES: Dict[str, FaultProfile] = {
+    "none": FaultProfile(),
+    "slow": FaultProfile(slow_rate=0.2, slow_ms=8000),
+    "http_burst": FaultProfile(error_rate=0.2, burst=2),
+    "missing": FaultProfile(missing_rate=0.15, burst=1),
+    "incorrect_data": FaultProfile(incorrect_data_rate=0.5, burst=3),
+    "activation": FaultProfile(activation_rate=0.3),
+    "stuck_overlay": FaultProfile(stuck_overlay_rate=0.2, burst=1),
+    "mixed": FaultProfile(
+        slow_rate=0.05,
+        error_rate=0.05,
+        missing_rate=0.05,
+        incorrect_data_rate=0.2,
+        activation_rate=0.1,
+        stuck_overlay_rate=0.05,
+        burst=2,
+    ),
+}
+# сбои, после которых страницу нужно загрузить заново (для времени восстановления)
+BREAKING_FAULTS = ("http_error", "missing", "incorrect_data", "stuck_overlay")
+
+
+def _seed(hotel_id: str, salt: str = "") -> int:
+    return int(hashlib.md5(f"{hotel_id}{salt}".encode()).hexdigest()[:8], 16) or 1
+
+
+def _roll(*key) -> float:
+    """Детерминированное «случайное» число [0, 1) по ключу."""
+    digest = hashlib.md5("|".join(map(str, key)).encode()).hexdigest()
+    return int(digest[:8], 16) / 2**32
+
+
+def _photo_svg(query: str) -> bytes:
+    hue = _seed(query) % 360
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="420" height="260">'
+        f'<rect width="420" height="260" fill="hsl({hue},45%,60%)"/>'
+        f'<circle cx="320" cy="70" r="40" fill="hsl({(hue + 40) % 360},70%,80%)"/>'
+        "</svg>"
+    ).encode("utf-8")
+
+
+def _fixture_fields(hotel_id: str) -> Dict[str, str]:
+    """Подстановки шаблонов: детерминированы hotel_id (сравнимые прогоны)."""
+    rnd = random.Random(_seed(hotel_id))
+    reviews = rnd.choice((12, 37, 64, 140, 512))
+    weeks = [f"W{w}" for w in range(1, 13)]
+    return {
+        "hotel_id": hotel_id,
+        "title": f"Replay Hotel {hotel_id}",
+        "star": f"{rnd.randint(3, 5)}*",
+        "reviews": str(reviews),
+        "seed": str(_seed(hotel_id, "a")),
+        "seed2": str(_seed(hotel_id, "b")),
+        "review_items": "".join(
+            f'<div class="review"><b>Guest {i}</b> '
+            f"{'Great beach and food. ' * rnd.randint(2, 8)}</div>"
+            for i in range(min(reviews, 20))
+        ),
+        "stat_rows": "".join(
+            f"<tr><td>Day {d}</td><td>{rnd.randint(50, 900)}</td>"
+            f"<td>{rnd.randint(1, 40)}</td></tr>"
+            for d in range(1, 31)
+        ),
+        "week_heads": "".join(f"<th>{w}</th>" for w in weeks),
+        "week_cells": "".join(f"<td>{rnd.randint(10, 5000)}</td>" for _ in weeks),
+        "rating_rows": "".join(
+            f"<tr><td>{pos}</td><td>Hotel #{pos}</td>"
+            f"<td>{rnd.randint(60, 99)}</td></tr>"
+            for pos in range(1, 51)
+        ),
+        "activity_rows": "".join(
+            f"<tr><td>2026-10-{(r % 28) + 1:02d}</td><td>View of prices</td>"
+            f"<td>agent{rnd.randint(1, 300)}</td></tr>"
+            for r in range(60)
+        ),
+        "user": "replay@example.com",
+    }
+
+
+def _load_har(paths: Iterable[Path]) -> Dict[str, Tuple[int, str, bytes]]:
+    """HAR -> {"/th/en/...?q" | "/pro/...?q": (status, content-type, body)}."""
+    entries: Dict[str, Tuple[int, str, bytes]] = {}
+    for path in paths:
+        har = json.loads(Path(path).read_text(encoding="utf-8"))
+        for entry in har["log"]["entries"]:
+            url = entry["request"]["url"]
+            if _TH_HOST_RE.match(url):
+                prefix = "/th"
+            elif _PRO_HOST_RE.match(url):
+                prefix = "/pro"
+            else:
+                continue
+            parts = urlsplit(url)
+            key = prefix + parts.path + (f"?{parts.query}" if parts.query else "")
+            content = entry["response"].get("content", {})
+            text = content.get("text") or ""
+            body = (
+                base64.b64decode(text)
+                if content.get("encoding") == "base64"
+                else text.encode("utf-8")
+            )
+            entries[key] = (
+                entry["response"]["status"],
+                content.get("mimeType") or "application/octet-stream",
+                body,
+            )
+    return entries
+
+
+class ReplayServer:
+    def __init__(
+        self,
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        popup_rate: float = 0,
+        seed: int = 1,
+        har: Iterable[Path] = (),
+        faults: FaultProfile = FaultProfile(),
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.popup_rate = popup_rate
+        self.seed = seed
+        self.faults = faults
+        self.requests = 0
+        # (время, путь, сбои) каждой загрузки страницы отеля
+        self.page_log: List[Tuple[float, str, FrozenSet[str]]] = []
+        self._loads: Dict[str, int] = defaultdict(int)
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._har = _load_har(har)
+        self._templates = {
+            p.stem: Template(p.read_text(encoding="utf-8"))
+            for p in FIXTURES.glob("*.html")
+        }
+        self._popup = self._templates.pop("popup").template
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def root(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def th_url(self) -> str:
+        return f"{self.root}/th/en/"
+
+    @property
+    def pro_url(self) -> str:
+        return f"{self.root}/pro/"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="replay-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def set_faults(self, faults: FaultProfile) -> None:
+        """Сменить профиль сбоев; счёт загрузок и журнал начинаются заново."""
+        with self._lock:
+            self.faults = faults
+            self._loads.clear()
+            self.page_log.clear()
+
+    # --- ответы -------------------------------------------------------------
+
+    def _delay(self) -> None:
+        with self._lock:
+            self.requests += 1
+            jitter = self._rnd.uniform(-self.jitter_ms, self.jitter_ms)
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+
+    def _popup_html(self) -> str:
+        with self._lock:
+            show = self._rnd.random() < self.popup_rate
+        return self._popup if show else ""
+
+    def _rewrite(self, body: bytes, ctype: str) -> bytes:
+        if not ctype.startswith(_TEXT_TYPES):
+            return body
+        text = body.decode("utf-8", errors="replace")
+        text = _TH_HOST_RE.sub(f"{self.root}/th", text)
+        text = _PRO_HOST_RE.sub(f"{self.root}/pro", text)
+        return text.encode("utf-8")
+
+    def _match(self, path: str) -> Optional[Tuple[str, str, str]]:
+        """(шаблон, hotel_id, путь без повторных «/») или None — маршрута нет."""
+        path = re.sub(r"/{2,}", "/", path)
+        if path.startswith("/th/en/"):
+            routes, rest = _TH_ROUTES, path[len("/th/en") :]
+        elif path == "/pro" or path.startswith("/pro/"):
+            routes, rest = _PRO_ROUTES, path[len("/pro") :]
+        else:
+            return None
+        for pattern, name in routes:
+            m = pattern.match(rest)
+            if m:
+                groups = m.groupdict()
+                hotel_id = groups.get("hotel_id") or f"al{groups.get('num', '0')}"
+                return name, hotel_id, path
+        return None
+
+    def _draw_faults(self, name: str, key: str) -> FrozenSet[str]:
+        """Сбои этой загрузки страницы: по seed, пути и номеру загрузки пути."""
+        if name not in _MAIN_BLOCKS:
+            return frozenset()
+        with self._lock:
+            self._loads[key] += 1
+            n = self._loads[key]
+        f, seed = self.faults, self.seed
+        faults = set()
+        if _roll(seed, "slow", key, n) < f.slow_rate:
+            faults.add("slow")
+        if n <= f.burst:
+            rates = [
+                ("http_error", f.error_rate),
+                ("missing", f.missing_rate),
+                ("stuck_overlay", f.stuck_overlay_rate),
+            ]
+            if name == "pro_attendance":
+                rates.append(("incorrect_data", f.incorrect_data_rate))
+            faults.update(kind for kind, rate in rates if _roll(seed, kind, key) < rate)
+        if name == "pro_attendance":
+            if _roll(seed, "activation", key) < f.activation_rate:
+                faults.add("activation")
+        faults = frozenset(faults)
+        with self._lock:
+            self.page_log.append((time.time(), key, faults))
+        return faults
+
+    def _render(self, name: str, hotel_id: str, faults: FrozenSet[str]) -> bytes:
+        fields = _fixture_fields(hotel_id)
+        popup = self._popup_html() if name != "pro_login" else ""
+        if "stuck_overlay" in faults:
+            stuck = self._popup.replace(
+                ' onclick="this.closest(\'.lsfw-popup-wrap\').remove()"', ""
+            )
+            stuck_js = json.dumps(stuck).replace("</", "<\\/")
+            popup = stuck + _STUCK_OVERLAY_JS % stuck_js
+        if "missing" in faults:
+            popup += (
+                f"<script>document.querySelectorAll({json.dumps(_MAIN_BLOCKS[name])})"
+                ".forEach(function (el) { el.remove(); });</script>"
+            )
+        fields.update(
+            th_base=f"{self.root}/th/en",
+            pro_base=f"{self.root}/pro",
+            popup=popup,
+            filter_info=_INCORRECT_DATA if "incorrect_data" in faults else "",
+            stat_notice=_ACTIVATION if "activation" in faults else "",
+        )
+        return self._templates[name].safe_substitute(fields).encode("utf-8")
+
+    def recovery(self) -> List[dict]:
+        """
+        По страницам, получившим ломающий сбой: какие сбои, сколько загрузок и
+        через сколько секунд после первого сбоя отдан здоровый ответ (None —
+        так и не отдан).
+        """
+        pages: Dict[str, dict] = {}
+        with self._lock:
+            log = list(self.page_log)
+        for ts, key, faults in log:
+            page = pages.get(key)
+            breaking = faults.intersection(BREAKING_FAULTS)
+            if page is None:
+                if not breaking:
+                    continue
+                page = pages[key] = {
+                    "page": key,
+                    "faults": set(),
+                    "loads": 0,
+                    "first_fault": ts,
+                    "recover_s": None,
+                }
+            page["loads"] += 1
+            page["faults"].update(breaking)
+            if not breaking and page["recover_s"] is None:
+                page["recover_s"] = round(ts - page["first_fault"], 3)
+        return [
+            {
+                "page": p["page"],
+                "faults": sorted(p["faults"]),
+                "loads": p["loads"],
+                "recover_s": p["recover_s"],
+            }
+            for p in pages.values()
+        ]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, ctype: str, body: bytes, headers=()) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                server._delay()
+                parts = urlsplit(self.path)
+                recorded = server._har.get(self.path) or server._har.get(parts.path)
+                if recorded:
+                    status, ctype, body = recorded
+                    self._send(status, ctype, server._rewrite(body, ctype))
+                elif parts.path == "/static/photo.svg":
+                    self._send(200, "image/svg+xml", _photo_svg(parts.query))
+                elif parts.path.startswith("/static/"):
+                    static = FIXTURES / "static" / Path(parts.path).name
+                    if not static.is_file():
+                        self.send_error(404)
+                        return
+                    ctype = {
+                        ".css": "text/css",
+                        ".js": "application/javascript",
+                    }.get(static.suffix, "application/octet-stream")
+                    self._send(200, ctype, static.read_bytes())
+                else:
+                    page = server._match(parts.path)
+                    if page is None:
+                        self.send_error(404)
+                        return
+                    name, hotel_id, path = page
+                    key = path + (f"?{parts.query}" if parts.query else "")
+                    faults = server._draw_faults(name, key)
+                    if "slow" in faults:
+                        time.sleep(server.faults.slow_ms / 1000)
+                    if "http_error" in faults:
+                        status = 429 if _roll(server.seed, "status", key) < 0.5 else 503
+                        self._send(
+                            status,
+                            "text/html; charset=utf-8",
+                            f"<h1>{status}</h1>".encode("utf-8"),
+                            [("Retry-After", "1")],
+                        )
+                        return
+                    body = server._render(name, hotel_id, faults)
+                    self._send(200, "text/html; charset=utf-8", body)
+
+            def do_POST(self) -> None:
+                # вход: любые логин/пароль, cookie и редирект на главную PRO
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                server._delay()
+                self._send(
+                    302,
+                    "text/plain",
+                    b"",
+                    [
+                        ("Location", server.pro_url),
+                        ("Set-Cookie", "replay_session=1; Path=/"),
+                    ],
+                )
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--popup-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--har", type=Path, action="append", default=[])
+    parser.add_argument("--faults", choices=sorted(PROFILES), default="none")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.port,
+        args.latency_ms,
+        args.jitter_ms,
+        args.popup_rate,
+        args.seed,
+        args.har,
+        PROFILES[args.faults],
+    ).start()
+    print(f"BASE_URL_TH={server.th_url}\nBASE_URL_PRO={server.pro_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Единая точка входа по этапам.
+
+    python cli.py report       — сбор шотов и сборка отчётов (как run_create_report.py)
+    python cli.py scrape       — только сбор шотов
+    python cli.py build        — только сборка DOCX/HTML из собранных шотов
+    python cli.py upload       — загрузка папки отчётов на Google Диск
+    python cli.py collect-ids  — сбор ID отелей сети в picked_hotel_ids.txt
+    python cli.py daemon       — тёплый браузер и HTTP API заданий (daemon.py)
+    python cli.py coordinate   — общая очередь отелей для нескольких машин
+    python cli.py node         — узел сбора: берёт отели из общей очереди
+
+Тяжёлые зависимости (Playwright, tqdm, tenacity, python-docx, PIL, Google API)
+импортируются только внутри выбранного этапа; --help не читает даже
+config_app (.env и логирование). Время импорта по этапам —
+benchmarks/bench_importtime.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from time import perf_counter
+from typing import List, Optional
+
+
+def _drop_auth_state() -> None:
+    # ТХ ПРО не видит регистрацию без проходки в регистрации — сессию не храним
+    import logging
+
+    from utils import delete_auth_state
+
+    try:
+        delete_auth_state()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning("Не удалось удалить auth_state.json: %s", e)
+
+
+def _elapsed(t1: float) -> None:
+    import logging
+
+    print(f"{'*' * 100} \nElapsed: {perf_counter() - t1:.1f}s\n {'*' * 100}")
+    logging.info("*" * 100)
+
+
+def cmd_report(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from config_app import DELETE_SCREENSHOTS, SLEEP, STREAM_BUILD, WIDTH_TABLES
+    from move_shot_to_word import StreamingReportBuilder, create_formatted_doc
+    from parce_screenshots import run_create_report
+    from perf_trace import tracer
+    from utils import delete_screenshots, sleep_system
+
+    t1 = perf_counter()
+    try:
+        if DELETE_SCREENSHOTS:
+            delete_screenshots()
+        _drop_auth_state()
+
+        if STREAM_BUILD:
+            # отчёты собираются по мере готовности отелей, параллельно со скрапингом
+            builder = StreamingReportBuilder(target_image_width_px=WIDTH_TABLES)
+            try:
+                asyncio.run(run_create_report(on_hotel_ready=builder.submit))
+            except BaseException:
+                builder.cancel()
+                raise
+            builder.finish()
+        else:
+            asyncio.run(run_create_report())
+            create_formatted_doc(target_image_width_px=WIDTH_TABLES)
+        _elapsed(t1)
+        if SLEEP:
+            sleep_system()
+    finally:
+        # спаны шагов, переходов, скриншотов и сборки -> PERF_DIR (и сводка в лог)
+        tracer.write_report()
+        if DELETE_SCREENSHOTS:
+            delete_screenshots()
+        _drop_auth_state()
+
+
+def cmd_scrape(args: argparse.Namespace) -> None:
+    import asyncio
+    import logging
+
+    from artifact_store import in_memory
+    from config_app import ARTIFACT_SPILL, DELETE_SCREENSHOTS
+    from parce_screenshots import run_create_report
+    from perf_trace import tracer
+    from utils import delete_screenshots
+
+    if in_memory() and not ARTIFACT_SPILL:
+        logging.warning(
+            "⚠ ARTIFACT_MODE=memory без ARTIFACT_SPILL: шоты не переживут процесс, "
+            "отдельный build их не увидит"
+        )
+    t1 = perf_counter()
+    try:
+        if DELETE_SCREENSHOTS:
+            delete_screenshots()
+        _drop_auth_state()
+        asyncio.run(run_create_report())
+        _elapsed(t1)
+    finally:
+        tracer.write_report()
+        _drop_auth_state()
+
+
+def cmd_build(args: argparse.Namespace) -> None:
+    from artifact_store import artifacts, in_memory
+    from config_app import (
+        ARTIFACT_SPILL,
+        DELETE_SCREENSHOTS,
+        SCREENSHOTS_DIR,
+        WIDTH_TABLES,
+    )
+    from move_shot_to_word import create_formatted_doc
+    from perf_trace import tracer
+    from utils import delete_screenshots
+
+    if in_memory() and ARTIFACT_SPILL:
+        loaded = artifacts.load_spilled()
+        print(f"↺ Загружено из {SCREENSHOTS_DIR}: {loaded} шотов")
+    t1 = perf_counter()
+    try:
+        create_formatted_doc(target_image_width_px=args.width or WIDTH_TABLES)
+        _elapsed(t1)
+    finally:
+        tracer.write_report()
+        if DELETE_SCREENSHOTS and not args.keep_screenshots:
+            delete_screenshots()
+
+
+def cmd_upload(args: argparse.Namespace) -> None:
+    from run_to_google_drive import main as upload_main
+
+    upload_main(
+        workers=args.workers,
+        sync=False if args.full else None,
+        dry_run=args.dry_run,
+        refresh=args.refresh,
+    )
+
+
+def cmd_collect_ids(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from run_collect_id_hotels import run_collect_id_from_link
+
+    asyncio.run(run_collect_id_from_link())
+
+
+def cmd_daemon(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    from config_app import DAEMON_PORT
+
+    uvicorn.run("daemon:app", host="127.0.0.1", port=args.port or DAEMON_PORT)
+
+
+def cmd_coordinate(args: argparse.Namespace) -> None:
+    import time
+
+    from config_app import HOTELS_IDS_FILE, SCREENSHOTS_DIR
+    from utils import load_hotel_ids
+    from work_queue import WorkQueue, collect
+
+    queue = WorkQueue()
+    added = queue.seed(load_hotel_ids(HOTELS_IDS_FILE), reset=args.reset)
+    print(f"📥 {queue.path}: добавлено {added} ID")
+    if args.retry_failed:
+        print(f"↺ failed -> pending: {queue.requeue_failed()}")
+    while True:
+        stats = queue.stats()
+        nodes = ", ".join(
+            f"{n['node']} {n['done']}✔/{n['leased']}⏳" for n in queue.nodes()
+        )
+        print(
+            f"  ждут {stats['pending']}, в работе {stats['leased']} "
+            f"(просрочено {stats['expired']}), готово {stats['done']}, "
+            f"не собрано {stats['failed']} | {nodes or 'узлов нет'}"
+        )
+        if not args.watch or not queue.open_count():
+            break
+        time.sleep(args.watch)
+    if args.collect:
+        print(f"📦 В {SCREENSHOTS_DIR}: {collect()} отелей")
+
+
+def cmd_node(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from parce_screenshots_moduls.work_node import run_node
+    from perf_trace import tracer
+
+    t1 = perf_counter()
+    _drop_auth_state()
+    try:
+        asyncio.run(run_node(node=args.name))
+        _elapsed(t1)
+    finally:
+        tracer.write_report()
+        _drop_auth_state()
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="TopHotels: сбор шотов, отчёты и загрузка"
+    )
+    sub = parser.add_subparsers(dest="stage", required=True, metavar="этап")
+    stages = {}
+    for name, func, help_ in (
+        ("report", cmd_report, "сбор шотов и сборка отчётов"),
+        ("scrape", cmd_scrape, "только сбор шотов"),
+        ("build", cmd_build, "сборка DOCX/HTML из собранных шотов"),
+        ("upload", cmd_upload, "загрузка отчётов на Google Диск"),
+        ("collect-ids", cmd_collect_ids, "сбор ID отелей сети"),
+        ("daemon", cmd_daemon, "демон с тёплым браузером и очередью заданий"),
+        ("coordinate", cmd_coordinate, "общая очередь отелей (WORK_QUEUE_DB)"),
+        ("node", cmd_node, "узел сбора из общей очереди"),
+    ):
+        stages[name] = sub.add_parser(name, help=help_)
+        stages[name].set_defaults(func=func)
+    stages["build"].add_argument(
+        "--width", type=int, default=None, help="ширина картинок, px (WIDTH_TABLES)"
+    )
+    stages["build"].add_argument(
+        "--keep-screenshots",
+        action="store_true",
+        help="не удалять шоты после сборки (DELETE_SCREENSHOTS)",
+    )
+    stages["upload"].add_argument(
+        "--workers", type=int, default=None, help="потоков загрузки (UPLOAD_WORKERS)"
+    )
+    stages["upload"].add_argument(
+        "--full",
+        action="store_true",
+        help="загрузить всё заново, без сверки с Диском (UPLOAD_SYNC=False)",
+    )
+    stages["upload"].add_argument(
+        "--dry-run", action="store_true", help="только показать, что будет загружено"
+    )
+    stages["upload"].add_argument(
+        "--refresh",
+        action="store_true",
+        help="перечитать дерево Диска вместо манифеста и кэша ID папок",
+    )
+    stages["daemon"].add_argument(
+        "--port", type=int, default=None, help="порт HTTP API (DAEMON_PORT)"
+    )
+    stages["coordinate"].add_argument(
+        "--reset", action="store_true", help="очистить очередь перед заливкой ID"
+    )
+    stages["coordinate"].add_argument(
+        "--retry-failed", action="store_true", help="вернуть failed в очередь"
+    )
+    stages["coordinate"].add_argument(
+        "--watch",
+        type=int,
+        default=0,
+        metavar="S",
+        help="печатать прогресс каждые S секунд, пока очередь не опустеет",
+    )
+    stages["coordinate"].add_argument(
+        "--collect",
+        action="store_true",
+        help="в конце скопировать шоты узлов в SCREENSHOTS_DIR (для build)",
+    )
+    stages["node"].add_argument(
+        "--name", default=None, help="имя узла (WORK_NODE, по умолчанию host-pid)"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,8 +1,12 @@
+import atexit
 import logging
+import multiprocessing
 import os
+import queue
 import re
+import shlex
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -13,22 +17,76 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 CURRENT_MONTH = os.getenv("CURRENT_MONTH") or datetime.now().strftime("%B")
 CURRENT_YEAR = os.getenv("CURRENT_YEAR") or datetime.now().strftime("%Y")
 
-file_handler = RotatingFileHandler(
-    SCRIPT_DIR / "script.log",
-    mode="a",
-    maxBytes=5 * 1024 * 1024,
-    backupCount=3,
-    encoding="utf-8",
-)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] %(levelname)s: %(message)s",
-    handlers=[
-        file_handler,
-        logging.StreamHandler(),
-    ],
-)
+# Логи пишутся не из вызывающего кода (в т.ч. корутин воркеров), а из отдельного
+# потока: QueueHandler только кладёт запись в очередь, файл и консоль — в QueueListener
+_log_format = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(_log_format)
+
+if multiprocessing.current_process().name != "MainProcess":
+    # процесс пула, запущенный через spawn (Windows), заново импортирует модуль:
+    # без своего слушателя и без script.log — файл ведёт главный процесс
+    _log_handlers = [_console_handler]
+    logging.basicConfig(level=logging.INFO, handlers=_log_handlers)
+else:
+    file_handler = RotatingFileHandler(
+        SCRIPT_DIR / "script.log",
+        mode="a",
+        maxBytes=5 * 1024 * 1024,
+        backupCount=3,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(_log_format)
+    _log_handlers = [file_handler, _console_handler]
+    _log_queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(_log_queue)
+    _queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+    log_listener = QueueListener(
+        _log_queue, *_log_handlers, respect_handler_level=True
+    )
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+
+def _log_directly_after_fork() -> None:
+    # в форкнутом процессе (пул сборки на Linux) потока-слушателя нет; script.log
+    # не трогаем — до init_worker_logging только консоль
+    logging.getLogger().handlers = [_console_handler]
+
+
+if hasattr(os, "register_at_fork"):  # только Unix
+    os.register_at_fork(after_in_child=_log_directly_after_fork)
+
+_worker_log_queue = None
+
+
+def worker_log_queue():
+    """
+    Очередь для логов процессов пула сборки (initargs к init_worker_logging).
+    Записи из неё пишет в script.log и консоль слушатель главного процесса —
+    ротацию файла из нескольких процессов Windows не даёт сделать.
+    Создаётся в контексте spawn: такую очередь принимают и fork-, и spawn-пулы.
+    """
+    global _worker_log_queue
+    if _worker_log_queue is None:
+        _worker_log_queue = multiprocessing.get_context("spawn").Queue()
+        listener = QueueListener(
+            _worker_log_queue, *_log_handlers, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(listener.stop)
+    return _worker_log_queue
+
+
+def init_worker_logging(log_queue) -> None:
+    """initializer пула процессов: логи воркера — в очередь главного процесса."""
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
 
 EMAIL = os.getenv("EMAIL")
 PASSWORD = os.getenv("PASSWORD")
@@ -38,6 +96,9 @@ OUTPUT_FILE_COUNTER_REVIEW = os.getenv(
 )
 
 SCREENSHOTS_DIR = SCRIPT_DIR / "screenshots"
+# состояние прогона (отели, шоты, метаданные, шаги) — SQLite; по умолчанию
+# рядом с шотами, чтобы delete_screenshots сбрасывал их вместе
+RESULTS_DB = Path(os.getenv("RESULTS_DB") or SCREENSHOTS_DIR / "results.db")
 
 BASE_URL_TH = os.getenv("BASE_URL_TH", "https://tophotels.ru/en/")
 BASE_URL_PRO = os.getenv("BASE_URL_PRO", "https://ssa.tophotels.pro/")
@@ -47,8 +108,46 @@ DELAY_FOR_DELETE = int(os.getenv("DELAY_FOR_DELETE", 500))
 RETRIES_FOR_DELETE_LOCATORS = int(os.getenv("RETRIES_FOR_DELETE_LOCATORS", 3))
 
 HEADLESS = os.getenv("HEADLESS", "True").strip().lower() == "true"
+# доп. аргументы запуска Chromium (строка как в shell), например --host-resolver-rules=...
+BROWSER_ARGS = shlex.split(os.getenv("BROWSER_ARGS", ""))
 
 CONCURRENCY = int(os.getenv("CONCURRENCY", "1"))
+# пересоздание контекста воркера (память рендерера): после N отелей
+# или когда JS-куча страницы больше N MB; 0 — не проверять
+RECYCLE_AFTER_HOTELS = int(os.getenv("RECYCLE_AFTER_HOTELS") or 50)
+RECYCLE_HEAP_MB = int(os.getenv("RECYCLE_HEAP_MB") or 512)
+# потоков для блокирующей работы воркеров (запись шотов и метаданных, PIL)
+IO_WORKERS = int(os.getenv("IO_WORKERS", 4))
+# порог «остановки» event loop для монитора задержек, мс
+LOOP_LAG_WARN_MS = int(os.getenv("LOOP_LAG_WARN_MS", 100))
+# инструментирование loop (задержки, медленные колбэки, время шагов) -> JSONL
+INSTRUMENT = os.getenv("INSTRUMENT", "False").strip().lower() == "true"
+INSTRUMENT_TRACE = Path(os.getenv("INSTRUMENT_TRACE") or SCRIPT_DIR / "loop_trace.jsonl")
+SLOW_CALLBACK_MS = int(os.getenv("SLOW_CALLBACK_MS", 100))
+# куда писать спаны (JSONL, Chrome trace) и отчёт о производительности прогона
+PERF_DIR = Path(os.getenv("PERF_DIR") or SCRIPT_DIR / "perf")
+# сколько последних спанов держать в памяти для отчёта (живым метрикам и
+# results_store спаны отдаются слушателями, их лимит не касается)
+PERF_MAX_SPANS = int(os.getenv("PERF_MAX_SPANS") or 100000)
+# снимки при падении шага (DOM, скриншот, последние события страницы)
+FORENSICS = os.getenv("FORENSICS", "True").strip().lower() == "true"
+FORENSICS_DIR = Path(os.getenv("FORENSICS_DIR") or SCRIPT_DIR / "forensics")
+FORENSICS_MAX_MB = int(os.getenv("FORENSICS_MAX_MB") or 200)
+FORENSICS_RING = int(os.getenv("FORENSICS_RING") or 50)
+# порт HTTP-метрик прогона (/metrics — Prometheus, /metrics.json); 0 — выключено
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 8765)
+# демон (daemon.py): порт локального HTTP API и срок жизни сессии ТХ ПРО, мин
+DAEMON_PORT = int(os.getenv("DAEMON_PORT") or 8770)
+DAEMON_SESSION_TTL_MIN = int(os.getenv("DAEMON_SESSION_TTL_MIN") or 120)
+# распределённый сбор (cli.py coordinate / node): очередь SQLite на общем диске,
+# куда узлы выгружают шоты и метаданные готовых отелей, аренда ID и её продление
+WORK_QUEUE_DB = Path(os.getenv("WORK_QUEUE_DB") or SCRIPT_DIR / "work_queue.db")
+WORK_ARTIFACTS_DIR = Path(
+    os.getenv("WORK_ARTIFACTS_DIR") or WORK_QUEUE_DB.parent / "shared_screenshots"
+)
+WORK_LEASE_TTL_S = int(os.getenv("WORK_LEASE_TTL_S") or 600)
+# ID за одну аренду; 0 — по числу воркеров (CONCURRENCY)
+WORK_LEASE_BATCH = int(os.getenv("WORK_LEASE_BATCH") or 0)
 AUTH_STATE = Path("auth_state.json")
 
 MAX_ATTEMPTS_RUN = int(os.getenv("MAX_ATTEMPTS_RUN", 5))
@@ -59,16 +158,67 @@ SLEEP = os.getenv("SLEEP", "False").strip().lower() == "true"
 RESOLUTION_H = int(os.getenv("RESOLUTION_H", 1000))
 RESOLUTION_W = int(os.getenv("RESOLUTION_W", 1005))
 
-PAGE_BREAK_FILES = {"07_rating_in_hurghada.png", "08_activity.png", "04_attendance.png"}
+# Шоты идентифицируются по имени без расширения: расширение зависит от политики формата
+PAGE_BREAK_SHOTS = {"07_rating_in_hurghada", "08_activity", "04_attendance"}
 ENABLED_SHOTS = [
-    "01_top_element.png",
-    "02_populars_element.png",
-    "03_reviews.png",
-    "04_attendance.png",
-    "06_service_prices.png",
-    "07_rating_in_hurghada.png",
-    "08_activity.png",
+    "01_top_element",
+    "02_populars_element",
+    "03_reviews",
+    "04_attendance",
+    "06_service_prices",
+    "07_rating_in_hurghada",
+    "08_activity",
 ]
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Форматы хранения шотов:
+#   png  — полноцветный PNG без потерь
+#   png8 — PNG с палитрой (таблицы и графики: мало цветов, сильно меньше размер)
+#   jpeg — JPEG с качеством JPEG_QUALITY (фото-блоки)
+# WebP не используем: тот же файл встраивается в DOCX, а Word его не поддерживает.
+SHOT_FORMAT_CHOICES = ("png", "png8", "jpeg")
+SHOT_FORMAT_DEFAULT = os.getenv("SHOT_FORMAT_DEFAULT", "png").strip().lower()
+if SHOT_FORMAT_DEFAULT not in SHOT_FORMAT_CHOICES:
+    logging.warning(
+        "SHOT_FORMAT_DEFAULT: неизвестный формат %r, берём png", SHOT_FORMAT_DEFAULT
+    )
+    SHOT_FORMAT_DEFAULT = "png"
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", 85))
+PNG_PALETTE_COLORS = int(os.getenv("PNG_PALETTE_COLORS", 256))
+
+
+def _parse_shot_formats(raw: str) -> dict:
+    """'01_top_element=jpeg,03_reviews=png8' -> {'01_top_element': 'jpeg', ...}"""
+    result = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        shot, fmt = (x.strip() for x in item.split("=", 1))
+        fmt = fmt.lower()
+        if shot and fmt in SHOT_FORMAT_CHOICES:
+            result[shot] = fmt
+        elif shot:
+            logging.warning("SHOT_FORMATS: неизвестный формат %r для %s", fmt, shot)
+    return result
+
+
+# Форматы по шотам, пока SHOT_FORMATS пуст. Заданный SHOT_FORMATS (в т.ч. "off")
+# заменяет их целиком: не перечисленные в нём шоты идут в SHOT_FORMAT_DEFAULT.
+SHOT_FORMATS_BUILTIN = {
+    "01_top_element": "jpeg",
+    "02_populars_element": "png8",
+    "03_reviews": "png8",
+    "04_attendance": "png8",
+    "06_service_prices": "png8",
+    "07_rating_in_hurghada": "png8",
+    "08_activity": "png8",
+}
+_shot_formats_env = os.getenv("SHOT_FORMATS", "").strip()
+SHOT_FORMATS = (
+    _parse_shot_formats(_shot_formats_env)
+    if _shot_formats_env
+    else dict(SHOT_FORMATS_BUILTIN)
+)
 # Word
 FONT_NAME = "Roboto"
 FONT_SIZE_TITLE = 12
@@ -77,6 +227,26 @@ FONT_SIZE_CAPTION = 13
 
 IMAGE_WIDTH_INCHES = 6  # ширина вставки в DOCX (это не пиксели файла; файл мы теперь можем заранее привести)
 URL_RE = re.compile(r"(https?://[^\s)]+)")
+# движок DOCX: python-docx — через дерево python-docx; ooxml — прямая запись XML в zip
+DOCX_ENGINE_CHOICES = ("python-docx", "ooxml")
+DOCX_ENGINE = os.getenv("DOCX_ENGINE", "python-docx").strip().lower()
+if DOCX_ENGINE not in DOCX_ENGINE_CHOICES:
+    logging.warning(
+        "DOCX_ENGINE: неизвестный движок %r, берём python-docx", DOCX_ENGINE
+    )
+    DOCX_ENGINE = "python-docx"
 
 WIDTH_TABLES = int(os.getenv("WIDTH_TABLES") or 900)
+# процессов для сборки DOCX/HTML (1 — последовательно в текущем процессе)
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS") or os.cpu_count() or 1)
+# собирать отчёты параллельно со скрапингом, по мере готовности отелей
+STREAM_BUILD = os.getenv("STREAM_BUILD", "True").strip().lower() == "true"
+# пропускать отели, у которых не изменились шоты, метаданные и настройки сборки
+BUILD_CACHE = os.getenv("BUILD_CACHE", "True").strip().lower() == "true"
+BUILD_CACHE_FILE = Path(os.getenv("BUILD_CACHE_FILE") or SCRIPT_DIR / "build_cache.json")
+
+# disk — шоты пишутся в папки отелей; memory — держим байты в памяти до DOCX/HTML
+ARTIFACT_MODE = os.getenv("ARTIFACT_MODE", "disk").strip().lower()
+# в режиме memory дополнительно сбрасывать шоты на диск (отладка / докачка)
+ARTIFACT_SPILL = os.getenv("ARTIFACT_SPILL", "False").strip().lower() == "true"
 DELETE_SCREENSHOTS =  os.getenv("DELETE_SCREENSHOTS", "True").strip().lower() == "true"
\ No newline at end of file
@@ -0,0 +1,374 @@
+"""
+Демон: тёплый браузер и авторизованная сессия ТХ ПРО между прогонами.
+
+Обычный запуск каждый раз платит холодный старт — импорты, запуск Chromium,
+логин, переключение языка — и в конце всё сносит. Демон делает это один раз
+при старте и принимает задания по локальному HTTP API:
+
+    POST   /jobs/capture   {"hotel_ids": [...], "priority": 5, "build": true}
+    POST   /jobs/rebuild   {"hotel_ids": [...]} или {"chain": "..."} (не оба), "force"
+    GET    /jobs           очередь и история
+    GET    /jobs/{id}      статус задания
+    DELETE /jobs/{id}      отменить задание, которое ещё в очереди
+    GET    /health         браузер, возраст сессии, длина очереди
+
+Задания выполняются по одному, меньший priority — раньше (при равном — по
+порядку постановки). Контексты браузера по-прежнему создаются на каждое
+задание (у воркеров свои), тёплыми остаются процесс браузера и auth_state.json.
+Если браузер упал — перезапускается перед следующим заданием; сессия
+перелогинивается, когда старше DAEMON_SESSION_TTL_MIN. Отчёты собираются на
+пуле процессов, который создаётся при старте (spawn) и живёт до остановки.
+
+Шоты демон целиком не удаляет: capture забывает старые шоты только у своих
+отелей.
+
+    python cli.py daemon   (или uvicorn daemon:app --port 8770)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException
+from playwright.async_api import Browser, Playwright, async_playwright
+from pydantic import BaseModel, Field
+
+from artifact_store import artifacts
+from config_app import (
+    AUTH_STATE,
+    BROWSER_ARGS,
+    DAEMON_SESSION_TTL_MIN,
+    HEADLESS,
+    MAX_ATTEMPTS_RUN,
+    PERF_DIR,
+    SCREENSHOTS_DIR,
+    WIDTH_TABLES,
+)
+from metadata_store import metadata
+from move_shot_to_word import (
+    create_formatted_doc,
+    hotels_in_chain,
+    spawn_build_pool,
+)
+from parce_screenshots_moduls import forensics
+from parce_screenshots_moduls.concurrent_runner import (
+    hotels_needing_retry,
+    login_once_and_save_state,
+    run_concurrent,
+)
+from perf_trace import current_attempt, tracer
+from results_store import results
+from utils import delete_auth_state
+
+JOBS_HISTORY = 500
+
+
+@dataclass
+class Job:
+    id: str
+    kind: Literal["capture", "rebuild"]
+    params: dict
+    priority: int
+    status: str = "queued"  # queued | running | done | failed | cancelled
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "created": self.created,
+            "wait_s": round((self.started or end) - self.created, 2),
+            "run_s": round(end - self.started, 2) if self.started else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _summary(built) -> dict:
+    """BuildResult -> счётчики и ID отелей, которые не собрались."""
+    return {
+        "ok": sum(1 for r in built if r.ok and not r.skipped),
+        "skipped": sum(1 for r in built if r.skipped),
+        "failed": [r.hotel_id for r in built if not r.ok],
+    }
+
+
+def _forget_shots(hotel_ids: List[str]) -> None:
+    """Старые шоты и метаданные отелей, чтобы capture собрал их заново."""
+    wanted = set(hotel_ids)
+    for hid, title in artifacts.hotels():
+        if hid in wanted:
+            artifacts.drop(hid, title)
+    for hid in wanted:
+        metadata.forget(hid)
+        results.forget(hid)
+
+
+class ScraperDaemon:
+    def __init__(self) -> None:
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.logged_in_at: Optional[float] = None
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.jobs: Dict[str, Job] = {}
+        self.current: Optional[Job] = None
+        self._seq = itertools.count()
+        self._runner: Optional[asyncio.Task] = None
+        # пул сборки живёт весь процесс; spawn — fork из uvicorn с потоками опасен
+        self.build_pool: Optional[ProcessPoolExecutor] = None
+
+    # ---------- браузер и сессия ----------
+
+    async def start(self) -> None:
+        self.build_pool = spawn_build_pool()
+        self.playwright = await async_playwright().start()
+        await self._ensure_browser()
+        await self._ensure_session()
+        self._runner = asyncio.create_task(self._run())
+        logging.info("🟢 Демон готов: браузер запущен, сессия активна")
+
+    async def stop(self) -> None:
+        if self._runner:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        if self.build_pool:
+            self.build_pool.shutdown(wait=True, cancel_futures=True)
+        delete_auth_state()
+
+    async def _ensure_browser(self) -> None:
+        if self.browser is not None and self.browser.is_connected():
+            return
+        if self.browser is not None:
+            logging.warning("⚠ Браузер отвалился — перезапускаем")
+        self.browser = await self.playwright.chromium.launch(
+            headless=HEADLESS, args=BROWSER_ARGS
+        )
+        self.logged_in_at = None
+
+    async def _ensure_session(self) -> None:
+        ttl = DAEMON_SESSION_TTL_MIN * 60
+        if (
+            self.logged_in_at is not None
+            and AUTH_STATE.exists()
+            and time.time() - self.logged_in_at < ttl
+        ):
+            return
+        delete_auth_state()
+        await login_once_and_save_state(self.browser)
+        self.logged_in_at = time.time()
+
+    # ---------- очередь ----------
+
+    def submit(self, kind: str, params: dict, priority: int) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=params, priority=priority)
+        self.jobs[job.id] = job
+        self.queue.put_nowait((priority, next(self._seq), job))
+        self._trim()
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status == "queued":
+            # из PriorityQueue не вынуть — раннер пропустит отменённое
+            job.status = "cancelled"
+            job.finished = time.time()
+        return job
+
+    def _trim(self) -> None:
+        extra = len(self.jobs) - JOBS_HISTORY
+        if extra <= 0:
+            return
+        done = [j for j in self.jobs.values() if j.finished is not None]
+        for job in sorted(done, key=lambda j: j.finished)[:extra]:
+            del self.jobs[job.id]
+
+    async def _run(self) -> None:
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                if job.status != "queued":
+                    continue
+                self.current = job
+                job.status, job.started = "running", time.time()
+                # у каждого задания своя папка снимков и свой лимит FORENSICS_MAX_MB
+                forensics.new_run(f"job_{job.id}")
+                logging.info("▶ Задание %s: %s %s", job.id, job.kind, job.params)
+                try:
+                    if job.kind == "capture":
+                        job.result = await self._capture(**job.params)
+                    else:
+                        job.result = await self._rebuild(**job.params)
+                    job.status = "done"
+                except Exception as e:
+                    logging.exception("❌ Задание %s упало: %s", job.id, e)
+                    job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+                finally:
+                    job.finished = time.time()
+                    self.current = None
+                    # спаны задания — в свою папку (write_report их и сбрасывает)
+                    tracer.write_report(PERF_DIR / f"job_{job.id}")
+            finally:
+                self.queue.task_done()
+
+    # ---------- задания ----------
+
+    async def _capture(self, hotel_ids: List[str], attempts: int, build: bool) -> dict:
+        await self._ensure_browser()
+        await self._ensure_session()
+        _forget_shots(hotel_ids)
+
+        ids, rounds = hotel_ids, 0
+        results.begin_run("daemon")
+        try:
+            for attempt in range(1, attempts + 1):
+                current_attempt.set(attempt)
+                await run_concurrent(ids, browser=self.browser)
+                rounds = attempt
+                ids = hotels_needing_retry(SCREENSHOTS_DIR, hotel_ids)
+                if not ids:
+                    break
+        finally:
+            results.end_run()
+        result = {"rounds": rounds, "incomplete": ids}
+        if build:
+            built = await self._build(hotel_ids=hotel_ids)
+            result["build"] = _summary(built)
+        return result
+
+    async def _rebuild(
+        self, hotel_ids: Optional[List[str]], chain: Optional[str], force: bool
+    ) -> dict:
+        if chain:
+            hotel_ids = await asyncio.to_thread(hotels_in_chain, chain)
+            if not hotel_ids:
+                raise LookupError(f"в сети {chain!r} нет собранных отелей")
+        built = await self._build(force=force, hotel_ids=hotel_ids)
+        return {"hotels": len(built), **_summary(built)}
+
+    async def _build(self, **kwargs) -> list:
+        """create_formatted_doc на пуле демона; сломанный пул пересоздаётся."""
+        for attempt in (1, 2):
+            try:
+                return await asyncio.to_thread(
+                    create_formatted_doc,
+                    target_image_width_px=WIDTH_TABLES,
+                    pool=self.build_pool,
+                    **kwargs,
+                )
+            except BrokenProcessPool:
+                if attempt == 2:
+                    raise
+                logging.warning("⚠ Пул сборки сломан — пересоздаём")
+                self.build_pool.shutdown(wait=False, cancel_futures=True)
+                self.build_pool = spawn_build_pool()
+
+    def health(self) -> dict:
+        return {
+            "browser": bool(self.browser and self.browser.is_connected()),
+            "session_age_s": (
+                round(time.time() - self.logged_in_at) if self.logged_in_at else None
+            ),
+            "queued": sum(1 for j in self.jobs.values() if j.status == "queued"),
+            "running": self.current.id if self.current else None,
+        }
+
+
+daemon = ScraperDaemon()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await daemon.start()
+    try:
+        yield
+    finally:
+        await daemon.stop()
+
+
+app = FastAPI(title="TopHotels daemon", lifespan=lifespan)
+
+
+class CaptureRequest(BaseModel):
+    hotel_ids: List[str] = Field(min_length=1)
+    priority: int = 5
+    attempts: int = Field(default=MAX_ATTEMPTS_RUN, ge=1)
+    build: bool = True
+
+
+class RebuildRequest(BaseModel):
+    hotel_ids: Optional[List[str]] = None
+    chain: Optional[str] = None
+    force: bool = False
+    priority: int = 5
+
+
+@app.post("/jobs/capture")
+async def post_capture(req: CaptureRequest) -> dict:
+    ids = list(dict.fromkeys(h.strip() for h in req.hotel_ids if h.strip()))
+    if not ids:
+        # пустой список run_concurrent понял бы как «все из HOTELS_IDS_FILE»
+        raise HTTPException(422, "пустой hotel_ids")
+    params = {"hotel_ids": ids, "attempts": req.attempts, "build": req.build}
+    return daemon.submit("capture", params, req.priority).as_dict()
+
+
+@app.post("/jobs/rebuild")
+async def post_rebuild(req: RebuildRequest) -> dict:
+    if not req.hotel_ids and not req.chain:
+        raise HTTPException(422, "нужен hotel_ids или chain")
+    if req.hotel_ids is not None and req.chain is not None:
+        raise HTTPException(422, "hotel_ids и chain вместе не принимаются")
+    params = {"hotel_ids": req.hotel_ids, "chain": req.chain, "force": req.force}
+    return daemon.submit("rebuild", params, req.priority).as_dict()
+
+
+@app.get("/jobs")
+async def get_jobs() -> List[dict]:
+    return [j.as_dict() for j in reversed(daemon.jobs.values())]
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict:
+    job = daemon.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "нет такого задания")
+    return job.as_dict()
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str) -> dict:
+    try:
+        job = daemon.cancel(job_id)
+    except KeyError:
+        raise HTTPException(404, "нет такого задания")
+    if job.status != "cancelled":
+        raise HTTPException(409, f"задание уже {job.status}")
+    return job.as_dict()
+
+
+@app.get("/health")
+async def get_health() -> dict:
+    return daemon.health()
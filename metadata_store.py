@@ -0,0 +1,127 @@
+"""
+Метаданные отеля (star, city, chain, rating_url, rating_status, ...) — бывший
+links.json, теперь таблица metadata в results_store.
+
+Пока отель обрабатывается (metadata.buffered(hotel_id)), поля копятся в памяти
+и пишутся в базу один раз — одной транзакцией при выходе из блока.
+Вне такого блока каждое сохранение пишется сразу, как раньше.
+Чтение (load_links) идёт через то же хранилище: буфер, а если его нет — база.
+Ключ — hotel_id: заголовок отеля только запоминается (для таблицы hotels).
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from results_store import results
+
+
+def merge_value(data: dict, key: str, value) -> None:
+    """
+    Если ключ уже есть:
+      - если значение одно, оно превращается в список
+      - если список, добавляется новый элемент
+      - дубликаты не добавляются
+    """
+    if key not in data:
+        data[key] = value
+    elif isinstance(data[key], list):
+        # добавляем только если ещё нет такого значения
+        if value not in data[key]:
+            data[key].append(value)
+    elif data[key] != value:
+        # если одно значение и оно не совпадает — превращаем в список
+        data[key] = [data[key], value]
+
+
+class MetadataStore:
+    """hotel_id -> поля метаданных. Потокобезопасно."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, dict] = {}
+        self._titles: Dict[str, str] = {}
+        self._dirty: set[str] = set()
+        self._buffered: set[str] = set()
+        self._lock = threading.Lock()
+
+    def save(self, hotel_id: str, hotel_title: str, key: str, value) -> None:
+        """Слить поле в метаданные отеля (буфер или сразу база)."""
+        hotel_id = str(hotel_id)
+        with self._lock:
+            if hotel_id not in self._data:
+                # первое касание вне begin — поднимаем то, что уже лежит в базе
+                self._data[hotel_id] = results.load_metadata(hotel_id)
+            merge_value(self._data[hotel_id], key, value)
+            if hotel_title is not None:
+                self._titles[hotel_id] = str(hotel_title)
+            self._dirty.add(hotel_id)
+            buffered = hotel_id in self._buffered
+        if not buffered:
+            self.flush(hotel_id)
+
+    def load(self, hotel_id: str, hotel_title: str | None = None) -> dict:
+        """Метаданные отеля: из буфера, а если его нет — из базы."""
+        hotel_id = str(hotel_id)
+        with self._lock:
+            if hotel_id in self._data:
+                return copy.deepcopy(self._data[hotel_id])
+        return results.load_metadata(hotel_id)
+
+    def flush(self, hotel_id: str) -> None:
+        """Записать изменённые метаданные отеля."""
+        hotel_id = str(hotel_id)
+        with self._lock:
+            if hotel_id not in self._dirty:
+                return
+            self._dirty.discard(hotel_id)
+            data = copy.deepcopy(self._data[hotel_id])
+            title = self._titles.get(hotel_id)
+        try:
+            results.save_metadata(hotel_id, title, data)
+        except sqlite3.Error as e:
+            logging.error("Не удалось записать метаданные %s: %s", hotel_id, e)
+
+    def begin(self, hotel_id: str) -> None:
+        """
+        Начать копить поля отеля в памяти (до end). Уже сохранённые поля
+        поднимаются из базы здесь, чтобы save из шагов не ходил в базу.
+        """
+        hotel_id = str(hotel_id)
+        with self._lock:
+            loaded = hotel_id in self._data
+        stored = None if loaded else results.load_metadata(hotel_id)
+        with self._lock:
+            if stored is not None:
+                self._data.setdefault(hotel_id, stored)
+            self._buffered.add(hotel_id)
+
+    def end(self, hotel_id: str) -> None:
+        """Закончить буферизацию и записать метаданные (один раз)."""
+        with self._lock:
+            self._buffered.discard(str(hotel_id))
+        self.flush(hotel_id)
+
+    def forget(self, hotel_id: str) -> None:
+        """Сбросить буфер отеля (отель собирается заново)."""
+        hotel_id = str(hotel_id)
+        with self._lock:
+            for d in (self._data, self._titles):
+                d.pop(hotel_id, None)
+            self._dirty.discard(hotel_id)
+
+    @contextmanager
+    def buffered(self, hotel_id: str) -> Iterator[None]:
+        """Копить поля отеля в памяти; одна запись в базу на выходе."""
+        self.begin(hotel_id)
+        try:
+            yield
+        finally:
+            self.end(hotel_id)
+
+
+metadata = MetadataStore()
@@ -0,0 +1,308 @@
+"""
+Живые метрики прогона для долгих (ночных) запусков.
+
+Скрапер обновляет реестр в процессе: законченные спаны perf_trace дают
+гистограммы времени шагов, ошибки шагов, повторы переходов goto_strict и
+число обработанных отелей; run_concurrent/worker — очередь и занятых воркеров.
+
+serve() поднимает в фоновом потоке HTTP-сервер на 127.0.0.1:METRICS_PORT:
+    /metrics       — текстовый формат Prometheus;
+    /metrics.json  — то же в JSON (его показывает страница /live в ui_settings).
+
+Память браузера (RSS дочерних процессов: драйвер Playwright и Chromium)
+считается при наличии psutil; без него метрика не выводится.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from config_app import METRICS_PORT
+from perf_trace import current_attempt, tracer
+
+try:
+    import psutil
+except ImportError:  # необязательная зависимость
+    psutil = None
+
+# границы корзин гистограмм, секунды
+BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+# окно для скорости «отелей в минуту»
+RATE_WINDOW_S = 600
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, acc = [], 0
+        for bound, n in zip(BUCKETS, self.counts):
+            acc += n
+            out.append((f"{bound:g}", acc))
+        out.append(("+Inf", self.total))
+        return out
+
+
+def _browser_rss() -> Optional[int]:
+    """RSS всех дочерних процессов (Playwright + Chromium), байты."""
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Реестр метрик прогона. Потокобезопасно."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.hotels: Dict[str, int] = defaultdict(int)  # ok / failed
+        self.step_seconds: Dict[str, _Histogram] = defaultdict(_Histogram)
+        self.step_failures: Dict[str, int] = defaultdict(int)
+        self.goto_retries = 0
+        self.reports: Dict[str, int] = defaultdict(int)
+        self.page_heap: Dict[str, int] = {}  # воркер -> JS-куча страницы, байты
+        self.recycles: Dict[str, int] = defaultdict(int)  # причина -> число
+        self.workers = 0
+        self.busy_workers = 0
+        self.attempt: Optional[int] = None
+        self._finished: Deque[float] = deque()
+        self._queue_size: Callable[[], int] = lambda: 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # --- обновление ---------------------------------------------------------
+
+    def on_span(self, span: dict) -> None:
+        """Слушатель perf_trace.tracer."""
+        cat, name, ok = span["cat"], span["name"], span["ok"]
+        with self._lock:
+            if cat == "hotel":
+                self.hotels["ok" if ok else "failed"] += 1
+                self.step_seconds[name].observe(span["dur"])
+                self._finished.append(time.time())
+            elif cat == "step":
+                self.step_seconds[name].observe(span["dur"])
+                if not ok:
+                    self.step_failures[name] += 1
+            elif cat == "goto" and name == "goto" and span.get("retry"):
+                self.goto_retries += 1
+            elif cat == "report":
+                self.reports["ok" if ok else "failed"] += 1
+
+    def bind_queue(self, queue, workers: int) -> None:
+        """Очередь и число воркеров текущего круга (run_concurrent)."""
+        with self._lock:
+            self._queue_size = queue.qsize
+            self.workers = workers
+            # contextvar круга видна только в loop — HTTP-поток читает копию
+            self.attempt = current_attempt.get()
+
+    def unbind_queue(self) -> None:
+        with self._lock:
+            self._queue_size = lambda: 0
+            self.workers = 0
+
+    def worker_busy(self, delta: int) -> None:
+        with self._lock:
+            self.busy_workers += delta
+
+    def set_page_heap(self, worker: str, heap_bytes: int) -> None:
+        with self._lock:
+            self.page_heap[worker] = heap_bytes
+
+    def record_recycle(self, reason: str) -> None:
+        with self._lock:
+            self.recycles[reason] += 1
+
+    # --- чтение -------------------------------------------------------------
+
+    def _rate_per_min(self, now: float) -> float:
+        while self._finished and self._finished[0] < now - RATE_WINDOW_S:
+            self._finished.popleft()
+        # в первую минуту не завышаем скорость по двум-трём отелям
+        window = max(60.0, min(RATE_WINDOW_S, now - self.started))
+        return len(self._finished) * 60 / window
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self._lock:
+            rate = self._rate_per_min(now)
+            remaining = self._queue_size() + self.busy_workers
+            snap = {
+                "uptime_s": round(now - self.started, 1),
+                "attempt": self.attempt,
+                "hotels": dict(self.hotels),
+                "hotels_per_min": round(rate, 2),
+                "queue_length": self._queue_size(),
+                "workers": self.workers,
+                "busy_workers": self.busy_workers,
+                "remaining": remaining,
+                "eta_s": round(remaining * 60 / rate) if rate and remaining else None,
+                "goto_retries": self.goto_retries,
+                "step_failures": dict(self.step_failures),
+                "reports": dict(self.reports),
+                "page_heap_bytes": dict(self.page_heap),
+                "recycles": dict(self.recycles),
+                "steps": {
+                    name: {
+                        "count": h.total,
+                        "avg_s": round(h.sum / h.total, 2) if h.total else 0,
+                        "buckets": h.cumulative(),
+                        "sum": h.sum,
+                    }
+                    for name, h in self.step_seconds.items()
+                },
+            }
+        snap["browser_rss_bytes"] = _browser_rss()
+        return snap
+
+    def prometheus(self) -> str:
+        s = self.snapshot()
+        out: List[str] = []
+
+        def metric(name: str, kind: str, help_: str, samples) -> None:
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lbl = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                out.append(f"{name}{{{lbl}}} {value}" if lbl else f"{name} {value}")
+
+        def gauge(name: str, help_: str, value) -> None:
+            if value is not None:
+                metric(name, "gauge", help_, [({}, value)])
+
+        metric(
+            "scraper_hotels_total",
+            "counter",
+            "Обработано отелей",
+            [({"status": k}, v) for k, v in sorted(s["hotels"].items())],
+        )
+        gauge(
+            "scraper_hotels_per_minute",
+            f"Скорость за последние {RATE_WINDOW_S} s",
+            s["hotels_per_min"],
+        )
+        gauge("scraper_queue_length", "Отелей в очереди", s["queue_length"])
+        gauge("scraper_workers", "Воркеров в круге", s["workers"])
+        gauge("scraper_busy_workers", "Воркеров заняты отелем", s["busy_workers"])
+        gauge("scraper_eta_seconds", "Оценка до конца круга", s["eta_s"])
+        gauge("scraper_attempt", "Текущий круг", s["attempt"])
+        metric(
+            "scraper_goto_retries_total",
+            "counter",
+            "Повторные переходы goto_strict",
+            [({}, s["goto_retries"])],
+        )
+        metric(
+            "scraper_step_failures_total",
+            "counter",
+            "Шаги, упавшие с ошибкой",
+            [({"step": k}, v) for k, v in sorted(s["step_failures"].items())],
+        )
+        metric(
+            "scraper_reports_total",
+            "counter",
+            "Собрано отчётов",
+            [({"status": k}, v) for k, v in sorted(s["reports"].items())],
+        )
+        out.append("# HELP scraper_step_seconds Время шагов и отелей")
+        out.append("# TYPE scraper_step_seconds histogram")
+        for step, h in sorted(s["steps"].items()):
+            step = _escape(step)
+            for le, n in h["buckets"]:
+                out.append(
+                    f'scraper_step_seconds_bucket{{step="{step}",le="{le}"}} {n}'
+                )
+            out.append(f'scraper_step_seconds_sum{{step="{step}"}} {h["sum"]:.3f}')
+            out.append(f'scraper_step_seconds_count{{step="{step}"}} {h["count"]}')
+        metric(
+            "scraper_page_heap_bytes",
+            "gauge",
+            "JS-куча страницы воркера (CDP)",
+            [({"worker": k}, v) for k, v in sorted(s["page_heap_bytes"].items())],
+        )
+        metric(
+            "scraper_context_recycles_total",
+            "counter",
+            "Пересозданные контексты браузера",
+            [({"reason": k}, v) for k, v in sorted(s["recycles"].items())],
+        )
+        gauge(
+            "scraper_browser_rss_bytes",
+            "Память дочерних процессов (Playwright, Chromium)",
+            s["browser_rss_bytes"],
+        )
+        return "\n".join(out) + "\n"
+
+    # --- HTTP ---------------------------------------------------------------
+
+    def serve(self, port: int = METRICS_PORT) -> None:
+        """Запустить HTTP-сервер метрик (один раз на процесс; port=0 — выключено)."""
+        if not port or self._server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/metrics":
+                    body = registry.prometheus().encode("utf-8")
+                    ctype = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode(
+                        "utf-8"
+                    )
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:  # не засорять консоль
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            logging.warning("Метрики: порт %s недоступен (%s), сервер не запущен",
+                            port, e)
+            return
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics", daemon=True
+        ).start()
+        logging.info("📊 Метрики: http://127.0.0.1:%s/metrics", port)
+
+
+metrics = Metrics()
+tracer.add_listener(metrics.on_span)
@@ -1,62 +1,326 @@
 from __future__ import annotations
 
-import os
+import multiprocessing
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
 
-from dotenv import load_dotenv
-
-from word_modules.create_html_version import _build_inline_html
+from artifact_store import artifacts, in_memory
+from perf_trace import tracer
+from word_modules.build_hotel_report import (
+    HotelJob,
+    BuildResult,
+    build_hotel_report,
+)
+from word_modules.build_cache import BuildCache
 from word_modules.create_meta_data import create_meta_data
-from word_modules.create_word_file import create_word_file
-from word_modules.resize_all_images import _resize_all_images
+from word_modules.docs_helpers import report_safe_name
+from results_store import results
+
+from config_app import BUILD_WORKERS, init_worker_logging, worker_log_queue
+
+
+def _list_hotels() -> List[Tuple[str, str]]:
+    """(hotel_id, title) всех отелей с шотами, в стабильном порядке."""
+    if in_memory():
+        ids = dict.fromkeys(hid for hid, _ in artifacts.hotels())
+        return [(hid, hotel_title(hid)) for hid in ids]
+    return results.hotels()
 
-try:
-    import win32com.client as win32  # type: ignore
 
-    _HAS_WORD = True
-except Exception:
-    _HAS_WORD = False
+def hotel_title(hotel_id: str) -> str:
+    """
+    Заголовок отеля для отчёта: из results_store, где "None" (title не
+    прочитался в каком-то раунде) не затирает настоящий. В режиме memory —
+    настоящий заголовок из хранилища артефактов, если он есть.
+    """
+    if not in_memory():
+        return str(results.title(hotel_id))
+    titles = [t for hid, t in artifacts.hotels() if hid == hotel_id]
+    real = [t for t in titles if t != "None"]
+    return (real or titles or ["None"])[-1]
+
 
-from config_app import SCREENSHOTS_DIR
+def _memory_shots(hotel_id: str) -> List[Tuple[str, bytes]]:
+    """Шоты отеля в памяти по всем заголовкам, под которыми они сохранялись."""
+    shots = {}
+    for hid, title in artifacts.hotels():
+        if hid == hotel_id:
+            shots.update(artifacts.shots(hid, title))
+    return sorted(shots.items())
 
-load_dotenv()
 
+def hotels_in_chain(chain: str) -> List[str]:
+    """ID собранных отелей сети chain (поле chain метаданных, без учёта регистра)."""
+    collected = {hid for hid, _ in _list_hotels()}
+    return [hid for hid in results.hotels_where("chain", chain) if hid in collected]
 
-def create_formatted_doc(target_image_width_px: int | None = None) -> None:
+
+def _plan_job(
+    hotel_id: str,
+    title_hotel: str,
+    width: int | None,
+    cache: BuildCache | None = None,
+) -> HotelJob:
     """
-    Генерирует DOCX и HTML-версии отчёта.
-    Дополнительно: если задан target_image_width_px, сначала приводит каждую картинку
-    в папке отеля к фиксированной ширине (px) с сохранением пропорций (in-place).
+    Метаданные и пути отчётов одного отеля. Выполняется в главном процессе:
+    здесь же (последовательно) создаются папки отчётов, воркеры их не трогают.
+    """
+    url_hotel, mapping_paragraph, reports_dir = create_meta_data(hotel_id, title_hotel)
+    safe_name = report_safe_name(title_hotel)
+    return HotelJob(
+        hotel_id=hotel_id,
+        title_hotel=title_hotel,
+        folder_path=results.hotel_folder(hotel_id),
+        url_hotel=url_hotel,
+        mapping_paragraph=mapping_paragraph,
+        reports_dir=reports_dir,
+        docx_path=reports_dir / f"{safe_name}.docx",
+        html_path=reports_dir / f"{safe_name}_inline.html",
+        width_px=width,
+        shots=_memory_shots(hotel_id) if in_memory() else None,
+        files=None if in_memory() else results.artifacts(hotel_id),
+        cached_key=cache.previous_key(hotel_id) if cache else None,
+    )
+
+
+def _plan_jobs(
+    hotels: List[Tuple[str, str]],
+    width: int | None,
+    cache: BuildCache | None = None,
+) -> Tuple[List[HotelJob], List[BuildResult]]:
+    """
+    Детерминированные пути: если два отеля попадают в один файл отчёта
+    (одинаковое название в одном городе/сети), каждому добавляется суффикс _<hotel_id>.
+    Возвращает (задания, результаты по отелям, упавшим ещё на подготовке).
     """
-    screenshots_dir = Path(SCREENSHOTS_DIR)
+    jobs, failed = [], []
+    for hid, title in hotels:
+        try:
+            jobs.append(_plan_job(hid, title, width, cache))
+        except Exception as e:
+            failed.append(BuildResult(hid, title, ok=False, error=repr(e)))
 
-    for folder_name in os.listdir(screenshots_dir):
-        if "_" not in folder_name:
-            continue  # пропускаем «посторонние» папки
-        hotel_id, title_hotel = folder_name.split("_", 1)
-        folder_path = screenshots_dir / folder_name
-        if not folder_path.is_dir():
+    by_path = defaultdict(list)
+    for job in jobs:
+        by_path[job.docx_path].append(job)
+    for same in by_path.values():
+        if len(same) < 2:
             continue
+        for job in same:
+            safe_name = f"{report_safe_name(job.title_hotel)}_{job.hotel_id}"
+            job.docx_path = job.reports_dir / f"{safe_name}.docx"
+            job.html_path = job.reports_dir / f"{safe_name}_inline.html"
+    return jobs, failed
+
+
+def _width(target_image_width_px: int | None) -> int | None:
+    return (
+        target_image_width_px
+        if isinstance(target_image_width_px, int) and target_image_width_px > 0
+        else None
+    )
+
+
+def _collect_spans(results: List[BuildResult]) -> None:
+    """Спаны сборки из процессов-воркеров — в общий трейсер прогона."""
+    for r in results:
+        tracer.extend(r.spans)
+
+
+def _collect_future_spans(fut: Future) -> None:
+    """Спаны готовой сборки — в трейсер сразу (их видят живые метрики)."""
+    if not fut.cancelled() and fut.exception() is None:
+        tracer.extend(fut.result().spans)
+
+
+def _print_summary(results: List[BuildResult]) -> None:
+    failed = [r for r in results if not r.ok]
+    skipped = sum(r.skipped for r in results)
+    total = sum(r.elapsed for r in results)
+    print(
+        f"\n📄 Отчёты: собрано {len(results) - len(failed)} из {len(results)}, "
+        f"из них без изменений (кэш) {skipped}, "
+        f"ошибок {len(failed)} (суммарно по отелям {total:.1f}s)"
+    )
+    for r in failed:
+        print(f"  ✖ {r.hotel_id} ({r.title_hotel}): {r.error.splitlines()[0]}")
+
+
+def _build_pool(workers: int, mp_context=None) -> ProcessPoolExecutor:
+    """Пул сборки; воркеры логируют через главный процесс, не в свой script.log."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=init_worker_logging,
+        initargs=(worker_log_queue(),),
+    )
+
+
+def spawn_build_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Долгоживущий пул сборки для многопоточного процесса (демон): воркеры
+    стартуют через spawn — fork из процесса с потоками копирует их захваченные
+    локи. Передаётся в create_formatted_doc(pool=...).
+    """
+    return _build_pool(
+        max(1, workers or BUILD_WORKERS), multiprocessing.get_context("spawn")
+    )
+
+
+def run_build_jobs(
+    jobs: List[HotelJob],
+    workers: int | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> List[BuildResult]:
+    """
+    Сборка по пулу процессов; результаты — в порядке jobs.
+    pool — готовый пул (не закрывается); без него пул создаётся на вызов.
+    """
+    if pool is None:
+        workers = max(1, min(workers or BUILD_WORKERS, len(jobs) or 1))
+        if workers == 1:
+            return [build_hotel_report(job) for job in jobs]
+        with _build_pool(workers) as own_pool:
+            return run_build_jobs(jobs, pool=own_pool)
+
+    results: dict[int, BuildResult] = {}
+    futures = {pool.submit(build_hotel_report, job): i for i, job in enumerate(jobs)}
+    for fut in as_completed(futures):
+        i = futures[fut]
+        try:
+            results[i] = fut.result()
+        except Exception as e:  # упал сам процесс-воркер (BrokenProcessPool и т.п.)
+            job = jobs[i]
+            results[i] = BuildResult(
+                job.hotel_id, job.title_hotel, ok=False, error=repr(e)
+            )
+    return [results[i] for i in range(len(jobs))]
+
+
+def create_formatted_doc(
+    target_image_width_px: int | None = None,
+    workers: int | None = None,
+    force: bool = False,
+    hotel_ids: Iterable[str] | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> List[BuildResult]:
+    """
+    Генерирует DOCX и HTML-версии отчёта.
+    Перед сборкой каждая картинка в папке отеля перекодируется по политике формата
+    (SHOT_FORMATS); если задан target_image_width_px, она же приводится к фиксированной
+    ширине (px) с сохранением пропорций (in-place, за одно сохранение).
+
+    В режиме ARTIFACT_MODE=memory отели и шоты берутся из хранилища артефактов,
+    а вся пост-обработка и сборка идут по буферам в памяти, без чтения/записи шотов.
+
+    Отели собираются параллельно на пуле из workers процессов (по умолчанию
+    BUILD_WORKERS); в конце печатается сводка с ошибками.
+
+    Отели, у которых не изменились шоты, метаданные и настройки сборки
+    (BUILD_CACHE), не пересобираются; force=True — пересобрать всё.
+    hotel_ids — собрать только эти отели (по умолчанию все собранные).
+    pool — готовый пул сборки (демон); тогда workers не используется.
+    """
+    width = _width(target_image_width_px)
+    cache = BuildCache()
+    hotels = _list_hotels()
+    if hotel_ids is not None:
+        wanted = set(hotel_ids)
+        hotels = [(hid, title) for hid, title in hotels if hid in wanted]
+
+    jobs, results = _plan_jobs(hotels, width, None if force else cache)
+    results += run_build_jobs(jobs, workers, pool)
+    _collect_spans(results)
+    cache.record(results)
+    cache.save()
+    _print_summary(results)
+    return results
+
+
+class StreamingReportBuilder:
+    """
+    Сборка отчётов параллельно со скрапингом: отель отдаётся в пул процессов
+    (submit) сразу, как только у него собраны все шоты, а finish() дособирает
+    оставшиеся отели и ждёт завершения. Пул живёт всё время скрапинга.
+
+    Пути отчётов фиксируются при submit; при совпадении имён суффикс _<hotel_id>
+    получает отель, пришедший позже (первый сохраняет обычное имя).
+    Кэш сборки (BUILD_CACHE) учитывается так же, как в create_formatted_doc.
+    """
+
+    def __init__(
+        self, target_image_width_px: int | None = None, workers: int | None = None
+    ) -> None:
+        self._width = _width(target_image_width_px)
+        self._cache = BuildCache()
+        self._pool = _build_pool(max(1, workers or BUILD_WORKERS))
+        self._futures: Dict[Future, HotelJob] = {}
+        self._submitted: set[str] = set()  # hotel_id
+        self._claimed: Dict[Path, str] = {}  # путь docx -> hotel_id
+        self._results: List[BuildResult] = []
+        self._lock = threading.Lock()  # submit зовут из потоков run_blocking
+
+    def submit(self, hotel_id: str, title_hotel: str | None = None) -> bool:
+        """
+        Поставить отель в сборку. False — уже стоит или не удалось подготовить.
+        Один отель — одна сборка: заголовок берётся из hotel_title, а не от
+        вызывающего (в последнем раунде title мог не прочитаться). Блокирует
+        (метаданные, папки отчётов, SQLite) — из event loop через run_blocking.
+        """
+        with self._lock:
+            if hotel_id in self._submitted:
+                return False
+            self._submitted.add(hotel_id)
+            title = hotel_title(hotel_id)
+            try:
+                job = _plan_job(hotel_id, title, self._width, self._cache)
+            except Exception as e:
+                self._results.append(
+                    BuildResult(hotel_id, title, ok=False, error=repr(e))
+                )
+                return False
+
+            if self._claimed.get(job.docx_path, hotel_id) != hotel_id:
+                safe_name = f"{report_safe_name(job.title_hotel)}_{hotel_id}"
+                job.docx_path = job.reports_dir / f"{safe_name}.docx"
+                job.html_path = job.reports_dir / f"{safe_name}_inline.html"
+            self._claimed[job.docx_path] = hotel_id
 
-        # 1) Привести картинки к фиксированной ширине, если задано
-        if isinstance(target_image_width_px, int) and target_image_width_px > 0:
-            _resize_all_images(folder_path, target_image_width_px)
+            fut = self._pool.submit(build_hotel_report, job)
+            fut.add_done_callback(_collect_future_spans)
+            self._futures[fut] = job
+            return True
 
-        url_hotel, mapping_paragraph, reports_dir = create_meta_data(
-            hotel_id, title_hotel
-        )
-        create_word_file(
-            title_hotel, folder_path, url_hotel, mapping_paragraph, reports_dir
-        )
-        safe_name = title_hotel.replace(" ", "_").replace("*", "")
+    def finish(self) -> List[BuildResult]:
+        """Дособрать отели, не попавшие в submit (неполные), и дождаться всех."""
+        for hotel_id, _ in _list_hotels():
+            self.submit(hotel_id)
+        try:
+            for fut in as_completed(list(self._futures)):
+                job = self._futures[fut]
+                try:
+                    self._results.append(fut.result())
+                except Exception as e:
+                    self._results.append(
+                        BuildResult(
+                            job.hotel_id, job.title_hotel, ok=False, error=repr(e)
+                        )
+                    )
+        finally:
+            self._pool.shutdown(wait=True)
+        self._cache.record(self._results)
+        self._cache.save()
+        _print_summary(self._results)
+        return self._results
 
-        html = _build_inline_html(
-            title_hotel, url_hotel, mapping_paragraph, folder_path
-        )
-        html_path = reports_dir / f"{safe_name}_inline.html"
-        html_path.write_text(html, encoding="utf-8")
-        print(f"✔ Inline HTML (fallback) created: {html_path}")
+    def cancel(self) -> None:
+        """Прервать: не начатые сборки отменяются, идущие дорабатывают."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
 
 
 if __name__ == "__main__":
     create_formatted_doc(target_image_width_px=1200)
+    tracer.write_report()
@@ -1,24 +1,51 @@
 import asyncio
+from typing import Optional
 
 from parce_screenshots_moduls.concurrent_runner import (
+    HotelReadyCallback,
     hotels_needing_retry,
     run_concurrent,
 )
+from artifact_store import artifacts, in_memory
 from config_app import (
+    ARTIFACT_SPILL,
     HOTELS_IDS_FILE,
     SCREENSHOTS_DIR,
     MAX_ATTEMPTS_RUN,
     MAX_FIRST_RUN,
     ENABLED_SHOTS,
 )
+from perf_trace import current_attempt
+from results_store import results
 from utils import load_hotel_ids
 
 
-async def run_create_report():
+async def run_create_report(on_hotel_ready: Optional[HotelReadyCallback] = None):
+    """
+    Круги сбора шотов до MAX_ATTEMPTS_RUN.
+    on_hotel_ready — см. run_concurrent: отель, у которого собраны все шоты,
+    сразу уходит в сборку отчёта, не дожидаясь конца всех кругов.
+    """
     hotel_ids_all = load_hotel_ids(HOTELS_IDS_FILE)
+    results.begin_run("report")
+    try:
+        await _run_rounds(hotel_ids_all, on_hotel_ready)
+    finally:
+        results.end_run()
+
+
+async def _run_rounds(
+    hotel_ids_all: list[str], on_hotel_ready: Optional[HotelReadyCallback]
+) -> None:
+    if in_memory() and ARTIFACT_SPILL:
+        # докачка: подтягиваем в память то, что уже было сброшено на диск
+        loaded = artifacts.load_spilled()
+        if loaded:
+            print(f"↺ Загружено из {SCREENSHOTS_DIR}: {loaded} шотов")
 
     for attempt in range(1, MAX_ATTEMPTS_RUN + 1):
         print(f"\n🌀 Attempt {attempt} of {MAX_ATTEMPTS_RUN}")
+        current_attempt.set(attempt)
 
         # На повторных попытках докидываем ТОЛЬКО те ID, где не хватает картинок
         ids_for_run = (
@@ -30,7 +57,7 @@ async def run_create_report():
             print("✅ Всё уже собрано.")
             break
 
-        await run_concurrent(ids_for_run)
+        await run_concurrent(ids_for_run, on_hotel_ready)
 
         if attempt >= MAX_FIRST_RUN:
             # После нужного количества кругов — проверяем ещё раз
@@ -0,0 +1,50 @@
+"""
+Ограниченный пул потоков для блокирующей работы из корутин воркеров:
+запись шотов и метаданных, mkdir, PIL (кроп/кодирование).
+
+Event loop один на все CONCURRENCY воркеров — любой синхронный вызов в корутине
+останавливает их всех. Через run_blocking такие вызовы уходят в IO_WORKERS
+потоков; пул общий на процесс и создаётся при первом использовании.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from config_app import IO_WORKERS
+
+T = TypeVar("T")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, IO_WORKERS), thread_name_prefix="blocking-io"
+            )
+        return _pool
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Выполнить fn(*args, **kwargs) в пуле и дождаться результата, не блокируя loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+def shutdown_blocking_io() -> None:
+    """Дождаться отложенных записей и закрыть пул (следующий вызов создаст новый)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
@@ -1,24 +1,39 @@
 # concurrent_runner.py
 import asyncio
 import logging
-import os
 from pathlib import Path
-from typing import Optional, Iterable
+from typing import Callable, Optional, Iterable
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from tqdm import tqdm
 
 from config_app import (
+    SCREENSHOTS_DIR,
     HOTELS_IDS_FILE,
     HEADLESS,
+    BROWSER_ARGS,
     RESOLUTION_W,
     RESOLUTION_H,
     ENABLED_SHOTS,
     CONCURRENCY,
     AUTH_STATE,
+    INSTRUMENT,
 )
+from artifact_store import artifacts, in_memory
+from metadata_store import metadata
+from results_store import results
+from metrics import metrics
+from perf_trace import current_hotel, current_worker, tracer
 from auth_service import AuthService
 
+from parce_screenshots_moduls import forensics
+from parce_screenshots_moduls.blocking_io import run_blocking
+from parce_screenshots_moduls.loop_instrumentation import LoopInstrumentation
+from parce_screenshots_moduls.loop_monitor import LoopLagMonitor
+from parce_screenshots_moduls.memory_watchdog import (
+    MemoryWatchdog,
+    log_memory_summary,
+)
 from parce_screenshots_moduls.utils import (
     set_language_en,
     get_title_star_hotel,
@@ -59,8 +74,34 @@ async def make_context(browser: Browser) -> BrowserContext:
     )
 
 
-async def process_hotel(page: Page, hotel_id: str) -> None:
-    """Полный пайплайн по одному отелю на своей странице."""
+# Колбэк «отель готов к сборке отчёта»: (hotel_id, title); вызывается в потоке
+# run_blocking, поэтому может блокировать
+HotelReadyCallback = Callable[[str, str], None]
+
+
+async def process_hotel(page: Page, hotel_id: str) -> Optional[str]:
+    """
+    Полный пайплайн по одному отелю на своей странице. Возвращает title.
+    Метаданные и шаги копятся в памяти и пишутся в results_store один раз
+    в конце (в пуле потоков, не блокируя остальных воркеров).
+    """
+    await run_blocking(metadata.begin, hotel_id)
+    token = current_hotel.set(hotel_id)
+    try:
+        with tracer.span("process_hotel", cat="hotel"):
+            return await _process_hotel(page, hotel_id)
+    finally:
+        current_hotel.reset(token)
+        await run_blocking(_finish_hotel, hotel_id)
+
+
+def _finish_hotel(hotel_id: str) -> None:
+    """Метаданные и шаги отеля — в results_store, по одной транзакции."""
+    metadata.end(hotel_id)
+    results.flush_steps(hotel_id)
+
+
+async def _process_hotel(page: Page, hotel_id: str) -> Optional[str]:
     title, star = await safe_step(get_title_star_hotel, page, hotel_id)
     save_to_jsonfile(hotel_id, title, key="star", value=star)
     if title is None:
@@ -77,30 +118,81 @@ async def process_hotel(page: Page, hotel_id: str) -> None:
     await safe_step(last_activity, page, hotel_id, title)
 
     logging.info("✅ Готово: %s (%s)", hotel_id, title)
+    return title
+
+
+async def _close_quietly(page: Page, ctx: BrowserContext) -> None:
+    """Закрыть страницу и контекст, даже если они уже закрыты или браузер упал."""
+    for closable in (page, ctx):
+        try:
+            await closable.close()
+        except Exception as e:
+            logging.debug("Не закрылось %s: %s", closable, e)
 
 
 async def worker(
-    name: str, browser: Browser, queue: asyncio.Queue[str], pbar: tqdm
+    name: str,
+    browser: Browser,
+    queue: asyncio.Queue[str],
+    pbar: tqdm,
+    on_hotel_ready: Optional[HotelReadyCallback] = None,
+    watchdog: Optional[MemoryWatchdog] = None,
 ) -> None:
-    """Воркер: свой контекст и одна страница, берёт ID из очереди."""
+    """
+    Воркер: свой контекст и одна страница, берёт ID из очереди.
+    Если у отеля собраны все шоты — сразу отдаёт его в on_hotel_ready.
+    Сторож памяти решает после отеля, пересоздать ли контекст; пересоздаётся
+    он перед следующим отелем (после последнего — незачем).
+    """
+    current_worker.set(name)
+    watchdog = watchdog or MemoryWatchdog(name)
     ctx = await make_context(browser)
     page = await ctx.new_page()
+    await watchdog.attach(page)
+    forensics.attach(page, name)
+    recycle: Optional[str] = None
     try:
         while True:
             hotel_id = await queue.get()
             try:
+                if recycle or page.is_closed():
+                    recycle = recycle or "closed"
+                    with tracer.span("recycle", cat="browser", reason=recycle):
+                        await _close_quietly(page, ctx)
+                        ctx = await make_context(browser)
+                        page = await ctx.new_page()
+                        await watchdog.attach(page)
+                        forensics.attach(page, name)
+                    watchdog.recycled(recycle)
+                    recycle = None
                 logging.info("[%s] ▶ %s", name, hotel_id)
-                await process_hotel(page, hotel_id)
+                metrics.worker_busy(+1)
+                try:
+                    title = await process_hotel(page, hotel_id)
+                finally:
+                    metrics.worker_busy(-1)
+                if on_hotel_ready and await run_blocking(
+                    hotel_is_complete, SCREENSHOTS_DIR, hotel_id
+                ):
+                    # колбэк блокирует (StreamingReportBuilder.submit) — не в loop
+                    await run_blocking(on_hotel_ready, hotel_id, title)
             except Exception:
                 logging.exception("[%s] Ошибка при обработке %s", name, hotel_id)
             finally:
                 pbar.update(1)
                 queue.task_done()
+            # пересоздание не удалось (make_context/new_page упали) — повторить перед
+            # следующим отелем, а не проверять и не открывать закрытую страницу
+            try:
+                recycle = recycle or await watchdog.check()
+            except Exception as e:
+                # CDP не ответил (таргет упал, сессия закрыта) — пересоздать контекст
+                logging.warning("[%s] 🧯 Сторож памяти: %s — пересоздаём", name, e)
+                recycle = "crash"
     except asyncio.CancelledError:
         pass
     finally:
-        await page.close()
-        await ctx.close()
+        await _close_quietly(page, ctx)
 
 
 def _dedupe(seq: Iterable[str]) -> list[str]:
@@ -113,66 +205,97 @@ def _dedupe(seq: Iterable[str]) -> list[str]:
     return out
 
 
-def _hotel_folder_matches(hotel_id: str, folder_name: str) -> bool:
-    # Папки у тебя вида "al233_Jaz Fayrouz" — сверяем префикс до подчёркивания
-    return folder_name.startswith(f"{hotel_id}_")
+def _hotel_shots(hotel_ids: list[str]) -> dict[str, set[str]]:
+    """hotel_id -> имена собранных шотов (без расширения)."""
+    if in_memory():
+        # шоты в памяти — в базу они попадают только при ARTIFACT_SPILL
+        return {hid: artifacts.shot_stems(hid) for hid in hotel_ids}
+    # формат шота задаётся политикой (SHOT_FORMATS) — сверяем по имени без расширения
+    return results.shot_stems(hotel_ids)
 
 
-REQUIRED_EXT = {".png", ".jpg", ".jpeg"}
+def hotel_is_complete(screens_dir: Path, hotel_id: str) -> bool:
+    """Все ли ENABLED_SHOTS собраны для отеля. screens_dir — для совместимости."""
+    shots = _hotel_shots([hotel_id])[hotel_id]
+    return all(name in shots for name in ENABLED_SHOTS)
 
 
 def hotels_needing_retry(screens_dir: Path, hotel_ids: list[str]) -> list[str]:
-    need = []
-    existing = [p.name for p in screens_dir.glob("*") if p.is_dir()]
+    """ID, у которых собраны не все ENABLED_SHOTS (запрос к results_store)."""
+    shots = _hotel_shots(hotel_ids)
+    return [
+        hid
+        for hid in hotel_ids
+        if any(name not in shots[hid] for name in ENABLED_SHOTS)
+    ]
+
+
+async def _run_workers(
+    browser: Browser,
+    hotel_ids: list[str],
+    on_hotel_ready: Optional[HotelReadyCallback],
+) -> None:
+    queue: asyncio.Queue[str] = asyncio.Queue()
     for hid in hotel_ids:
-        fold = next((f for f in existing if _hotel_folder_matches(hid, f)), None)
-        if not fold:
-            need.append(hid)
-            continue
-        files = {
-            p.name
-            for p in (screens_dir / fold).iterdir()
-            if p.suffix.lower() in REQUIRED_EXT
-        }
-        # проверяем именно нужные имена
-        missing = [name for name in ENABLED_SHOTS if name not in files]
-        if missing:
-            need.append(hid)
-    return need
-
-
-async def run_concurrent(hotel_ids: Optional[list[str]] = None) -> None:
+        queue.put_nowait(hid)
+
+    pbar = tqdm(total=len(hotel_ids), desc="Обработка отелей", unit="отель")
+
+    n_workers = max(1, CONCURRENCY)
+    metrics.bind_queue(queue, n_workers)
+    watchdogs = [MemoryWatchdog(f"W{i + 1}") for i in range(n_workers)]
+    tasks = [
+        asyncio.create_task(worker(wd.worker, browser, queue, pbar, on_hotel_ready, wd))
+        for wd in watchdogs
+    ]
+
+    await queue.join()
+    pbar.close()
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    log_memory_summary(watchdogs)
+
+
+async def run_concurrent(
+    hotel_ids: Optional[list[str]] = None,
+    on_hotel_ready: Optional[HotelReadyCallback] = None,
+    browser: Optional[Browser] = None,
+) -> None:
     """
     Параллельная обработка.
     Если hotel_ids не переданы — загружаем из файла.
+    on_hotel_ready(hotel_id, title) вызывается, как только у отеля собраны все шоты.
+    browser — уже запущенный браузер (демон): его не запускаем и не закрываем.
     """
     hotel_ids = _dedupe(hotel_ids or load_hotel_ids(HOTELS_IDS_FILE))
     if not hotel_ids:
         logging.error("Файл с ID пуст или некорректен.")
         return
+    instrumentation = LoopInstrumentation() if INSTRUMENT else None
+    monitor = LoopLagMonitor(
+        on_sample=instrumentation.record_lag if instrumentation else None
+    )
+    if instrumentation:
+        instrumentation.start()
+    monitor.start()
+    metrics.serve()
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=HEADLESS)
-
-            queue: asyncio.Queue[str] = asyncio.Queue()
-            for hid in hotel_ids:
-                queue.put_nowait(hid)
-
-            pbar = tqdm(total=len(hotel_ids), desc="Обработка отелей", unit="отель")
-
-            n_workers = max(1, CONCURRENCY)
-            tasks = [
-                asyncio.create_task(worker(f"W{i + 1}", browser, queue, pbar))
-                for i in range(n_workers)
-            ]
-
-            await queue.join()
-            pbar.close()
-
-            for t in tasks:
-                t.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
+        if browser is not None:
+            await _run_workers(browser, hotel_ids, on_hotel_ready)
+        else:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=HEADLESS, args=BROWSER_ARGS)
+                try:
+                    await _run_workers(browser, hotel_ids, on_hotel_ready)
+                finally:
+                    await browser.close()
     except Exception as e:
         logging.exception(f"Ошибка при инициализации браузера: {e}")
     finally:
-        await browser.close()
+        metrics.unbind_queue()
+        await monitor.stop()
+        monitor.log_summary()
+        if instrumentation:
+            instrumentation.stop()
@@ -0,0 +1,185 @@
+"""
+Снимки состояния страницы только при падении шага (FORENSICS=True).
+
+Пока всё хорошо, на каждую страницу воркера копится лишь кольцо последних
+FORENSICS_RING событий в памяти: запросы/ответы/ошибки сети, переходы, ошибки
+консоли и страницы, а также законченные спаны воркера (шаги, фазы goto_strict,
+скриншоты). Когда safe_step ловит исключение, capture_failure пишет в
+FORENSICS_DIR/<запуск>/<отель>_<шаг>_<n>/:
+    dom.html.gz     — DOM страницы (gzip);
+    viewport.jpg    — скриншот видимой области (JPEG);
+    ring.jsonl      — кольцо событий;
+    error.txt       — URL, шаг, отель и traceback.
+Суммарный объём за запуск ограничен FORENSICS_MAX_MB — дальше снимки не пишутся.
+Долгоживущий процесс (демон) начинает запуск на каждое задание: new_run().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import gzip
+import json
+import logging
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from playwright.async_api import Page
+
+from config_app import (
+    FORENSICS,
+    FORENSICS_DIR,
+    FORENSICS_MAX_MB,
+    FORENSICS_RING,
+)
+from perf_trace import current_hotel, current_worker, tracer
+from parce_screenshots_moduls.blocking_io import run_blocking
+
+# страница текущего воркера (ставит worker при создании/пересоздании страницы)
+current_page: contextvars.ContextVar[Optional[Page]] = contextvars.ContextVar(
+    "current_page", default=None
+)
+
+_CAPTURE_TIMEOUT_S = 10
+_rings: Dict[str, Deque[dict]] = {}  # воркер -> кольцо событий его страницы
+
+
+def _ring(worker: str) -> Deque[dict]:
+    ring = _rings.get(worker)
+    if ring is None:
+        ring = _rings[worker] = deque(maxlen=FORENSICS_RING)
+    return ring
+
+
+def _push(worker: str, kind: str, **fields) -> None:
+    _ring(worker).append({"ts": round(time.time(), 3), "type": kind, **fields})
+
+
+def _on_span(span: dict) -> None:
+    worker = span.get("worker")
+    if worker in _rings:
+        _push(
+            worker,
+            "span",
+            name=span["name"],
+            cat=span["cat"],
+            ms=round(span["dur"] * 1000),
+            ok=span["ok"],
+        )
+
+
+def attach(page: Page, worker: str) -> None:
+    """Подписать кольцо воркера на события страницы и сделать её текущей."""
+    if not FORENSICS:
+        return
+    ring = _ring(worker)
+    ring.clear()
+    tracer.add_listener(_on_span)
+
+    page.on(
+        "request",
+        lambda r: _push(worker, "request", method=r.method, url=r.url[:300]),
+    )
+    page.on(
+        "response",
+        lambda r: _push(worker, "response", status=r.status, url=r.url[:300]),
+    )
+    page.on(
+        "requestfailed",
+        lambda r: _push(worker, "requestfailed", url=r.url[:300], error=r.failure),
+    )
+    page.on(
+        "framenavigated",
+        lambda f: f.parent_frame is None and _push(worker, "navigated", url=f.url),
+    )
+    page.on(
+        "console",
+        lambda m: m.type == "error" and _push(worker, "console", text=m.text[:500]),
+    )
+    page.on("pageerror", lambda e: _push(worker, "pageerror", error=str(e)[:500]))
+    current_page.set(page)
+
+
+class _Budget:
+    """Байты снимков за запуск (процесс или new_run), не больше FORENSICS_MAX_MB."""
+
+    def __init__(self, max_mb: int, label: Optional[str] = None) -> None:
+        self.limit = max_mb * 2**20
+        self.used = 0
+        self.captures = 0
+        name = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_dir = Path(FORENSICS_DIR) / (f"{name}_{label}" if label else name)
+        self._warned = False
+
+    def exhausted(self) -> bool:
+        if self.used < self.limit:
+            return False
+        if not self._warned:
+            self._warned = True
+            logging.warning(
+                "🔍 Лимит снимков FORENSICS_MAX_MB=%d исчерпан, дальше не пишем",
+                FORENSICS_MAX_MB,
+            )
+        return True
+
+
+_budget = _Budget(FORENSICS_MAX_MB)
+
+
+def new_run(label: Optional[str] = None) -> None:
+    """Новый запуск: своя папка в FORENSICS_DIR и заново FORENSICS_MAX_MB."""
+    global _budget
+    _budget = _Budget(FORENSICS_MAX_MB, label)
+
+
+def _write(folder: Path, files: Dict[str, bytes]) -> int:
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, data in files.items():
+        (folder / name).write_bytes(data)
+    return sum(len(d) for d in files.values())
+
+
+async def capture_failure(step: str, exc: BaseException) -> Optional[Path]:
+    """Снять DOM, скриншот и кольцо событий текущей страницы воркера."""
+    page = current_page.get()
+    if not FORENSICS or page is None or page.is_closed() or _budget.exhausted():
+        return None
+    worker = current_worker.get() or "main"
+    hotel = current_hotel.get() or "unknown"
+    _budget.captures += 1
+    folder = _budget.run_dir / f"{hotel}_{step}_{_budget.captures}"
+
+    files: Dict[str, bytes] = {}
+    try:
+        dom = await asyncio.wait_for(page.content(), _CAPTURE_TIMEOUT_S)
+        files["dom.html.gz"] = await run_blocking(
+            gzip.compress, dom.encode("utf-8"), 6
+        )
+    except Exception as e:
+        logging.debug("DOM для снимка не получен: %s", e)
+    try:
+        files["viewport.jpg"] = await asyncio.wait_for(
+            page.screenshot(type="jpeg", quality=60), _CAPTURE_TIMEOUT_S
+        )
+    except Exception as e:
+        logging.debug("Скриншот для снимка не получен: %s", e)
+    files["ring.jsonl"] = "".join(
+        json.dumps(e, ensure_ascii=False, default=str) + "\n"
+        for e in _ring(worker)
+    ).encode("utf-8")
+    files["error.txt"] = (
+        f"hotel: {hotel}\nworker: {worker}\nstep: {step}\nurl: {page.url}\n\n"
+        + "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    ).encode("utf-8")
+
+    try:
+        _budget.used += await run_blocking(_write, folder, files)
+    except OSError as e:
+        logging.warning("Снимок %s не записан: %s", folder, e)
+        return None
+    logging.info("🔍 Снимок падения %s: %s", step, folder)
+    return folder
@@ -0,0 +1,249 @@
+"""
+Инструментирование event loop (INSTRUMENT=True), чтобы отличать нехватку CPU
+в loop от медленной сети/браузера:
+
+- задержка loop (семплы LoopLagMonitor);
+- медленные колбэки asyncio: loop.set_debug(True) + slow_callback_duration,
+  сообщения логгера asyncio «Executing <Handle ...> took N seconds» перехватываются;
+- по шагам process_hotel (safe_step): общее время шага и время, когда корутина
+  шага реально выполнялась в loop (active); остальное — ожидание (await).
+
+События пишутся в JSONL (INSTRUMENT_TRACE) в конце run_concurrent, там же
+печатается сводка. Режим отладки asyncio сам по себе замедляет loop —
+включать только для диагностики.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Coroutine, Dict, List, Optional
+
+from config_app import INSTRUMENT_TRACE, SLOW_CALLBACK_MS
+from perf_trace import current_hotel
+
+_active: Optional["LoopInstrumentation"] = None
+
+
+class _TimedCoroutine:
+    """
+    Обёртка корутины: меряет время внутри send()/throw() — то есть время,
+    когда код шага выполнялся в loop. Между ними корутина ждала (await).
+    """
+
+    def __init__(self, coro: Coroutine) -> None:
+        self._coro = coro
+        self.active = 0.0
+
+    def __await__(self):
+        coro = self._coro
+        value, error = None, None
+        while True:
+            t = perf_counter()
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as e:
+                self.active += perf_counter() - t
+                return e.value
+            except BaseException:
+                self.active += perf_counter() - t
+                raise
+            self.active += perf_counter() - t
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Ловит предупреждения asyncio о медленных колбэках (режим отладки loop)."""
+
+    def __init__(self, instrumentation: "LoopInstrumentation") -> None:
+        super().__init__(level=logging.WARNING)
+        self._instrumentation = instrumentation
+
+    def emit(self, record: logging.LogRecord) -> None:
+        args = record.args or ()
+        if not str(record.msg).startswith("Executing") or len(args) < 2:
+            return
+        self._instrumentation.record(
+            "slow_callback",
+            ms=round(float(args[1]) * 1000, 1),
+            handle=str(args[0])[:300],
+        )
+
+
+class LoopInstrumentation:
+    def __init__(
+        self, trace_path=INSTRUMENT_TRACE, slow_callback_ms: float = SLOW_CALLBACK_MS
+    ) -> None:
+        self.trace_path = trace_path
+        self.slow_callback_ms = slow_callback_ms
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._handler = _SlowCallbackHandler(self)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._saved_debug = (False, 0.1)
+
+    # --- сбор ---------------------------------------------------------------
+
+    def record(self, kind: str, **fields) -> None:
+        event = {"ts": round(time.time(), 3), "type": kind, **fields}
+        hotel = current_hotel.get()
+        if hotel and "hotel" not in event:
+            event["hotel"] = hotel
+        with self._lock:
+            self.events.append(event)
+
+    def record_lag(self, lag_ms: float) -> None:
+        self.record("lag", ms=round(lag_ms, 2))
+
+    async def time_step(self, name: str, coro: Coroutine):
+        timed = _TimedCoroutine(coro)
+        t = perf_counter()
+        ok = False
+        try:
+            result = await timed
+            ok = True
+            return result
+        finally:
+            wall = perf_counter() - t
+            self.record(
+                "step",
+                step=name,
+                wall_ms=round(wall * 1000, 1),
+                active_ms=round(timed.active * 1000, 1),
+                await_ms=round((wall - timed.active) * 1000, 1),
+                ok=ok,
+            )
+
+    # --- жизненный цикл -----------------------------------------------------
+
+    def start(self) -> None:
+        """Вызывать из работающего loop (в начале run_concurrent)."""
+        global _active
+        self._loop = asyncio.get_running_loop()
+        self._saved_debug = (
+            self._loop.get_debug(),
+            self._loop.slow_callback_duration,
+        )
+        self._loop.set_debug(True)
+        self._loop.slow_callback_duration = self.slow_callback_ms / 1000
+        logging.getLogger("asyncio").addHandler(self._handler)
+        self.record("run_start", slow_callback_ms=self.slow_callback_ms)
+        _active = self
+
+    def stop(self) -> None:
+        """Вернуть настройки loop, дописать JSONL и напечатать сводку."""
+        global _active
+        _active = None
+        logging.getLogger("asyncio").removeHandler(self._handler)
+        if self._loop is not None:
+            debug, duration = self._saved_debug
+            self._loop.set_debug(debug)
+            self._loop.slow_callback_duration = duration
+        self.record("run_end")
+        self._write_trace()
+        self.log_summary()
+
+    def _write_trace(self) -> None:
+        with self._lock:
+            events = list(self.events)
+        try:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                for e in events:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            logging.info(
+                "📈 Трасса event loop: %s (%d событий)", self.trace_path, len(events)
+            )
+        except OSError as e:
+            logging.warning("Не удалось записать трассу %s: %s", self.trace_path, e)
+
+    # --- сводка -------------------------------------------------------------
+
+    def summary(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+        lags = sorted(e["ms"] for e in events if e["type"] == "lag")
+        slow = [e for e in events if e["type"] == "slow_callback"]
+        steps: Dict[str, List[dict]] = defaultdict(list)
+        for e in events:
+            if e["type"] == "step":
+                steps[e["step"]].append(e)
+
+        def pct(values, q):
+            return round(values[min(len(values) - 1, int(len(values) * q))], 1)
+
+        return {
+            "lag": {
+                "samples": len(lags),
+                "p50_ms": pct(lags, 0.5) if lags else 0,
+                "p99_ms": pct(lags, 0.99) if lags else 0,
+                "max_ms": lags[-1] if lags else 0,
+            },
+            "slow_callbacks": {
+                "count": len(slow),
+                "total_ms": round(sum(e["ms"] for e in slow), 1),
+                "worst": sorted(slow, key=lambda e: -e["ms"])[:5],
+            },
+            "steps": {
+                name: {
+                    "count": len(rows),
+                    "wall_ms": round(statistics.mean(r["wall_ms"] for r in rows), 1),
+                    "active_ms": round(
+                        statistics.mean(r["active_ms"] for r in rows), 1
+                    ),
+                    "await_ms": round(statistics.mean(r["await_ms"] for r in rows), 1),
+                    "failed": sum(not r["ok"] for r in rows),
+                }
+                for name, rows in steps.items()
+            },
+        }
+
+    def log_summary(self) -> None:
+        s = self.summary()
+        lag, slow = s["lag"], s["slow_callbacks"]
+        lines = [
+            "📈 Инструментирование event loop:",
+            f"  задержка loop: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, "
+            f"max {lag['max_ms']} ms ({lag['samples']} семплов)",
+            f"  медленных колбэков (≥ {self.slow_callback_ms} ms): {slow['count']}, "
+            f"суммарно {slow['total_ms']} ms",
+        ]
+        for e in slow["worst"]:
+            lines.append(
+                f"    {e['ms']} ms  {e.get('hotel') or ''}  {e['handle'][:120]}"
+            )
+        lines.append(
+            f"  {'шаг':<28}{'n':>5}{'всего ms':>11}{'в loop ms':>11}{'await ms':>11}"
+        )
+        for name, r in sorted(s["steps"].items(), key=lambda kv: -kv[1]["wall_ms"]):
+            lines.append(
+                f"  {name:<28}{r['count']:>5}{r['wall_ms']:>11}"
+                f"{r['active_ms']:>11}{r['await_ms']:>11}"
+            )
+        # грубая интерпретация: loop занят — CPU; loop свободен, шаги ждут — сеть/браузер
+        if lag["p99_ms"] >= self.slow_callback_ms or slow["count"]:
+            lines.append("  ⚠ loop перегружен: задержки из-за CPU в процессе Python")
+        else:
+            lines.append("  loop не перегружен: время шагов — ожидание сети/браузера")
+        logging.info("\n".join(lines))
+
+
+def instrument_step(name: str, coro: Coroutine):
+    """Для safe_step: при включённом инструментировании — замер шага, иначе coro."""
+    if _active is None:
+        return coro
+    return _active.time_step(name, coro)
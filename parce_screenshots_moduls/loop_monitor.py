@@ -0,0 +1,75 @@
+"""
+Монитор задержек event loop: раз в interval секунд засыпает на interval и меряет,
+насколько позже проснулся. Задержка сверх interval — время, когда loop был занят
+синхронной работой и не обслуживал другие корутины (воркеры).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from config_app import LOOP_LAG_WARN_MS
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = 0.1,
+        warn_ms: float = LOOP_LAG_WARN_MS,
+        on_sample: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.on_sample = on_sample  # каждый семпл задержки, мс (трасса)
+        self.lags_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - start - self.interval) * 1000)
+            self.lags_ms.append(lag_ms)
+            if self.on_sample:
+                self.on_sample(lag_ms)
+            if lag_ms >= self.warn_ms:
+                logging.warning("⏱ Event loop был занят %.0f ms", lag_ms)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def summary(self) -> dict:
+        lags = sorted(self.lags_ms)
+        if not lags:
+            return {"samples": 0}
+        return {
+            "samples": len(lags),
+            "p50_ms": round(lags[len(lags) // 2], 1),
+            "p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 1),
+            "max_ms": round(lags[-1], 1),
+            "stalls": sum(lag >= self.warn_ms for lag in lags),
+        }
+
+    def log_summary(self) -> None:
+        s = self.summary()
+        if not s["samples"]:
+            return
+        logging.info(
+            "⏱ Event loop: задержка p50 %.1f ms, p99 %.1f ms, max %.1f ms, "
+            "остановок ≥ %d ms: %d",
+            s["p50_ms"],
+            s["p99_ms"],
+            s["max_ms"],
+            self.warn_ms,
+            s["stalls"],
+        )
@@ -0,0 +1,133 @@
+"""
+Сторож памяти страницы воркера. Воркер держит один контекст и одну страницу
+на сотни тяжёлых страниц со статистикой — память рендерера растёт.
+
+После каждого отеля check() снимает через CDP (Performance.getMetrics) размер
+JS-кучи и число DOM-узлов страницы и решает, пора ли пересоздать контекст:
+    hotels — обработано RECYCLE_AFTER_HOTELS отелей (0 — не считать);
+    heap   — JS-куча больше RECYCLE_HEAP_MB (0 — не проверять);
+    crash  — рендерер страницы упал (событие page "crash").
+Пересоздание делает воркер между отелями. Семплы и причины пересозданий
+идут в живые метрики и в сводку в конце run_concurrent.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from playwright.async_api import CDPSession, Error as PlaywrightError, Page
+
+from config_app import RECYCLE_AFTER_HOTELS, RECYCLE_HEAP_MB
+from metrics import metrics
+
+MB = 2**20
+
+
+@dataclass
+class MemorySample:
+    hotel_no: int  # номер отеля в текущем контексте
+    heap_bytes: int
+    nodes: int
+
+
+class MemoryWatchdog:
+    def __init__(
+        self,
+        worker: str,
+        max_hotels: int = RECYCLE_AFTER_HOTELS,
+        max_heap_mb: int = RECYCLE_HEAP_MB,
+    ) -> None:
+        self.worker = worker
+        self.max_hotels = max_hotels
+        self.max_heap_mb = max_heap_mb
+        self.samples: List[MemorySample] = []
+        self.recycles: List[str] = []  # причины пересозданий
+        self._hotels = 0
+        self._crashed = False
+        self._cdp: Optional[CDPSession] = None
+
+    async def attach(self, page: Page) -> None:
+        """Вызывать для каждой новой страницы воркера."""
+        self._cdp = None
+        page.on("crash", lambda _: self._mark_crashed())
+        try:
+            self._cdp = await page.context.new_cdp_session(page)
+            await self._cdp.send("Performance.enable")
+        except PlaywrightError as e:
+            # не Chromium или сессия не открылась — остаётся счётчик отелей
+            logging.debug("[%s] CDP недоступен: %s", self.worker, e)
+            self._cdp = None
+
+    def _mark_crashed(self) -> None:
+        self._crashed = True
+        logging.warning("[%s] 💥 Рендерер страницы упал", self.worker)
+
+    async def _sample(self) -> Optional[MemorySample]:
+        if self._cdp is None or self._crashed:
+            return None
+        try:
+            result = await self._cdp.send("Performance.getMetrics")
+        except PlaywrightError:
+            return None
+        values = {m["name"]: m["value"] for m in result.get("metrics", [])}
+        return MemorySample(
+            hotel_no=self._hotels,
+            heap_bytes=int(values.get("JSHeapUsedSize", 0)),
+            nodes=int(values.get("Nodes", 0)),
+        )
+
+    async def check(self) -> Optional[str]:
+        """После отеля: причина пересоздать контекст или None."""
+        self._hotels += 1
+        sample = await self._sample()
+        if sample is not None:
+            self.samples.append(sample)
+            metrics.set_page_heap(self.worker, sample.heap_bytes)
+        if self._crashed:
+            return "crash"
+        if (
+            sample is not None
+            and self.max_heap_mb
+            and sample.heap_bytes > self.max_heap_mb * MB
+        ):
+            return "heap"
+        if self.max_hotels and self._hotels >= self.max_hotels:
+            return "hotels"
+        return None
+
+    def recycled(self, reason: str) -> None:
+        """Контекст пересоздан: учесть причину и начать счёт заново."""
+        self.recycles.append(reason)
+        metrics.record_recycle(reason)
+        last = self.samples[-1].heap_bytes / MB if self.samples else 0
+        logging.info(
+            "[%s] ♻ Пересоздан контекст (%s) после %d отелей, JS-куча %.0f MB",
+            self.worker,
+            reason,
+            self._hotels,
+            last,
+        )
+        self._hotels = 0
+        self._crashed = False
+
+
+def log_memory_summary(watchdogs: List[MemoryWatchdog]) -> None:
+    """Пересоздания и тренд JS-кучи по воркерам (первый, средний, макс., последний)."""
+    lines = []
+    for w in watchdogs:
+        if not w.samples and not w.recycles:
+            continue
+        heap = [s.heap_bytes / MB for s in w.samples] or [0.0]
+        reasons = ", ".join(
+            f"{r}={w.recycles.count(r)}" for r in sorted(set(w.recycles))
+        )
+        lines.append(
+            f"  {w.worker:<5} семплов {len(w.samples):>4}  JS-куча MB: "
+            f"{heap[0]:.0f} → {heap[-1]:.0f} (сред. {sum(heap) / len(heap):.0f}, "
+            f"макс. {max(heap):.0f}); пересозданий {len(w.recycles)}"
+            + (f" ({reasons})" if reasons else "")
+        )
+    if lines:
+        logging.info("🧠 Память страниц воркеров:\n%s", "\n".join(lines))
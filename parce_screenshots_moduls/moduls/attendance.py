@@ -13,8 +13,7 @@ from parce_screenshots_moduls.moduls.locators import (
     INCORRECT_DATA_SELECTOR,
     ACTIVATION_REQUIRES_SELECTOR,
 )
-from parce_screenshots_moduls.utils import goto_strict
-from utils import get_screenshot_path
+from parce_screenshots_moduls.utils import goto_strict, capture_shot
 
 
 @retry(
@@ -63,12 +62,11 @@ async def attendance(page: Page, hotel_id, hotel_title=None):
                 try:
                     element = await page.query_selector(ACTIVATION_REQUIRES_SELECTOR)
                     if element:
-                        path = get_screenshot_path(
-                            hotel_id, hotel_title, "04_attendance.png"
+                        await capture_shot(
+                            element, hotel_id, hotel_title, "04_attendance.png"
                         )
-                        await element.screenshot(path=path)
                         logging.info(
-                            f"[attendance] Скриншот таблицы при требуемой активации сохранён: {path}"
+                            f"[attendance] Скриншот таблицы при требуемой активации сохранён: {hotel_id}"
                         )
                     else:
                         logging.warning(
@@ -82,16 +80,14 @@ async def attendance(page: Page, hotel_id, hotel_title=None):
 
             # Всё нормально — делаем обычный скриншот
             element = await page.query_selector(ATTENDANCE_LOCATOR)
-            await element.screenshot(
-                path=get_screenshot_path(hotel_id, hotel_title, "04_attendance.png")
-            )
+            await capture_shot(element, hotel_id, hotel_title, "04_attendance.png")
             return
 
         # Ошибка "неверные данные" осталась после всех попыток
         if await page.is_visible(INCORRECT_DATA_SELECTOR):
             error_element = await page.query_selector(INCORRECT_DATA_SELECTOR)
-            await error_element.screenshot(
-                path=get_screenshot_path(hotel_id, hotel_title, "04_attendance.png")
+            await capture_shot(
+                error_element, hotel_id, hotel_title, "04_attendance.png"
             )
             logging.warning(
                 f"[attendance] После {attempts} попыток ошибка осталась. Сделан скрин ошибки."
@@ -1,11 +1,10 @@
 import logging
 
-from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 from playwright.async_api import Error as PlaywrightError
 
 from playwright.async_api import Page
-from parce_screenshots_moduls.utils import goto_strict
+from parce_screenshots_moduls.utils import goto_strict, crop_png, store_shot
 
 from config_app import BASE_URL_PRO, RETRIES_FOR_DELETE_LOCATORS, DELAY_FOR_DELETE
 from parce_screenshots_moduls.delete_any_popup import nuke_poll_overlay
@@ -13,7 +12,8 @@ from parce_screenshots_moduls.moduls.locators import (
     ACTIVITY_TABLE_LOCATOR,
     ROW_ACTIVITY_TABLE_LOCATOR,
 )
-from utils import get_screenshot_path
+from parce_screenshots_moduls.blocking_io import run_blocking
+from perf_trace import tracer
 
 
 @retry(
@@ -50,18 +50,21 @@ async def last_activity(page: Page, hotel_id, hotel_title=None):
         old_viewport = page.viewport_size
         await page.set_viewport_size({"width": 1400, "height": 1000})
 
-        full_path = get_screenshot_path(hotel_id, hotel_title, "08_activity.png")
-        # Сделать скриншот элемента
-        await element.screenshot(path=full_path)
+        # Сделать скриншот элемента (в память)
+        with tracer.span("screenshot", cat="shot", shot="08_activity.png"):
+            data = await element.screenshot()
 
         # Определить количество строк в таблице
         row_count = await page.locator(ROW_ACTIVITY_TABLE_LOCATOR).count()
         # Если строк больше двух — обрезаем
         if row_count > 24 * 2:
-            with Image.open(full_path) as img:
-                width, height = img.size
-                top_half = img.crop((0, 0, width, height // 2))  # Оставляем верхнюю половину
-                top_half.save(full_path)
+            # Оставляем верхнюю половину (PIL — в пуле, не блокируя loop)
+            with tracer.span("crop", cat="shot", shot="08_activity.png"):
+                data = await run_blocking(
+                    crop_png, data, lambda width, height: (0, 0, width, height // 2)
+                )
+
+        await store_shot(hotel_id, hotel_title, "08_activity.png", data)
 
         await page.set_viewport_size(old_viewport)
 
@@ -16,22 +16,24 @@ from parce_screenshots_moduls.moduls.locators import (
     NO_DATA_SELECTOR,
     OUT_OF_RATING_SELECTOR,
 )
-from parce_screenshots_moduls.utils import goto_strict
-from utils import get_screenshot_path, save_to_jsonfile
+from parce_screenshots_moduls.utils import goto_strict, capture_shot
+from utils import save_to_jsonfile
 
 
-async def _safe_element_screenshot(page: Page, selector: str, path: str) -> None:
+async def _safe_element_screenshot(
+    page: Page, selector: str, hotel_id: str, hotel_title: str, file_name: str
+) -> None:
     """Скрин элемента, а если его нет — скрин всей страницы."""
     try:
         el = await page.query_selector(selector)
         if el:
-            await el.screenshot(path=path)
+            await capture_shot(el, hotel_id, hotel_title, file_name)
         else:
-            await page.screenshot(path=path, full_page=True)
+            await capture_shot(page, hotel_id, hotel_title, file_name, full_page=True)
     except Exception:
         # На крайний случай — скрин всей страницы
         try:
-            await page.screenshot(path=path, full_page=True)
+            await capture_shot(page, hotel_id, hotel_title, file_name, full_page=True)
         except Exception:
             logging.exception("Не удалось сделать скриншот ни элемента, ни страницы")
 
@@ -52,9 +54,9 @@ async def error_handlers(
         await _safe_element_screenshot(
             page,
             selector=NO_DATA_SELECTOR,
-            path=get_screenshot_path(
-                hotel_id, hotel_title, "07_rating_in_hurghada.png"
-            ),
+            hotel_id=hotel_id,
+            hotel_title=hotel_title,
+            file_name="07_rating_in_hurghada.png",
         )
         # Можно сохранить маркёр в JSON для последующей логики
         save_to_jsonfile(hotel_id, hotel_title, key="rating_status", value="no_data")
@@ -66,9 +68,9 @@ async def error_handlers(
         await _safe_element_screenshot(
             page,
             selector=ALL_TABLE_RATING_OVEREVIEW_LOCATOR,  # если нет — упадём на фулл-скрин
-            path=get_screenshot_path(
-                hotel_id, hotel_title, "07_rating_in_hurghada.png"
-            ),
+            hotel_id=hotel_id,
+            hotel_title=hotel_title,
+            file_name="07_rating_in_hurghada.png",
         )
         save_to_jsonfile(
             hotel_id, hotel_title, key="rating_status", value="account_inactive"
@@ -124,10 +126,8 @@ async def rating_hotels_in_hurghada(
         save_to_jsonfile(hotel_id, hotel_title, "rating_url", current_url)
 
         if element:
-            await element.screenshot(
-                path=get_screenshot_path(
-                    hotel_id, hotel_title, "07_rating_in_hurghada.png"
-                )
+            await capture_shot(
+                element, hotel_id, hotel_title, "07_rating_in_hurghada.png"
             )
         else:
             logging.warning(f"[{hotel_id}] Таблица рейтинга не найдена на {url}")
@@ -138,9 +138,9 @@ async def rating_hotels_in_hurghada(
         await _safe_element_screenshot(
             page,
             selector=ALL_TABLE_RATING_OVEREVIEW_LOCATOR,
-            path=get_screenshot_path(
-                hotel_id, hotel_title, "07_rating_in_hurghada.png"
-            ),
+            hotel_id=hotel_id,
+            hotel_title=hotel_title,
+            file_name="07_rating_in_hurghada.png",
         )
         # Не поднимаем PlaywrightError — чтобы не зациклиться
     except PlaywrightError:
@@ -149,9 +149,9 @@ async def rating_hotels_in_hurghada(
         await _safe_element_screenshot(
             page,
             selector=ALL_TABLE_RATING_OVEREVIEW_LOCATOR,
-            path=get_screenshot_path(
-                hotel_id, hotel_title, "07_rating_in_hurghada_error.png"
-            ),
+            hotel_id=hotel_id,
+            hotel_title=hotel_title,
+            file_name="07_rating_in_hurghada_error.png",
         )
         # Исключение перехвачено — наружу не кидаем, чтобы прекратить ретраи
     except Exception:
@@ -160,7 +160,7 @@ async def rating_hotels_in_hurghada(
         await _safe_element_screenshot(
             page,
             selector=ALL_TABLE_RATING_OVEREVIEW_LOCATOR,
-            path=get_screenshot_path(
-                hotel_id, hotel_title, "07_rating_in_hurghada_unexpected.png"
-            ),
+            hotel_id=hotel_id,
+            hotel_title=hotel_title,
+            file_name="07_rating_in_hurghada_unexpected.png",
         )
@@ -12,8 +12,7 @@ from parce_screenshots_moduls.moduls.locators import (
     REVIEW_LOCATOR,
     COUNT_REVIEW_LOCATOR,
 )
-from parce_screenshots_moduls.utils import goto_strict
-from utils import get_screenshot_path
+from parce_screenshots_moduls.utils import goto_strict, capture_shot
 
 
 @retry(
@@ -46,9 +45,7 @@ async def review_screen(page: Page, hotel_id, hotel_title=None):
         try:
             loc = page.locator(REVIEW_LOCATOR).first
             await loc.wait_for(state="visible", timeout=500)
-            await loc.screenshot(
-                path=get_screenshot_path(hotel_id, hotel_title, "03_reviews.png")
-            )
+            await capture_shot(loc, hotel_id, hotel_title, "03_reviews.png")
             cnt_text = await page.locator(COUNT_REVIEW_LOCATOR).first.text_content()
             return (cnt_text or "").strip()
         except TimeoutError:
@@ -65,8 +62,8 @@ async def review_screen(page: Page, hotel_id, hotel_title=None):
             except TimeoutError:
                 await page.get_by_text(needle, exact=False).first.wait_for(timeout=500)
 
-            await page.locator("#container").screenshot(
-                path=get_screenshot_path(hotel_id, hotel_title, "03_reviews.png")
+            await capture_shot(
+                page.locator("#container"), hotel_id, hotel_title, "03_reviews.png"
             )
             return ""
 
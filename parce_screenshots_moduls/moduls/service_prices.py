@@ -1,17 +1,23 @@
 import logging
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 from playwright.async_api import Page
-from pathlib import Path
-import tempfile
-from PIL import Image
 from playwright.async_api import TimeoutError as PWTimeoutError
 
 from config_app import BASE_URL_PRO, RETRIES_FOR_DELETE_LOCATORS, DELAY_FOR_DELETE
 from parce_screenshots_moduls.delete_any_popup import nuke_poll_overlay
 from parce_screenshots_moduls.moduls.locators import FALLBACK_CONTAINER_SERVICE_PRICES
 
-from parce_screenshots_moduls.utils import goto_strict, safe_full_page_screenshot
-from utils import get_screenshot_path
+from parce_screenshots_moduls.blocking_io import run_blocking
+from perf_trace import tracer
+from parce_screenshots_moduls.utils import (
+    goto_strict,
+    safe_full_page_screenshot,
+    capture_shot,
+    crop_png,
+    store_shot,
+)
+
+SHOT_NAME = "06_service_prices.png"
 
 
 @retry(
@@ -24,7 +30,6 @@ async def service_prices(page: Page, hotel_id, hotel_title=None):
     Скрин exactly: thead + первые две строки tbody из секции 'SERVICES AND PRICES'.
     """
     url = f"{BASE_URL_PRO}al/{hotel_id[2:]}/stat/profile?group=week&vw=grouped"
-    save_path = get_screenshot_path(hotel_id, hotel_title, "06_service_prices.png")
 
     try:
         await goto_strict(
@@ -81,8 +86,8 @@ async def service_prices(page: Page, hotel_id, hotel_title=None):
             pass
 
         # 2) Снимем САМУ таблицу целиком (element.screenshot не требует «влезания» в вьюпорт)
-        tmp_png = Path(tempfile.gettempdir()) / f"_srv_prices_{hotel_id}.png"
-        await table.screenshot(path=str(tmp_png), animations="disabled")
+        with tracer.span("screenshot", cat="shot", shot=SHOT_NAME):
+            raw_png = await table.screenshot(animations="disabled")
 
         # 3) Получим метрики thead и первых двух строк относительно начала TABLE
         metrics = await table.evaluate(
@@ -128,11 +133,14 @@ async def service_prices(page: Page, hotel_id, hotel_title=None):
             metrics["row1"]["top"] + metrics["row1"]["height"],
         )
 
-        # 5) Кроп и сохранение к финальному пути
-        with Image.open(tmp_png) as im:
-            W, H = im.size
-            box = (max(0, left), max(0, top), min(W, right), min(H, bottom))
-            im.crop(box).save(save_path)
+        # 5) Кроп в памяти (в пуле, не блокируя loop) и сохранение шота
+        with tracer.span("crop", cat="shot", shot=SHOT_NAME):
+            cropped = await run_blocking(
+                crop_png,
+                raw_png,
+                lambda W, H: (max(0, left), max(0, top), min(W, right), min(H, bottom)),
+            )
+        await store_shot(hotel_id, hotel_title, SHOT_NAME, cropped)
 
     except Exception:
         # Резерв: контейнер/фуллпейдж (из твоего исходника)
@@ -140,9 +148,9 @@ async def service_prices(page: Page, hotel_id, hotel_title=None):
             cont = page.locator(FALLBACK_CONTAINER_SERVICE_PRICES).first
             if await cont.count():
                 await cont.wait_for(state="visible", timeout=400)
-                await cont.screenshot(path=save_path, timeout=600)
+                await capture_shot(cont, hotel_id, hotel_title, SHOT_NAME, timeout=600)
             else:
-                await safe_full_page_screenshot(page, save_path)
+                await safe_full_page_screenshot(page, hotel_id, hotel_title, SHOT_NAME)
         except Exception:
             logging.exception("[service_prices] Фолбэк-скрин не удался для %s", url)
 
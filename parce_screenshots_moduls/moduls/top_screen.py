@@ -12,8 +12,8 @@ from parce_screenshots_moduls.moduls.locators import (
     POPULARS_LOCATOR,
     CITY_LOCATOR, CHAIN_HOTEL_LOCATOR,
 )
-from parce_screenshots_moduls.utils import goto_strict, with_viewport
-from utils import get_screenshot_path, normalize_text, save_to_jsonfile
+from parce_screenshots_moduls.utils import goto_strict, with_viewport, capture_shot
+from utils import normalize_text, save_to_jsonfile
 
 
 async def save_city(page, hotel_id, hotel_title):
@@ -62,9 +62,7 @@ async def top_screen(page: Page, hotel_id, hotel_title=None):
         if element is None:
             raise PlaywrightError("TOP_ELEMENT_LOCATOR не найден")
 
-        await element.screenshot(
-            path=get_screenshot_path(hotel_id, hotel_title, "01_top_element.png")
-        )
+        await capture_shot(element, hotel_id, hotel_title, "01_top_element.png")
 
         element2 = await page.query_selector(POPULARS_LOCATOR)
 
@@ -72,8 +70,8 @@ async def top_screen(page: Page, hotel_id, hotel_title=None):
             page,
             width=1550,
             height=1000,
-            action=lambda: element2.screenshot(
-                path=get_screenshot_path(hotel_id, hotel_title, "02_populars_element.png")
+            action=lambda: capture_shot(
+                element2, hotel_id, hotel_title, "02_populars_element.png"
             )
         )
 
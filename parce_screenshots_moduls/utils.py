@@ -1,9 +1,9 @@
 import asyncio
+import io
 import logging
-from pathlib import Path
 
 
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Tuple
 from typing import Optional, Pattern
 from playwright.async_api import Response
 
@@ -11,9 +11,13 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_t
 from playwright.async_api import Error as PlaywrightError
 
 from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from PIL import Image
 
+from artifact_store import save_shot_bytes
 from config_app import BASE_URL_PRO, BASE_URL_TH
+from parce_screenshots_moduls.blocking_io import run_blocking
 from parce_screenshots_moduls.delete_any_popup import nuke_poll_overlay
+from perf_trace import tracer
 
 from parce_screenshots_moduls.moduls.locators import (
     FLAG_LOCATOR,
@@ -109,28 +113,57 @@ async def set_language_en(page: Page):
 #         await elements.nth(i).evaluate("el => el.remove()")
 
 
-async def safe_full_page_screenshot(page: Page, save_path: str | Path) -> bool:
+async def store_shot(hotel_id, hotel_title, file_name: str, data: bytes) -> None:
+    """Сохранить байты шота (память и/или папка отеля) в пуле, не блокируя loop."""
+    with tracer.span("store", cat="shot", shot=file_name):
+        await run_blocking(save_shot_bytes, hotel_id, hotel_title, file_name, data)
+
+
+def crop_png(
+    data: bytes, box: Callable[[int, int], Tuple[int, int, int, int]]
+) -> bytes:
+    """
+    Кроп PNG в памяти. box(W, H) -> (left, top, right, bottom) по размеру картинки.
+    Синхронная (PIL) — из корутин вызывать через run_blocking.
+    """
+    with Image.open(io.BytesIO(data)) as im:
+        buf = io.BytesIO()
+        im.crop(box(*im.size)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+async def capture_shot(target, hotel_id, hotel_title, file_name: str, **kwargs) -> bytes:
+    """
+    Скриншот элемента/локатора/страницы -> байты -> хранилище артефактов
+    (память и/или папка отеля, см. ARTIFACT_MODE). kwargs уходят в .screenshot().
+    """
+    with tracer.span("screenshot", cat="shot", shot=file_name):
+        data = await target.screenshot(**kwargs)
+    await store_shot(hotel_id, hotel_title, file_name, data)
+    return data
+
+
+async def safe_full_page_screenshot(
+    page: Page, hotel_id, hotel_title, file_name: str
+) -> bool:
     """
     Делает скриншот полной страницы, обрабатывая исключения.
 
     Args:
         page: объект Page Playwright.
-        save_path: путь, куда сохранить скриншот.
+        hotel_id, hotel_title, file_name: куда сохранить шот (см. capture_shot).
 
     Returns:
         bool: True, если скриншот создан, False — если произошла ошибка.
     """
-    save_path = Path(save_path)
-    save_path.parent.mkdir(parents=True, exist_ok=True)
-
     try:
-        await page.screenshot(path=str(save_path), full_page=True)
-        print(f"[OK] Полный скриншот сохранён: {save_path}")
+        await capture_shot(page, hotel_id, hotel_title, file_name, full_page=True)
+        logging.info("[OK] Полный скриншот сохранён: %s %s", hotel_id, file_name)
         return True
     except PlaywrightTimeoutError as e:
-        print(f"[ERROR] Таймаут при создании скриншота: {e}")
+        logging.error("[ERROR] Таймаут при создании скриншота: %s", e)
     except Exception as e:
-        print(f"[ERROR] Не удалось сделать скриншот: {e}")
+        logging.error("[ERROR] Не удалось сделать скриншот: %s", e)
     return False
 
 
@@ -165,36 +198,45 @@ async def goto_strict(
     overlays_kwargs = overlays_kwargs or {}
 
     for attempt in range(retries + 1):
+        # спаны фаз: retry — номер повторного перехода внутри goto_strict
+        def phase(name: str):
+            return tracer.span(name, cat="goto", retry=attempt)
+
         try:
             # 1) Переход
-            resp = await page.goto(url, wait_until=wait_until, timeout=timeout)
+            with phase("goto"):
+                resp = await page.goto(url, wait_until=wait_until, timeout=timeout)
 
             # 2) Базовая проверка ответа (если есть Response)
             if resp and not resp.ok:
                 raise RuntimeError(f"GET {url} -> HTTP {resp.status}")
 
             # 3) Дождаться полной готовности документа (подстраховка)
-            await page.wait_for_function(
-                "document.readyState === 'complete'", timeout=timeout
-            )
+            with phase("ready_state"):
+                await page.wait_for_function(
+                    "document.readyState === 'complete'", timeout=timeout
+                )
 
             # 4) Анти-попапы (если передали функцию)
             if nuke_overlays:
-                try:
-                    await nuke_overlays(page, **overlays_kwargs)
-                except Exception:
-                    # не валим переход из-за чистки попапов
-                    pass
+                with phase("overlays"):
+                    try:
+                        await nuke_overlays(page, **overlays_kwargs)
+                    except Exception:
+                        # не валим переход из-за чистки попапов
+                        pass
 
             # 5) Проверка URL (если требуется)
             if expect_url is not None:
-                await page.wait_for_url(expect_url, timeout=timeout)
+                with phase("expect_url"):
+                    await page.wait_for_url(expect_url, timeout=timeout)
 
             # 6) Ждём якорный селектор (если передан)
             if ready_selector:
-                await page.wait_for_selector(
-                    ready_selector, state="visible", timeout=timeout
-                )
+                with phase("ready_selector"):
+                    await page.wait_for_selector(
+                        ready_selector, state="visible", timeout=timeout
+                    )
 
             # Всё ок — выходим
             return resp
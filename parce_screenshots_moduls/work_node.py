@@ -0,0 +1,170 @@
+"""
+Узел распределённого сбора: берёт ID из общей очереди (work_queue.py),
+собирает их обычным run_concurrent на своём браузере, выгружает шоты и
+метаданные готовых отелей в WORK_ARTIFACTS_DIR (results_store.export_hotel)
+и отчитывается по шагам.
+
+Пока пачка в работе, отдельная задача продлевает аренду каждые
+WORK_LEASE_TTL_S / 3. Узлы на одной машине запускаются из разных папок:
+auth_state.json лежит в текущей.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import socket
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import Browser, async_playwright
+
+from artifact_store import artifacts, in_memory
+from config_app import (
+    BROWSER_ARGS,
+    CONCURRENCY,
+    HEADLESS,
+    SCREENSHOTS_DIR,
+    WORK_ARTIFACTS_DIR,
+    WORK_LEASE_BATCH,
+    WORK_LEASE_TTL_S,
+)
+from metadata_store import metadata
+from parce_screenshots_moduls.concurrent_runner import (
+    hotel_is_complete,
+    run_concurrent,
+)
+from parce_screenshots_moduls.blocking_io import run_blocking
+from perf_trace import tracer
+from results_store import results
+from work_queue import WorkQueue
+
+POLL_S = 10
+
+
+def node_name() -> str:
+    return os.getenv("WORK_NODE") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _memory_titles(hotel_id: str) -> List[str]:
+    """Заголовки, под которыми у отеля есть шоты в памяти (ARTIFACT_MODE=memory)."""
+    return [t for hid, t in artifacts.hotels() if hid == hotel_id]
+
+
+def upload_hotel(hotel_id: str, dest_dir: Path = WORK_ARTIFACTS_DIR) -> Optional[str]:
+    """
+    Шоты и hotel.json (заголовок, метаданные) отеля -> dest_dir/<id> (через
+    tmp + rename, чтобы координатор не увидел половину папки), локальная
+    копия удаляется. Возвращает title.
+    """
+    final = dest_dir / hotel_id
+    tmp = dest_dir / f".{hotel_id}.{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    if in_memory():
+        titles = _memory_titles(hotel_id)
+        shots = [s for t in titles for s in artifacts.shots(hotel_id, t)]
+        title = results.export_hotel(
+            hotel_id, tmp, shots=shots, title=titles[-1] if titles else None
+        )
+    else:
+        title = results.export_hotel(hotel_id, tmp)
+    if tmp.exists():
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+    _forget(hotel_id)
+    return title
+
+
+def _forget(hotel_id: str) -> None:
+    for t in _memory_titles(hotel_id):
+        artifacts.drop(hotel_id, t)
+    metadata.forget(hotel_id)
+    results.forget(hotel_id)
+
+
+def _step_status(
+    spans: List[dict], hotel_ids: List[str]
+) -> Dict[str, Dict[str, bool]]:
+    """hotel_id -> {шаг: ok} по спанам safe_step последнего прохода."""
+    out: Dict[str, Dict[str, bool]] = {hid: {} for hid in hotel_ids}
+    for s in spans:
+        if s["cat"] == "step" and s.get("hotel") in out:
+            out[s["hotel"]][s["name"]] = s["ok"]
+    return out
+
+
+async def _keep_leases(queue: WorkQueue, node: str, hotel_ids: List[str]) -> None:
+    while True:
+        await asyncio.sleep(WORK_LEASE_TTL_S / 3)
+        kept = await run_blocking(queue.heartbeat, node, hotel_ids, WORK_LEASE_TTL_S)
+        if kept < len(hotel_ids):
+            logging.warning(
+                "⚠ [%s] аренда потеряна у %d из %d отелей",
+                node,
+                len(hotel_ids) - kept,
+                len(hotel_ids),
+            )
+
+
+async def _run_batch(
+    queue: WorkQueue, node: str, browser: Browser, hotel_ids: List[str]
+) -> Tuple[int, int]:
+    # спаны пачки — слушателем: в памяти трейсера держится только хвост
+    batch_spans: List[dict] = []
+    tracer.add_listener(batch_spans.append)
+    keeper = asyncio.create_task(_keep_leases(queue, node, hotel_ids))
+    try:
+        await run_concurrent(hotel_ids, browser=browser)
+    finally:
+        tracer.remove_listener(batch_spans.append)
+        keeper.cancel()
+        await asyncio.gather(keeper, return_exceptions=True)
+
+    steps = _step_status(batch_spans, hotel_ids)
+    done = failed = 0
+    for hid in hotel_ids:
+        complete = await run_blocking(hotel_is_complete, SCREENSHOTS_DIR, hid)
+        title = await run_blocking(upload_hotel, hid) if complete else None
+        if not complete:
+            # неполный отель соберёт заново следующая аренда (тут или на другом узле)
+            await run_blocking(_forget, hid)
+        status = await run_blocking(
+            queue.finish, node, hid, complete, title, steps[hid]
+        )
+        if status is None:
+            logging.warning("⚠ [%s] %s уже у другого узла, итог не записан", node, hid)
+        done += status == "done"
+        failed += status == "failed"
+    return done, failed
+
+
+async def run_node(
+    queue: Optional[WorkQueue] = None, node: Optional[str] = None
+) -> None:
+    """Арендует и собирает пачки, пока в очереди есть pending/leased."""
+    queue = queue or WorkQueue()
+    node = node or node_name()
+    batch = WORK_LEASE_BATCH or max(1, CONCURRENCY)
+    logging.info("🛰 Узел %s: очередь %s, пачка %d", node, queue.path, batch)
+    done = failed = 0
+    results.begin_run("node")
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS, args=BROWSER_ARGS)
+        try:
+            while True:
+                ids = await run_blocking(queue.lease, node, batch, WORK_LEASE_TTL_S)
+                if not ids:
+                    if not await run_blocking(queue.open_count):
+                        break
+                    # остальное в аренде у других узлов — ждём, вдруг она истечёт
+                    await asyncio.sleep(POLL_S)
+                    continue
+                d, f = await _run_batch(queue, node, browser, ids)
+                done, failed = done + d, failed + f
+        finally:
+            released = queue.release(node)
+            if released:
+                logging.info("↩ [%s] возвращено в очередь: %d", node, released)
+            await browser.close()
+            results.end_run()
+    logging.info("🏁 Узел %s: собрано %d, не собрано %d", node, done, failed)
@@ -0,0 +1,257 @@
+"""
+Спаны (интервалы времени) по всему прогону: шаги process_hotel (safe_step),
+фазы goto_strict, скриншоты и этапы сборки отчёта.
+
+Каждый спан помечается отелем, воркером и кругом (attempt) из contextvars —
+их ставят process_hotel, worker и run_create_report. В конце прогона
+write_report() пишет в PERF_DIR:
+    spans.jsonl  — сырые спаны, по одному JSON в строке;
+    trace.json   — Chrome trace (chrome://tracing, ui.perfetto.dev);
+    report.txt   — p50/p95/p99 по шагам, самые медленные отели, время по фазам.
+В памяти держатся последние PERF_MAX_SPANS спанов; после write_report они
+сбрасываются. Полный поток спанов получают слушатели (метрики, results_store).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from config_app import PERF_DIR, PERF_MAX_SPANS
+
+current_hotel: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_hotel", default=None
+)
+current_worker: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_worker", default=None
+)
+current_attempt: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_attempt", default=None
+)
+
+
+def _context_tags() -> dict:
+    tags = {
+        "hotel": current_hotel.get(),
+        "worker": current_worker.get(),
+        "attempt": current_attempt.get(),
+    }
+    return {k: v for k, v in tags.items() if v is not None}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank перцентиль по отсортированному списку."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q * len(values)) - 1))]
+
+
+class Tracer:
+    """
+    Копит последние max_spans спанов (dict) в памяти. Потокобезопасно.
+    Слушатели (add_listener) получают каждый законченный спан — так живые
+    метрики (metrics.py) строятся из тех же замеров.
+    """
+
+    def __init__(self, max_spans: int = PERF_MAX_SPANS) -> None:
+        self.spans: Deque[dict] = deque(maxlen=max_spans)
+        self.dropped = 0  # вытеснено из памяти с последнего сброса
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _keep(self, spans: List[dict]) -> None:
+        with self._lock:
+            self.dropped += max(0, len(self.spans) + len(spans) - self.spans.maxlen)
+            self.spans.extend(spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.dropped = 0
+
+    def _notify(self, spans: Iterable[dict]) -> None:
+        for listener in self._listeners:
+            for s in spans:
+                try:
+                    listener(s)
+                except Exception:
+                    logging.debug("Слушатель спанов упал", exc_info=True)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "step", **tags) -> Iterator[dict]:
+        """
+        with tracer.span("goto", cat="goto", retry=1): ...
+        Работает и в корутинах (сам менеджер ничего не ждёт). Исключение
+        помечает спан ok=False и пробрасывается дальше.
+        """
+        span = {
+            "name": name,
+            "cat": cat,
+            "ts": time.time(),
+            "pid": os.getpid(),
+            **_context_tags(),
+            **tags,
+            "ok": True,
+        }
+        t = perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span["ok"] = False
+            raise
+        finally:
+            span["dur"] = perf_counter() - t
+            self._keep([span])
+            self._notify((span,))
+
+    def extend(self, spans: Iterable[dict]) -> None:
+        """Добавить спаны, собранные в другом процессе (пул сборки отчётов)."""
+        spans = list(spans)
+        self._keep(spans)
+        self._notify(spans)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return list(self.spans)
+
+    # --- экспорт ------------------------------------------------------------
+
+    def export_jsonl(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for s in self.snapshot():
+                f.write(json.dumps(s, ensure_ascii=False, default=str) + "\n")
+
+    def export_chrome(self, path: Path) -> None:
+        """Chrome trace event format: complete-события (ph=X), дорожка = воркер."""
+        spans = self.snapshot()
+        lanes: Dict[tuple, int] = {}
+        events = []
+        for s in spans:
+            lane = (s["pid"], s.get("worker") or "main")
+            tid = lanes.setdefault(lane, len(lanes) + 1)
+            args = {
+                k: v
+                for k, v in s.items()
+                if k not in ("name", "cat", "ts", "dur", "pid")
+            }
+            events.append(
+                {
+                    "name": s["name"],
+                    "cat": s["cat"],
+                    "ph": "X",
+                    "ts": round(s["ts"] * 1e6),
+                    "dur": round(s["dur"] * 1e6),
+                    "pid": s["pid"],
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        for (pid, lane_name), tid in lanes.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": str(lane_name)},
+                }
+            )
+        path.write_text(
+            json.dumps({"traceEvents": events}, default=str), encoding="utf-8"
+        )
+
+    # --- отчёт --------------------------------------------------------------
+
+    def report(self, top: int = 10) -> str:
+        spans = self.snapshot()
+        if not spans:
+            return "Спанов нет."
+
+        by_name: Dict[tuple, List[dict]] = defaultdict(list)
+        for s in spans:
+            by_name[(s["cat"], s["name"])].append(s)
+
+        lines = [
+            f"{'категория':<8} {'спан':<30}{'n':>6}{'p50 s':>9}{'p95 s':>9}"
+            f"{'p99 s':>9}{'max s':>9}{'ошибок':>8}"
+        ]
+        if self.dropped:
+            lines.insert(0, f"(в памяти {len(spans)} спанов, вытеснено {self.dropped})")
+        for (cat, name), rows in sorted(by_name.items()):
+            durs = sorted(r["dur"] for r in rows)
+            lines.append(
+                f"{cat:<8} {name[:30]:<30}{len(rows):>6}"
+                f"{_percentile(durs, 0.50):>9.2f}{_percentile(durs, 0.95):>9.2f}"
+                f"{_percentile(durs, 0.99):>9.2f}{durs[-1]:>9.2f}"
+                f"{sum(not r['ok'] for r in rows):>8}"
+            )
+
+        hotels = sorted(
+            (s for s in spans if s["cat"] == "hotel"), key=lambda s: -s["dur"]
+        )
+        if hotels:
+            lines += ["", f"Самые медленные отели (из {len(hotels)}):"]
+            for s in hotels[:top]:
+                lines.append(
+                    f"  {s.get('hotel')}  {s['dur']:.1f}s  "
+                    f"worker={s.get('worker')} attempt={s.get('attempt')}"
+                )
+
+        # категории вложены (goto внутри step внутри hotel) — суммы не складывать
+        by_cat: Dict[str, float] = defaultdict(float)
+        by_phase: Dict[str, float] = defaultdict(float)
+        for s in spans:
+            by_cat[s["cat"]] += s["dur"]
+            if s["cat"] in ("goto", "build"):
+                by_phase[f"{s['cat']}:{s['name']}"] += s["dur"]
+        lines += ["", "Суммарное время по категориям:"]
+        for cat, total in sorted(by_cat.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {cat:<10}{total:>10.1f}s")
+        if by_phase:
+            lines += ["", "Время по фазам (доля внутри goto_strict / сборки отчёта):"]
+            for phase, total in sorted(by_phase.items(), key=lambda kv: -kv[1]):
+                share = 100 * total / (by_cat[phase.split(":", 1)[0]] or 1)
+                lines.append(f"  {phase:<28}{total:>10.1f}s{share:>7.1f}%")
+        return "\n".join(lines)
+
+    def write_report(self, out_dir: Path = PERF_DIR) -> Optional[Path]:
+        """
+        spans.jsonl + trace.json + report.txt в out_dir; отчёт — в лог.
+        Спаны после этого сбрасываются: следующий отчёт — по новым.
+        """
+        if not self.spans:
+            return None
+        out_dir = Path(out_dir)
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            self.export_jsonl(out_dir / "spans.jsonl")
+            self.export_chrome(out_dir / "trace.json")
+            text = self.report()
+            (out_dir / "report.txt").write_text(text, encoding="utf-8")
+        except OSError as e:
+            logging.warning("Не удалось записать отчёт о производительности: %s", e)
+            return None
+        finally:
+            self.clear()
+        logging.info("⏲ Производительность (%s):\n%s", out_dir, text)
+        return out_dir
+
+
+tracer = Tracer()
@@ -0,0 +1,408 @@
+"""
+Состояние прогона в SQLite (RESULTS_DB) вместо папок screenshots/{id}_{title}
+и links.json в каждой из них.
+
+    runs      — прогоны (report, daemon, node): начало, конец, число отелей;
+    hotels    — отель: заголовок, папка с шотами, последний прогон;
+    artifacts — шоты отеля: имя файла, путь, размер (файл лежит в папке отеля);
+    metadata  — поля бывшего links.json (star, city, chain, rating_url, ...),
+                значение — JSON;
+    steps     — шаги process_hotel (safe_step): ok, длительность, круг, воркер.
+
+Папка отеля — SCREENSHOTS_DIR/<hotel_id>: заголовок в путь не попадает, и
+его больше никто не достаёт из имени папки. Скрапер регистрирует шоты при
+сохранении, повторы (hotels_needing_retry) и сборка отчётов берут отели, шоты
+и метаданные запросами.
+
+Соединение — на каждый вызов (пишут потоки run_blocking и процессы сборки),
+WAL, busy_timeout. Шаги копятся в памяти по спанам трейсера и пишутся одной
+транзакцией, когда отель закончен (flush_steps).
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from config_app import RESULTS_DB, SCREENSHOTS_DIR
+from perf_trace import tracer
+
+HOTEL_FILE = "hotel.json"  # описание отеля в выгрузке узла (export_hotel)
+
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    started  REAL NOT NULL,
+    finished REAL,
+    hotels   INTEGER
+);
+CREATE TABLE IF NOT EXISTS hotels (
+    hotel_id TEXT PRIMARY KEY,
+    title    TEXT,
+    folder   TEXT NOT NULL,
+    run_id   INTEGER,
+    updated  REAL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    hotel_id TEXT NOT NULL,
+    stem     TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    size     INTEGER,
+    run_id   INTEGER,
+    updated  REAL,
+    PRIMARY KEY (hotel_id, stem)
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    hotel_id TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    value    TEXT,
+    PRIMARY KEY (hotel_id, key)
+);
+CREATE INDEX IF NOT EXISTS metadata_key ON metadata (key);
+CREATE TABLE IF NOT EXISTS steps (
+    id       INTEGER PRIMARY KEY,
+    run_id   INTEGER,
+    hotel_id TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    ok       INTEGER NOT NULL,
+    dur      REAL,
+    ts       REAL,
+    attempt  INTEGER,
+    worker   TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_hotel ON steps (hotel_id, name);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id);
+"""
+
+# «нет заголовка» (title не прочитался): не затирает уже известный
+_NO_TITLE = "None"
+
+
+class ResultsStore:
+    """Обёртка над RESULTS_DB. Потокобезопасно; можно из процессов сборки."""
+
+    def __init__(self, path: Path = RESULTS_DB, screens_dir: Path = SCREENSHOTS_DIR):
+        self.path = Path(path)
+        self.screens_dir = Path(screens_dir)
+        self.run_id: Optional[int] = None
+        self._steps: Dict[str, List[dict]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _ensure_schema(self) -> None:
+        """
+        _SCHEMA (идемпотентна) — один раз на хранилище, под замком: поток, открывший
+        базу, пока другой её создаёт, не увидит файл без таблиц. Файл могли снести
+        вместе с папкой шотов (delete_screenshots) — тогда схема заново.
+        """
+        if self._schema_ready and self.path.exists():
+            return
+        with self._lock:
+            if self._schema_ready and self.path.exists():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=60)) as db:
+                db.executescript(_SCHEMA)
+            self._schema_ready = True
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        self._ensure_schema()
+        with closing(sqlite3.connect(self.path, timeout=60)) as db:
+            db.row_factory = sqlite3.Row
+            with db:
+                yield db
+
+    # ---------- прогоны ----------
+
+    def begin_run(self, kind: str) -> int:
+        with self._tx() as db:
+            self.run_id = db.execute(
+                "INSERT INTO runs (kind, started) VALUES (?, ?)", (kind, time.time())
+            ).lastrowid
+        return self.run_id
+
+    def end_run(self) -> None:
+        if self.run_id is None:
+            return
+        with self._tx() as db:
+            db.execute(
+                "UPDATE runs SET finished = ?, hotels = (SELECT COUNT(*) FROM hotels"
+                " WHERE run_id = ?) WHERE id = ?",
+                (time.time(), self.run_id, self.run_id),
+            )
+        self.run_id = None
+
+    # ---------- отели ----------
+
+    def hotel_folder(self, hotel_id: str) -> Path:
+        """Папка шотов отеля (создаётся при первом шоте)."""
+        return self.screens_dir / str(hotel_id)
+
+    def _upsert_hotel(self, db: sqlite3.Connection, hotel_id: str, title) -> None:
+        db.execute(
+            "INSERT INTO hotels (hotel_id, title, folder, run_id, updated)"
+            " VALUES (?, ?, ?, ?, ?) ON CONFLICT (hotel_id) DO UPDATE SET"
+            " title = COALESCE(NULLIF(excluded.title, ?), hotels.title),"
+            " run_id = COALESCE(excluded.run_id, hotels.run_id),"
+            " updated = excluded.updated",
+            (
+                str(hotel_id),
+                str(title),
+                str(self.hotel_folder(hotel_id)),
+                self.run_id,
+                time.time(),
+                _NO_TITLE,
+            ),
+        )
+
+    def hotels(
+        self, hotel_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, str]]:
+        """(hotel_id, title) отелей, у которых есть шоты, по hotel_id."""
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT hotel_id, title FROM hotels h WHERE EXISTS"
+                " (SELECT 1 FROM artifacts a WHERE a.hotel_id = h.hotel_id)"
+                " ORDER BY hotel_id"
+            ).fetchall()
+        wanted = None if hotel_ids is None else set(hotel_ids)
+        return [
+            (r["hotel_id"], r["title"])
+            for r in rows
+            if wanted is None or r["hotel_id"] in wanted
+        ]
+
+    def title(self, hotel_id: str) -> Optional[str]:
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT title FROM hotels WHERE hotel_id = ?", (str(hotel_id),)
+            ).fetchone()
+        return row["title"] if row else None
+
+    def forget(self, hotel_id: str) -> None:
+        """Всё про отель (шоты вместе с файлами, метаданные, шаги)."""
+        hotel_id = str(hotel_id)
+        with self._tx() as db:
+            for table in ("artifacts", "metadata", "steps", "hotels"):
+                db.execute(f"DELETE FROM {table} WHERE hotel_id = ?", (hotel_id,))
+        shutil.rmtree(self.hotel_folder(hotel_id), ignore_errors=True)
+        with self._lock:
+            self._steps.pop(hotel_id, None)
+
+    # ---------- шоты ----------
+
+    def add_artifact(self, hotel_id: str, title, name: str, path: Path) -> None:
+        path = Path(path)
+        with self._tx() as db:
+            self._upsert_hotel(db, hotel_id, title)
+            db.execute(
+                "INSERT OR REPLACE INTO artifacts"
+                " (hotel_id, stem, name, path, size, run_id, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(hotel_id),
+                    path.stem,
+                    name,
+                    str(path),
+                    path.stat().st_size,
+                    self.run_id,
+                    time.time(),
+                ),
+            )
+
+    def artifacts(self, hotel_id: str) -> List[Tuple[str, Path]]:
+        """Шоты отеля как (имя, путь) в порядке имён."""
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT name, path FROM artifacts WHERE hotel_id = ? ORDER BY name",
+                (str(hotel_id),),
+            ).fetchall()
+        return [(r["name"], Path(r["path"])) for r in rows]
+
+    def set_artifacts(self, hotel_id: str, shots: Iterable[Tuple[str, Path]]) -> None:
+        """Заменить список шотов отеля (после перекодирования сменились имена)."""
+        hotel_id, now = str(hotel_id), time.time()
+        rows = [
+            (hotel_id, Path(p).stem, name, str(p), Path(p).stat().st_size, now)
+            for name, p in shots
+        ]
+        with self._tx() as db:
+            db.execute("DELETE FROM artifacts WHERE hotel_id = ?", (hotel_id,))
+            db.executemany(
+                "INSERT INTO artifacts (hotel_id, stem, name, path, size, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def shot_stems(self, hotel_ids: Iterable[str]) -> Dict[str, Set[str]]:
+        """hotel_id -> имена собранных шотов без расширения (один запрос)."""
+        ids = [str(h) for h in hotel_ids]
+        out: Dict[str, Set[str]] = {hid: set() for hid in ids}
+        if not ids:
+            return out
+        with self._tx() as db:
+            db.execute("CREATE TEMP TABLE wanted (hotel_id TEXT PRIMARY KEY)")
+            db.executemany(
+                "INSERT OR IGNORE INTO wanted VALUES (?)", [(h,) for h in ids]
+            )
+            for r in db.execute(
+                "SELECT a.hotel_id, a.stem FROM artifacts a"
+                " JOIN wanted w ON w.hotel_id = a.hotel_id"
+            ):
+                out[r["hotel_id"]].add(r["stem"])
+        return out
+
+    # ---------- метаданные ----------
+
+    def load_metadata(self, hotel_id: str) -> dict:
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT key, value FROM metadata WHERE hotel_id = ?", (str(hotel_id),)
+            ).fetchall()
+        return {r["key"]: json.loads(r["value"]) for r in rows}
+
+    def save_metadata(self, hotel_id: str, title, data: dict) -> None:
+        """Метаданные отеля целиком (одна транзакция)."""
+        hotel_id = str(hotel_id)
+        with self._tx() as db:
+            self._upsert_hotel(db, hotel_id, title)
+            db.execute("DELETE FROM metadata WHERE hotel_id = ?", (hotel_id,))
+            db.executemany(
+                "INSERT INTO metadata (hotel_id, key, value) VALUES (?, ?, ?)",
+                [
+                    (hotel_id, key, json.dumps(value, ensure_ascii=False))
+                    for key, value in data.items()
+                ],
+            )
+
+    def hotels_where(self, key: str, value: str) -> List[str]:
+        """ID отелей, у которых поле key равно value (без учёта регистра;
+        у поля-списка — любой элемент)."""
+        value = value.strip().lower()
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT hotel_id, value FROM metadata WHERE key = ? ORDER BY hotel_id",
+                (key,),
+            ).fetchall()
+        out = []
+        for r in rows:
+            v = json.loads(r["value"])
+            values = v if isinstance(v, list) else [v]
+            if any(str(x).strip().lower() == value for x in values):
+                out.append(r["hotel_id"])
+        return out
+
+    # ---------- шаги ----------
+
+    def observe(self, span: dict) -> None:
+        """Слушатель трейсера: копит спаны шагов (safe_step) по отелям."""
+        if span["cat"] == "step" and span.get("hotel"):
+            with self._lock:
+                self._steps[span["hotel"]].append(span)
+
+    def flush_steps(self, hotel_id: str) -> None:
+        """Записать накопленные шаги отеля (после process_hotel)."""
+        with self._lock:
+            spans = self._steps.pop(str(hotel_id), [])
+        if not spans:
+            return
+        with self._tx() as db:
+            db.executemany(
+                "INSERT INTO steps"
+                " (run_id, hotel_id, name, ok, dur, ts, attempt, worker)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        self.run_id,
+                        s["hotel"],
+                        s["name"],
+                        int(s["ok"]),
+                        s["dur"],
+                        s["ts"],
+                        s.get("attempt"),
+                        s.get("worker"),
+                    )
+                    for s in spans
+                ],
+            )
+
+    def steps(self, hotel_id: str, run_id: Optional[int] = None) -> Dict[str, bool]:
+        """{шаг: ok} по последней записи каждого шага отеля (в прогоне run_id)."""
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT name, ok FROM steps WHERE hotel_id = ?"
+                " AND (? IS NULL OR run_id = ?) ORDER BY id",
+                (str(hotel_id), run_id, run_id),
+            ).fetchall()
+        return {r["name"]: bool(r["ok"]) for r in rows}
+
+    # ---------- выгрузка между машинами (work_node / work_queue.collect) ----------
+
+    def export_hotel(
+        self,
+        hotel_id: str,
+        dest: Path,
+        shots: Optional[List[Tuple[str, Union[bytes, Path]]]] = None,
+        title: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Шоты + hotel.json (заголовок, метаданные) -> папка dest. Возвращает title.
+        shots/title — шоты из памяти (ARTIFACT_MODE=memory); по умолчанию из базы.
+        """
+        if shots is None:
+            shots = self.artifacts(hotel_id)
+        if not shots:
+            return None
+        title = title or self.title(hotel_id)
+        dest.mkdir(parents=True, exist_ok=True)
+        for name, src in shots:
+            if isinstance(src, bytes):
+                (dest / name).write_bytes(src)
+            else:
+                shutil.copyfile(src, dest / name)
+        (dest / HOTEL_FILE).write_text(
+            json.dumps(
+                {
+                    "hotel_id": str(hotel_id),
+                    "title": title,
+                    "metadata": self.load_metadata(hotel_id),
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        return title
+
+    def import_hotel(self, src: Path) -> Optional[str]:
+        """Обратное export_hotel: шоты в папку отеля и записи в базу. -> hotel_id."""
+        info_path = src / HOTEL_FILE
+        if not info_path.exists():
+            return None
+        info = json.loads(info_path.read_text(encoding="utf-8"))
+        hotel_id, title = info["hotel_id"], info["title"]
+        folder = self.hotel_folder(hotel_id)
+        folder.mkdir(parents=True, exist_ok=True)
+        shots = []
+        for p in sorted(src.iterdir()):
+            if p.name != HOTEL_FILE and p.is_file():
+                shutil.copyfile(p, folder / p.name)
+                shots.append((p.name, folder / p.name))
+        self.save_metadata(hotel_id, title, info.get("metadata") or {})
+        self.set_artifacts(hotel_id, shots)
+        return hotel_id
+
+
+results = ResultsStore()
+tracer.add_listener(results.observe)
@@ -9,13 +9,47 @@
     LOCAL_FOLDER=D:/web_develop/tophotels/tophotels_moduls/TopHotels Reports
     PARENT_ID=root
     SA_JSON=service_account_google_drive.json
+    UPLOAD_WORKERS=8
+    UPLOAD_SIMPLE_MAX_MB=5
+    UPLOAD_MAX_RETRIES=5
+    UPLOAD_SYNC=True
+    UPLOAD_MANIFEST=upload_manifest.json
+    UPLOAD_FOLDER_CACHE=upload_folders.json
+
+Файлы грузятся параллельно пулом из UPLOAD_WORKERS потоков, у каждого потока
+свой клиент Drive (httplib2 не потокобезопасен). Файлы до UPLOAD_SIMPLE_MAX_MB
+уходят одним запросом, крупнее — резюмируемой загрузкой по 10 MB. На 429/5xx
+и сетевые ошибки — повтор с экспоненциальной задержкой, общей для всех
+потоков: после 429 притормаживает весь пул, а не один поток. В конце —
+сводка: файлов, MB, MB/s, повторов и список незагруженных.
+
+Режим синхронизации (UPLOAD_SYNC=True, по умолчанию) грузит только новые и
+изменённые файлы: удалённое дерево читается один раз (md5Checksum, size) и
+сравнивается с локальными md5; изменённые файлы обновляются на месте
+(files().update), без дублей. Состояние после загрузки пишется в манифест
+UPLOAD_MANIFEST — при повторном запуске дерево Диска не перечитывается, а
+md5 не пересчитывается у файлов с прежними размером и mtime. --refresh —
+перечитать Диск (файлы меняли руками), --dry-run — только показать план.
+
+Папки на Диске разрешаются деревом (DriveFolders): существующее поддерево
+PARENT_ID читается по уровням — один постраничный files().list на уровень
+(до PARENTS_PER_QUERY родителей в запросе), недостающие папки создаются
+batch-запросами по уровням, а ID папок хранятся в UPLOAD_FOLDER_CACHE между
+запусками. --refresh перечитывает и его.
 """
 
 import os
 import json
 import time
+import random
+import hashlib
+import socket
+import threading
 import mimetypes
-from typing import Optional, Dict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Dict, Iterable, Iterator, List, Tuple
 
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
@@ -36,10 +70,22 @@ AUTH_MODE    = os.getenv("AUTH_MODE", "oauth").strip().lower()  # oauth | sa
 LOCAL_FOLDER = os.path.normpath(os.getenv("LOCAL_FOLDER", "").strip())
 PARENT_ID    = os.getenv("PARENT_ID", "root").strip() or "root"
 SA_JSON      = os.getenv("SA_JSON", "service_account_google_drive.json").strip()
+UPLOAD_WORKERS       = max(1, int(os.getenv("UPLOAD_WORKERS") or 8))
+UPLOAD_SIMPLE_MAX_MB = float(os.getenv("UPLOAD_SIMPLE_MAX_MB") or 5)
+UPLOAD_MAX_RETRIES   = int(os.getenv("UPLOAD_MAX_RETRIES") or 5)
+UPLOAD_SYNC          = os.getenv("UPLOAD_SYNC", "True").strip().lower() == "true"
+UPLOAD_MANIFEST      = os.getenv("UPLOAD_MANIFEST", "upload_manifest.json").strip()
+UPLOAD_FOLDER_CACHE  = os.getenv("UPLOAD_FOLDER_CACHE", "upload_folders.json").strip()
+
+CHUNK_SIZE = 10 * 1024 * 1024  # 10 MB
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+FOLDER_MIME = "application/vnd.google-apps.folder"
+PARENTS_PER_QUERY = 40  # "'id' in parents or ..." в одном q
+BATCH_SIZE = 100  # лимит Drive на batch-запрос
 
 
 # ---------------- Авторизация ----------------
-def get_service_oauth():
+def get_credentials_oauth():
     """Авторизация под вашим Google-аккаунтом (OAuth)."""
     creds = None
     if os.path.exists("token.json"):
@@ -56,130 +102,624 @@ def get_service_oauth():
         with open("token.json", "w", encoding="utf-8") as f:
             f.write(creds.to_json())
 
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
+    return creds
 
 
-def get_service_sa():
+def get_credentials_sa():
     """Авторизация через сервис-аккаунт (используется только при AUTH_MODE=sa)."""
     from google.oauth2 import service_account
     if not os.path.exists(SA_JSON):
         raise FileNotFoundError(f"Не найден файл сервис-аккаунта: {SA_JSON}")
-    creds = service_account.Credentials.from_service_account_file(SA_JSON, scopes=SCOPES)
+    return service_account.Credentials.from_service_account_file(SA_JSON, scopes=SCOPES)
+
+
+def get_credentials():
+    """Учётные данные по AUTH_MODE. В главном потоке: OAuth может открыть браузер."""
+    if AUTH_MODE == "oauth":
+        return get_credentials_oauth()
+    if AUTH_MODE == "sa":
+        return get_credentials_sa()
+    raise ValueError("AUTH_MODE должен быть 'oauth' или 'sa'")
+
+
+def build_service(creds):
     return build("drive", "v3", credentials=creds, cache_discovery=False)
 
 
-# ---------------- Вспомогательные функции ----------------
-def find_or_create_folder(service, name: str, parent_id: str) -> str:
-    """Ищет или создаёт подпапку в Google Drive."""
-    q = (
-        f"name = {json.dumps(name)} and "
-        "mimeType = 'application/vnd.google-apps.folder' and "
-        f"'{parent_id}' in parents and trashed = false"
-    )
-    resp = service.files().list(q=q, fields="files(id, name)", pageSize=1).execute()
-    files = resp.get("files", [])
-    if files:
-        return files[0]["id"]
+def get_service_oauth():
+    return build_service(get_credentials_oauth())
 
-    file_metadata = {"name": name, "mimeType": "application/vnd.google-apps.folder", "parents": [parent_id]}
-    created = service.files().create(body=file_metadata, fields="id").execute()
-    return created["id"]
 
+def get_service_sa():
+    return build_service(get_credentials_sa())
+
+
+# ---------------- Повторы и клиенты потоков ----------------
+class _Backoff:
+    """
+    Общая для всех потоков пауза: поток, получивший 429/5xx, сдвигает момент,
+    раньше которого никто из пула не шлёт запросы.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._not_before = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            delay = self._not_before - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def push(self, seconds: float) -> None:
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
 
-def safe_media_upload(path: str) -> MediaFileUpload:
-    """Формируем MediaFileUpload с корректным mime и резюмируемой загрузкой."""
+
+_backoff = _Backoff()
+_local = threading.local()
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, HttpError):
+        return getattr(e.resp, "status", None) in RETRY_STATUSES
+    return isinstance(e, (ConnectionError, socket.timeout, TimeoutError))
+
+
+def call_with_retry(fn, what: str, stats: Optional["UploadStats"] = None):
+    """fn() с повторами на 429/5xx и сетевых ошибках (до UPLOAD_MAX_RETRIES)."""
+    for attempt in range(UPLOAD_MAX_RETRIES + 1):
+        _backoff.wait()
+        try:
+            return fn()
+        except Exception as e:
+            if not _retryable(e) or attempt == UPLOAD_MAX_RETRIES:
+                raise
+            sleep = min(2 ** attempt, 30) + random.uniform(0, 1)
+            code = getattr(getattr(e, "resp", None), "status", type(e).__name__)
+            print(f"  [retry] {what}: {code}, пауза {sleep:.1f}s")
+            _backoff.push(sleep)
+            if stats:
+                stats.add_retry()
+
+
+# ---------------- Вспомогательные функции ----------------
+def list_children(
+    service, parent_ids: List[str], fields: str, folders_only: bool = False
+) -> Iterator[dict]:
+    """Дети папок parent_ids: запрос на PARENTS_PER_QUERY родителей, постранично."""
+    for i in range(0, len(parent_ids), PARENTS_PER_QUERY):
+        chunk = parent_ids[i : i + PARENTS_PER_QUERY]
+        parents = " or ".join(f"'{pid}' in parents" for pid in chunk)
+        q = f"({parents}) and trashed = false"
+        if folders_only:
+            q += f" and mimeType = '{FOLDER_MIME}'"
+        page = None
+        while True:
+            request = service.files().list(
+                q=q,
+                fields=f"nextPageToken, files({fields}, parents)",
+                pageSize=1000,
+                pageToken=page,
+                orderBy="createdTime",
+            )
+            resp = call_with_retry(request.execute, "list")
+            yield from resp.get("files", [])
+            page = resp.get("nextPageToken")
+            if not page:
+                break
+
+
+def walk_tree(
+    service, parent_id: str, fields: str, folders_only: bool = False
+) -> Iterator[Tuple[str, dict]]:
+    """
+    (относительный путь через /, объект Диска) по всему поддереву parent_id,
+    уровень за уровнем. Дубли имён — берётся более ранний объект.
+    """
+    level = {parent_id: ""}
+    seen = set()
+    while level:
+        deeper: Dict[str, str] = {}
+        for f in list_children(service, list(level), fields, folders_only):
+            # у "root" в parents настоящий ID, поэтому один родитель — без сверки
+            owners = [level[p] for p in f.get("parents", []) if p in level]
+            if not owners and len(level) == 1:
+                owners = list(level.values())
+            for rel in owners:
+                path = f"{rel}/{f['name']}" if rel else f["name"]
+                if path in seen:
+                    continue
+                seen.add(path)
+                if f["mimeType"] == FOLDER_MIME:
+                    deeper[f["id"]] = path
+                yield path, f
+        level = deeper
+
+
+class DriveFolders:
+    """
+    Папки под parent_id: относительный путь -> ID. Поддерево читается целиком
+    (prefetch) или берётся из кэша прошлого запуска, недостающие папки
+    создаются batch-запросами.
+    """
+
+    def __init__(
+        self, service, parent_id: str, cache_path: str = UPLOAD_FOLDER_CACHE
+    ) -> None:
+        self.service = service
+        self.parent_id = parent_id
+        self.cache_path = cache_path
+        self.ids: Dict[str, str] = {"": parent_id}
+
+    def load(self) -> bool:
+        """ID из кэша; False — кэша нет или он для другой папки Диска."""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cache.get("parent_id") != self.parent_id:
+            return False
+        self.ids.update(cache.get("folders", {}))
+        return True
+
+    def save(self) -> None:
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"parent_id": self.parent_id, "folders": self.ids},
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        os.replace(tmp, self.cache_path)
+
+    def prefetch(self) -> None:
+        self.ids = {"": self.parent_id}
+        for path, f in walk_tree(
+            self.service, self.parent_id, "id, name, mimeType", folders_only=True
+        ):
+            self.ids[path] = f["id"]
+
+    def resolve(self, refresh: bool = False) -> None:
+        """Кэш, а если его нет (или refresh) — prefetch с Диска."""
+        if refresh or not self.load():
+            print("Читаем дерево папок на Диске...")
+            self.prefetch()
+        print(f"Папок на Диске: {len(self.ids) - 1}")
+
+    def missing(self, rel_dirs: Iterable[str]) -> List[str]:
+        """Недостающие папки вместе с предками, родители раньше детей."""
+        out = set()
+        for rel in rel_dirs:
+            while rel and rel not in self.ids and rel not in out:
+                out.add(rel)
+                rel = rel.rpartition("/")[0]
+        return sorted(out, key=lambda p: (p.count("/"), p))
+
+    def ensure(self, rel_dirs: Iterable[str]) -> int:
+        """Создаёт недостающие папки: уровень за уровнем, batch по BATCH_SIZE."""
+        by_depth: Dict[int, List[str]] = defaultdict(list)
+        for rel in self.missing(rel_dirs):
+            by_depth[rel.count("/")].append(rel)
+        for depth in sorted(by_depth):
+            self._create(by_depth[depth])
+        created = sum(len(v) for v in by_depth.values())
+        if created:
+            print(f"Создано папок: {created}")
+        return created
+
+    def _create(self, paths: List[str]) -> None:
+        for attempt in range(UPLOAD_MAX_RETRIES + 1):
+            failed: Dict[str, Exception] = {}
+            for i in range(0, len(paths), BATCH_SIZE):
+                chunk = paths[i : i + BATCH_SIZE]
+
+                def _done(request_id, response, exception, chunk=chunk):
+                    rel = chunk[int(request_id)]
+                    if exception is not None:
+                        failed[rel] = exception
+                    else:
+                        self.ids[rel] = response["id"]
+
+                batch = self.service.new_batch_http_request(callback=_done)
+                for n, rel in enumerate(chunk):
+                    parent, _, name = rel.rpartition("/")
+                    body = {
+                        "name": name,
+                        "mimeType": FOLDER_MIME,
+                        "parents": [self.ids[parent]],
+                    }
+                    batch.add(
+                        self.service.files().create(body=body, fields="id"),
+                        request_id=str(n),
+                    )
+                call_with_retry(batch.execute, f"batch: {len(chunk)} папок")
+            if not failed:
+                return
+            fatal = [e for e in failed.values() if not _retryable(e)]
+            if fatal or attempt == UPLOAD_MAX_RETRIES:
+                raise (fatal or list(failed.values()))[0]
+            sleep = min(2 ** attempt, 30) + random.uniform(0, 1)
+            print(f"  [retry] папок: {len(failed)}, пауза {sleep:.1f}s")
+            _backoff.push(sleep)
+            _backoff.wait()
+            paths = list(failed)
+
+
+def safe_media_upload(path: str, resumable: bool = True) -> MediaFileUpload:
+    """MediaFileUpload с корректным mime: резюмируемый по 10 MB или одним запросом."""
     mime, _ = mimetypes.guess_type(path)
     return MediaFileUpload(
         path,
         mimetype=mime or "application/octet-stream",
-        chunksize=10 * 1024 * 1024,  # 10 MB
-        resumable=True,
+        chunksize=CHUNK_SIZE,
+        resumable=resumable,
     )
 
 
-def upload_file_with_retry(service, path: str, parent_id: str, max_retries: int = 5) -> str:
-    """Загрузка файла с повторами и логированием."""
-    body = {"name": os.path.basename(path), "parents": [parent_id]}
-    media = safe_media_upload(path)
-
-    attempt = 0
-    while attempt <= max_retries:
-        try:
-            print(f"[UPLOAD] {path} -> parent={parent_id}")
-            request = service.files().create(body=body, media_body=media, fields="id")
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    print(f"  progress: {int(status.progress() * 100)}%")
-            file_id = response["id"]
-            print(f"  OK: id={file_id}")
-            return file_id
-
-        except HttpError as e:
-            code = getattr(e.resp, "status", None)
-            content = getattr(e, "content", b"") or b""
-            print(f"  HttpError {code}: {content[:300]!r}")
-            if code in (429, 500, 502, 503, 504):
-                sleep = min(2 ** attempt, 30)
-                print(f"  retry in {sleep}s...")
-                time.sleep(sleep)
-                attempt += 1
-                continue
-            raise
-        except Exception as e:
-            print(f"  ERROR: {type(e).__name__}: {e}")
+def _send_file(
+    service,
+    path: str,
+    parent_id: str,
+    file_id: Optional[str],
+    stats: Optional["UploadStats"],
+) -> str:
+    simple = os.path.getsize(path) <= UPLOAD_SIMPLE_MAX_MB * 1024 * 1024
+    media = safe_media_upload(path, resumable=not simple)
+    if file_id:
+        request = service.files().update(fileId=file_id, media_body=media, fields="id")
+    else:
+        body = {"name": os.path.basename(path), "parents": [parent_id]}
+        request = service.files().create(body=body, media_body=media, fields="id")
+    if simple:
+        return call_with_retry(request.execute, path, stats)["id"]
+    response = None
+    while response is None:
+        _, response = call_with_retry(request.next_chunk, path, stats)
+    return response["id"]
+
+
+def upload_file_with_retry(
+    service,
+    path: str,
+    parent_id: str,
+    stats: Optional["UploadStats"] = None,
+    file_id: Optional[str] = None,
+) -> str:
+    """
+    Загрузка одного файла; с file_id — новая версия существующего файла.
+    Маленькие — одним запросом (повтор = новый запрос), крупные — по кускам;
+    повтор продолжает ту же резюмируемую сессию.
+    """
+    try:
+        return _send_file(service, path, parent_id, file_id, stats)
+    except HttpError as e:
+        if not file_id or getattr(e.resp, "status", None) != 404:
             raise
-
-
-def upload_folder_recursive(service, local_root: str, parent_id: str) -> None:
-    """Рекурсивная загрузка локальной папки."""
+    # файл удалили на Диске после прошлой синхронизации — загружаем заново
+    return _send_file(service, path, parent_id, None, stats)
+
+
+@dataclass
+class UploadStats:
+    """Итог загрузки по всем потокам."""
+
+    files: int = 0
+    bytes: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_file(self, size: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def add_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def add_failed(self, path: str, error: str) -> None:
+        with self._lock:
+            self.failed.append((path, error))
+
+    def summary(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        mb = self.bytes / 1024 / 1024
+        return (
+            f"Загружено файлов: {self.files}, {mb:.1f} MB за {elapsed:.1f}s "
+            f"({mb / elapsed:.2f} MB/s, {self.files / elapsed:.1f} файлов/s), "
+            f"повторов: {self.retries}, ошибок: {len(self.failed)}"
+        )
+
+
+def _thread_service(creds):
+    """Свой клиент Drive на каждый поток пула."""
+    service = getattr(_local, "service", None)
+    if service is None:
+        service = _local.service = build_service(creds)
+    return service
+
+
+def upload_files(
+    creds,
+    tasks: List[Tuple[str, str, Optional[str]]],
+    workers: int = UPLOAD_WORKERS,
+    on_uploaded: Optional[Callable[[str, str], None]] = None,
+) -> UploadStats:
+    """
+    (локальный путь, id папки на Диске, id файла для обновления или None) ->
+    параллельная загрузка пулом потоков. on_uploaded(путь, id файла)
+    вызывается в главном потоке после каждой удачной загрузки.
+    """
+    stats = UploadStats()
+    total = len(tasks)
+
+    def _one(path: str, parent_id: str, file_id: Optional[str]) -> str:
+        service = _thread_service(creds)
+        new_id = upload_file_with_retry(service, path, parent_id, stats, file_id)
+        stats.add_file(os.path.getsize(path))
+        return new_id
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload") as pool:
+        futures = {pool.submit(_one, *task): task[0] for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                file_id = future.result()
+                if on_uploaded:
+                    on_uploaded(path, file_id)
+                print(f"[{done}/{total}] OK {path}")
+            except Exception as e:
+                stats.add_failed(path, f"{type(e).__name__}: {e}")
+                print(f"[{done}/{total}] ERROR {path}: {type(e).__name__}: {e}")
+    return stats
+
+
+def upload_folder_recursive(
+    creds,
+    local_root: str,
+    parent_id: str,
+    workers: int = UPLOAD_WORKERS,
+    refresh: bool = False,
+) -> UploadStats:
+    """
+    Рекурсивная загрузка локальной папки: структура папок создаётся на Диске
+    заранее (в главном потоке), затем файлы грузятся пулом потоков.
+    """
+    folders = DriveFolders(build_service(creds), parent_id)
+    folders.resolve(refresh)
     local_root = os.path.abspath(local_root)
-    folder_cache: Dict[str, str] = {"": parent_id}
-
-    for current_dir, subdirs, files in os.walk(local_root):
-        rel_dir = os.path.relpath(current_dir, start=local_root)
-        if rel_dir == ".":
-            rel_dir = ""
-
-        parent_rel = rel_dir
-        parent_disk_id = folder_cache.get(parent_rel)
-        if parent_disk_id is None:
-            parts = [] if not rel_dir else rel_dir.split(os.sep)
-            path_so_far = ""
-            parent = parent_id
-            for p in parts:
-                path_so_far = os.path.join(path_so_far, p) if path_so_far else p
-                if path_so_far not in folder_cache:
-                    folder_id = find_or_create_folder(service, p, parent)
-                    folder_cache[path_so_far] = folder_id
-                    parent = folder_id
-                else:
-                    parent = folder_cache[path_so_far]
-            parent_disk_id = parent
-
-        for sd in subdirs:
-            sub_rel = os.path.join(rel_dir, sd) if rel_dir else sd
-            if sub_rel not in folder_cache:
-                folder_id = find_or_create_folder(service, sd, parent_disk_id)
-                folder_cache[sub_rel] = folder_id
-
-        for f in files:
-            local_path = os.path.join(current_dir, f)
-            upload_file_with_retry(service, local_path, parent_disk_id)
+    local = local_tree(local_root)
+    # все папки, включая пустые, как и раньше
+    folders.ensure(_rel(d, local_root) for d, _, _ in os.walk(local_root))
+    folders.save()
+
+    tasks: List[Tuple[str, str, Optional[str]]] = [
+        (full, folders.ids[rel.rpartition("/")[0]], None)
+        for rel, (full, _, _) in sorted(local.items())
+    ]
+    print(f"Файлов к загрузке: {len(tasks)}, потоков: {workers}")
+    return upload_files(creds, tasks, workers)
+
+
+# ---------------- Синхронизация по манифесту ----------------
+def file_md5(path: str) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def list_remote_tree(service, parent_id: str) -> Tuple[Dict[str, str], Dict[str, dict]]:
+    """
+    Всё дерево под parent_id (walk_tree: запрос на уровень, а не на папку).
+    Возвращает (папка -> id, файл -> {id, md5, size}); пути относительные, через /.
+    Дубли имён (следы прежних загрузок без синхронизации) — берётся первый.
+    """
+    folders: Dict[str, str] = {"": parent_id}
+    files: Dict[str, dict] = {}
+    fields = "id, name, mimeType, md5Checksum, size"
+    for path, f in walk_tree(service, parent_id, fields):
+        if f["mimeType"] == FOLDER_MIME:
+            folders[path] = f["id"]
+        else:
+            files[path] = {
+                "id": f["id"],
+                "md5": f.get("md5Checksum"),
+                "size": int(f.get("size", 0)),
+            }
+    return folders, files
+
+
+def load_manifest(path: str, parent_id: str) -> Optional[dict]:
+    """Манифест прошлой синхронизации в ту же папку Диска, иначе None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("parent_id") == parent_id else None
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _rel(path: str, root: str) -> str:
+    """Путь относительно root через / ("" для самого root)."""
+    rel = os.path.relpath(path, root)
+    return "" if rel == "." else rel.replace(os.sep, "/")
+
+
+def local_tree(local_root: str) -> Dict[str, Tuple[str, int, float]]:
+    """Относительный путь (через /) -> (полный путь, размер, mtime)."""
+    out = {}
+    for current_dir, _, files in os.walk(local_root):
+        for name in files:
+            full = os.path.join(current_dir, name)
+            st = os.stat(full)
+            out[_rel(full, local_root)] = (full, st.st_size, st.st_mtime)
+    return out
+
+
+@dataclass
+class SyncPlan:
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    new_folders: List[str] = field(default_factory=list)
+    md5: Dict[str, str] = field(default_factory=dict)  # локальные md5 по пути
+    bytes: int = 0
+
+    def print(self) -> None:
+        print(
+            f"Новых файлов: {len(self.new)}, изменённых: {len(self.changed)}, "
+            f"без изменений: {len(self.unchanged)}, новых папок: "
+            f"{len(self.new_folders)}; к передаче {self.bytes / 1024 / 1024:.1f} MB"
+        )
+
+
+def plan_sync(
+    local: Dict[str, Tuple[str, int, float]],
+    remote: Dict[str, dict],
+    folders: Dict[str, str],
+    manifest_files: Dict[str, dict],
+) -> SyncPlan:
+    """
+    Сравнение локальных файлов с удалённым состоянием по md5. Локальный md5
+    берётся из манифеста, если размер и mtime файла не менялись.
+    """
+    plan = SyncPlan()
+    for rel, (full, size, mtime) in sorted(local.items()):
+        cached = manifest_files.get(rel)
+        if cached and cached.get("size") == size and cached.get("mtime") == mtime:
+            md5 = cached["md5"]
+        else:
+            md5 = file_md5(full)
+        plan.md5[rel] = md5
+        theirs = remote.get(rel)
+        if theirs is None:
+            plan.new.append(rel)
+        elif theirs.get("md5") != md5 or theirs.get("size") != size:
+            plan.changed.append(rel)
+        else:
+            plan.unchanged.append(rel)
+            continue
+        plan.bytes += size
+        parent = rel.rpartition("/")[0]
+        while parent and parent not in folders and parent not in plan.new_folders:
+            plan.new_folders.append(parent)
+            parent = parent.rpartition("/")[0]
+    plan.new_folders.sort(key=lambda p: p.count("/"))
+    return plan
+
+
+def sync_folder(
+    creds,
+    local_root: str,
+    parent_id: str,
+    workers: int = UPLOAD_WORKERS,
+    manifest_path: str = UPLOAD_MANIFEST,
+    refresh: bool = False,
+    dry_run: bool = False,
+) -> Optional[UploadStats]:
+    """
+    Загружает только новые и изменённые файлы; изменённые — новой версией
+    того же файла. dry_run — только печатает план (None вместо статистики).
+    """
+    folders = DriveFolders(build_service(creds), parent_id)
+    local_root = os.path.abspath(local_root)
+    manifest = None if refresh else load_manifest(manifest_path, parent_id)
+    if manifest is None:
+        print("Читаем дерево Диска...")
+        folders.ids, remote = list_remote_tree(folders.service, parent_id)
+        cached = (load_manifest(manifest_path, parent_id) or {}).get("files", {})
+    else:
+        print(f"Состояние Диска — из манифеста {manifest_path}")
+        folders.resolve()
+        remote = cached = manifest["files"]
+
+    local = local_tree(local_root)
+    plan = plan_sync(local, remote, folders.ids, cached)
+    plan.print()
+    if dry_run:
+        for label, paths in (("+", plan.new), ("~", plan.changed)):
+            for rel in paths:
+                print(f"  {label} {rel}")
+        for rel in plan.new_folders:
+            print(f"  + {rel}/")
+        return None
+
+    files: Dict[str, dict] = {}
+    for rel, theirs in remote.items():
+        files[rel] = {k: theirs.get(k) for k in ("id", "md5", "size")}
+    for rel in plan.unchanged:
+        files[rel]["mtime"] = local[rel][2]
+    manifest = {"parent_id": parent_id, "files": files}
+
+    folders.ensure(plan.new_folders)
+    folders.save()
+
+    by_path = {}
+    tasks: List[Tuple[str, str, Optional[str]]] = []
+    for rel in plan.new + plan.changed:
+        full = local[rel][0]
+        by_path[full] = rel
+        file_id = remote[rel]["id"] if rel in remote else None
+        tasks.append((full, folders.ids[rel.rpartition("/")[0]], file_id))
+
+    def _uploaded(path: str, file_id: str) -> None:
+        rel = by_path[path]
+        _, size, mtime = local[rel]
+        files[rel] = {"id": file_id, "md5": plan.md5[rel], "size": size, "mtime": mtime}
+
+    print(f"Файлов к загрузке: {len(tasks)}, потоков: {workers}")
+    try:
+        return upload_files(creds, tasks, workers, on_uploaded=_uploaded)
+    finally:
+        save_manifest(manifest_path, manifest)
 
 
 # ---------------- main ----------------
-if __name__ == "__main__":
+def main(
+    workers: Optional[int] = None,
+    sync: Optional[bool] = None,
+    dry_run: bool = False,
+    refresh: bool = False,
+) -> None:
     if not LOCAL_FOLDER or not os.path.isdir(LOCAL_FOLDER):
         raise NotADirectoryError(f"Папка не найдена: {LOCAL_FOLDER}")
 
-    if AUTH_MODE == "oauth":
-        service = get_service_oauth()
-    elif AUTH_MODE == "sa":
-        service = get_service_sa()
+    creds = get_credentials()
+    workers = max(1, workers or UPLOAD_WORKERS)
+    if UPLOAD_SYNC if sync is None else sync:
+        stats = sync_folder(
+            creds, LOCAL_FOLDER, PARENT_ID, workers, refresh=refresh, dry_run=dry_run
+        )
+        if stats is None:
+            print("Dry run: ничего не загружено.")
+            return
     else:
-        raise ValueError("AUTH_MODE должен быть 'oauth' или 'sa'")
-
-    upload_folder_recursive(service, LOCAL_FOLDER, PARENT_ID)
+        stats = upload_folder_recursive(
+            creds, LOCAL_FOLDER, PARENT_ID, workers, refresh=refresh
+        )
+    print(stats.summary())
+    for path, error in stats.failed:
+        print(f"  не загружен: {path} ({error})")
+    if stats.failed:
+        raise RuntimeError(f"Не загружено файлов: {len(stats.failed)}")
     print("Готово.")
+
+
+if __name__ == "__main__":
+    main()
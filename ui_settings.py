@@ -1,7 +1,9 @@
 # ui_settings.py
 from __future__ import annotations
 
+import json
 import re
+import urllib.request
 from pathlib import Path
 from html import escape
 from typing import List, Optional, Tuple
@@ -11,6 +13,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 
 app = FastAPI()
 ENV_PATH = Path(".env")
+DEFAULT_METRICS_PORT = "8765"
 
 # ---------- Парсер .env с сохранением комментариев/порядка ----------
 
@@ -283,3 +286,82 @@ async def post_editor(request: Request):
     # 3) записываем обратно
     ENV_PATH.write_text(reconstruct_env(lines), encoding="utf-8")
     return RedirectResponse(url="/", status_code=303)
+
+# ---------- Живые метрики прогона (/live) ----------
+
+def metrics_url() -> str:
+    data, _ = env_as_dict(parse_env_with_comments(ENV_PATH))
+    port = (data.get("METRICS_PORT") or DEFAULT_METRICS_PORT).strip("'\" ")
+    return f"http://127.0.0.1:{port}/metrics.json"
+
+def fmt_duration(seconds) -> str:
+    if seconds is None:
+        return "—"
+    h, rest = divmod(int(seconds), 3600)
+    return f"{h}:{rest // 60:02d}:{rest % 60:02d}"
+
+def render_live(snap: Optional[dict], url: str) -> str:
+    if snap is None:
+        body = f"<p>Прогон не запущен или метрики выключены ({escape(url)}).</p>"
+    else:
+        rss = snap.get("browser_rss_bytes")
+        summary = [
+            ("Круг", snap.get("attempt") or "—"),
+            ("Отелей готово", snap["hotels"].get("ok", 0)),
+            ("Отелей с ошибкой", snap["hotels"].get("failed", 0)),
+            ("Отелей в минуту", snap["hotels_per_min"]),
+            ("Очередь", snap["queue_length"]),
+            ("Воркеры (заняты / всего)", f"{snap['busy_workers']} / {snap['workers']}"),
+            ("Осталось до конца круга", fmt_duration(snap["eta_s"])),
+            ("Повторы переходов", snap["goto_retries"]),
+            ("Отчётов собрано", snap["reports"].get("ok", 0)),
+            ("Память браузера", f"{rss / 2**20:.0f} MB" if rss is not None else "— (нет psutil)"),
+            ("JS-куча страниц, MB", ", ".join(f"{w}: {v / 2**20:.0f}" for w, v in sorted(snap.get("page_heap_bytes", {}).items())) or "—"),
+            ("Пересоздано контекстов", sum(snap.get("recycles", {}).values())),
+            ("Время работы", fmt_duration(snap["uptime_s"])),
+        ]
+        rows = "".join(f"<tr><th>{escape(k)}</th><td>{escape(str(v))}</td></tr>" for k, v in summary)
+        steps = "".join(
+            f"<tr><td>{escape(name)}</td><td>{st['count']}</td><td>{st['avg_s']}</td>"
+            f"<td>{snap['step_failures'].get(name, 0)}</td></tr>"
+            for name, st in sorted(snap["steps"].items())
+        )
+        body = f"""
+        <table style="width:auto">{rows}</table>
+        <h2>Шаги</h2>
+        <table style="width:auto">
+          <thead><tr><th>Шаг</th><th>n</th><th>Среднее, s</th><th>Ошибок</th></tr></thead>
+          <tbody>{steps}</tbody>
+        </table>
+        """
+    return f"""
+    <!doctype html>
+    <html lang="ru">
+    <head>
+      <meta charset="utf-8">
+      <meta http-equiv="refresh" content="5">
+      <title>Прогон</title>
+      <style>
+        body {{ font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 24px; }}
+        table {{ border-collapse: collapse; }}
+        th, td {{ border: 1px solid #ddd; padding: 6px 10px; text-align: left; }}
+        th {{ background: #f7f7f7; }}
+      </style>
+    </head>
+    <body>
+      <h1>Прогон</h1>
+      {body}
+      <p><a href="/">.env editor</a></p>
+    </body>
+    </html>
+    """
+
+@app.get("/live", response_class=HTMLResponse)
+def get_live():
+    url = metrics_url()
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            snap = json.load(resp)
+    except (OSError, ValueError):
+        snap = None
+    return render_live(snap, url)
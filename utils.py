@@ -2,15 +2,12 @@ import logging
 import os
 import ctypes
 
-import json
 import shutil
 from pathlib import Path
 import platform
 import re
 from typing import List
 
-from tenacity import RetryError
-
 
 # ----------------------- Desktop resolver -----------------------
 def get_desktop_dir() -> Path:
@@ -75,10 +72,11 @@ def normalize_windows_path(path_str: str) -> Path:
 
 
 def get_hotel_folder(hotel_id: str | int, hotel_title: str) -> Path:
-    """Возвращает Path к папке отеля и гарантирует её наличие."""
-    from config_app import SCREENSHOTS_DIR
+    """Возвращает Path к папке отеля и гарантирует её наличие.
+    Папка — по hotel_id (заголовок хранится в results_store, не в пути)."""
+    from results_store import results
 
-    folder = Path(SCREENSHOTS_DIR) / f"{hotel_id}_{hotel_title}"
+    folder = results.hotel_folder(hotel_id)
     folder.mkdir(parents=True, exist_ok=True)
     return folder
 
@@ -89,58 +87,43 @@ def get_screenshot_path(hotel_id: str | int, hotel_title: str, filename: str) ->
 
 
 def load_links(hotel_id: str | int, hotel_title: str) -> dict:
-    """Читает links.json из папки отеля."""
-    meta = get_hotel_folder(hotel_id, hotel_title) / "links.json"
-    if meta.exists():
-        try:
-            return json.loads(meta.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+    """Читает метаданные отеля (бывший links.json) — через буфер metadata_store."""
+    from metadata_store import metadata
+
+    return metadata.load(hotel_id, hotel_title)
 
 
 def save_to_jsonfile(
     hotel_id: str | int, hotel_title: str, key: str, value: str
 ) -> None:
-    """Сохраняет ссылку в links.json в папке отеля.
+    """Сохраняет поле метаданных отеля (results_store, бывший links.json).
     Если ключ уже есть:
       - если значение одно, оно превращается в список
       - если список, добавляется новый элемент
       - дубликаты не добавляются
+    Внутри metadata.buffered(hotel_id) запись откладывается до выхода из блока.
     """
-    folder = get_hotel_folder(hotel_id, hotel_title)
-    meta = folder / "links.json"
-    data = {}
+    from metadata_store import metadata
 
-    if meta.exists():
-        try:
-            data = json.loads(meta.read_text(encoding="utf-8"))
-        except Exception:
-            data = {}
+    metadata.save(hotel_id, hotel_title, key, value)
 
-    if key not in data:
-        data[key] = value
-    else:
-        if isinstance(data[key], list):
-            # добавляем только если ещё нет такого значения
-            if value not in data[key]:
-                data[key].append(value)
-        else:
-            # если одно значение и оно не совпадает — превращаем в список
-            if data[key] != value:
-                data[key] = [data[key], value]
-            # если совпадает — ничего не делаем
 
-    meta.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+async def safe_step(step_fn, *args, **kwargs):
+    from tenacity import RetryError
 
+    from parce_screenshots_moduls.forensics import capture_failure
+    from parce_screenshots_moduls.loop_instrumentation import instrument_step
+    from perf_trace import tracer
 
-async def safe_step(step_fn, *args, **kwargs):
     try:
-        return await step_fn(*args, **kwargs)
+        with tracer.span(step_fn.__name__, cat="step"):
+            return await instrument_step(step_fn.__name__, step_fn(*args, **kwargs))
     except RetryError as e:
         logging.error(f"{step_fn.__name__} упал по RetryError: {e}")
+        await capture_failure(step_fn.__name__, e)
     except Exception as e:
         logging.exception(f"{step_fn.__name__} упал с ошибкой: {e}")
+        await capture_failure(step_fn.__name__, e)
 
 
 def sleep_system():
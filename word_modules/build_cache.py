@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from artifact_store import Shots, read_shot
+from config_app import (
+    BUILD_CACHE,
+    BUILD_CACHE_FILE,
+    CURRENT_MONTH,
+    CURRENT_YEAR,
+    DOCX_ENGINE,
+    FONT_NAME,
+    FONT_SIZE_CAPTION,
+    FONT_SIZE_HOTEL_LINK,
+    FONT_SIZE_TITLE,
+    IMAGE_WIDTH_INCHES,
+    JPEG_QUALITY,
+    PNG_PALETTE_COLORS,
+    SHOT_FORMAT_DEFAULT,
+    SHOT_FORMATS,
+)
+from word_modules.create_word_file import TEMPLATE_VERSION
+
+# Менять при изменении самого ключа (состава хэшируемых полей)
+CACHE_VERSION = 2
+
+
+def _config_fingerprint() -> dict:
+    """Настройки, от которых зависит содержимое отчёта (кроме ширины — она в job)."""
+    return {
+        "cache": CACHE_VERSION,
+        "template": TEMPLATE_VERSION,
+        "engine": DOCX_ENGINE,
+        "month": CURRENT_MONTH,
+        "year": CURRENT_YEAR,
+        "font": [FONT_NAME, FONT_SIZE_TITLE, FONT_SIZE_HOTEL_LINK, FONT_SIZE_CAPTION],
+        "image_width_in": IMAGE_WIDTH_INCHES,
+        "formats": [SHOT_FORMAT_DEFAULT, sorted(SHOT_FORMATS.items())],
+        "jpeg_quality": JPEG_QUALITY,
+        "palette": PNG_PALETTE_COLORS,
+    }
+
+
+def build_key(shots: Shots, meta: dict) -> str:
+    """
+    sha256 по входным картинкам (до ресайза), метаданным отеля
+    (ссылки, подписи из метаданных, пути отчётов) и настройкам сборки.
+    """
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            {"config": _config_fingerprint(), "meta": meta},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+    )
+    for name, source in shots:
+        data = read_shot(source)
+        h.update(f"\0{name}\0{len(data)}\0".encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class BuildCache:
+    """
+    Ключи последней удачной сборки по отелям (JSON-файл BUILD_CACHE_FILE):
+    {hotel_id: {"key": ..., "outputs": [docx, html]}}.
+    Отель пропускается, если ключ совпал и файлы отчётов на месте.
+    """
+
+    def __init__(self, path: Path = BUILD_CACHE_FILE, enabled: bool = BUILD_CACHE):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        if enabled and self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logging.warning("Кэш сборки %s не прочитан: %s", self.path, e)
+
+    def previous_key(self, hotel_id: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return (self._entries.get(hotel_id) or {}).get("key")
+
+    def record(self, results: Iterable) -> None:
+        """Запомнить ключи удачных сборок (BuildResult с cache_key)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for r in results:
+                if r.ok and r.cache_key:
+                    self._entries[r.hotel_id] = {
+                        "key": r.cache_key,
+                        "outputs": r.outputs,
+                    }
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            payload = json.dumps(self._entries, ensure_ascii=False, indent=2)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning("Кэш сборки %s не сохранён: %s", self.path, e)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from artifact_store import folder_shots
+from results_store import results
+from perf_trace import Tracer, current_hotel
+from word_modules.build_cache import build_key
+from word_modules.create_html_version import write_inline_html_file
+from word_modules.create_word_file import create_word_file
+from word_modules.resize_all_images import _resize_files, _resize_shots
+
+
+@dataclass
+class HotelJob:
+    """Всё, что нужно для сборки отчётов одного отеля (передаётся в процесс-воркер)."""
+
+    hotel_id: str
+    title_hotel: str
+    folder_path: Path
+    url_hotel: str
+    mapping_paragraph: Dict[str, str]
+    reports_dir: Path
+    docx_path: Path
+    html_path: Path
+    width_px: Optional[int] = None
+    # ARTIFACT_MODE=memory: сырые шоты (имя, байты); None — файлы ниже
+    shots: Optional[List[Tuple[str, bytes]]] = None
+    # ARTIFACT_MODE=disk: шоты отеля из results_store (имя, путь);
+    # None — все картинки в folder_path
+    files: Optional[List[Tuple[str, Path]]] = None
+    # ключ прошлой удачной сборки (BuildCache); совпал — отчёты не пересобираются
+    cached_key: Optional[str] = None
+
+
+@dataclass
+class BuildResult:
+    hotel_id: str
+    title_hotel: str
+    ok: bool
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    cache_key: Optional[str] = None
+    skipped: bool = False  # ключ не изменился, отчёты остались прежними
+    # спаны этапов сборки (perf_trace); собираются в процессе-воркере,
+    # в общий трейсер их добавляет главный процесс
+    spans: List[dict] = field(default_factory=list)
+
+
+def _cache_meta(job: HotelJob) -> dict:
+    """Метаданные отеля, попадающие в ключ кэша."""
+    return {
+        "title": job.title_hotel,
+        "url": job.url_hotel,
+        "mapping": job.mapping_paragraph,
+        "docx": job.docx_path,
+        "html": job.html_path,
+        "width": job.width_px,
+    }
+
+
+def build_hotel_report(job: HotelJob) -> BuildResult:
+    """
+    Пост-обработка картинок + DOCX + HTML для одного отеля.
+    Не бросает исключений: ошибка возвращается в BuildResult (для сводки).
+    Если ключ входных данных совпал с job.cached_key и оба файла отчёта
+    на месте, ни картинки, ни DOCX/HTML не обрабатываются (result.skipped).
+    """
+    t = perf_counter()
+    result = BuildResult(job.hotel_id, job.title_hotel, ok=False)
+    trace = Tracer()
+    token = current_hotel.set(job.hotel_id)
+    try:
+        with trace.span("report", cat="report"):
+            _build(job, result, trace)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=3)}"
+    finally:
+        current_hotel.reset(token)
+    result.spans = trace.snapshot()
+    result.elapsed = perf_counter() - t
+    return result
+
+
+def _build(job: HotelJob, result: BuildResult, trace: Tracer) -> None:
+    # 0) Ключ — по входным картинкам, до ресайза: совпал — не кодируем их заново
+    files = None
+    if job.shots is None:
+        files = job.files if job.files is not None else folder_shots(job.folder_path)
+    meta = _cache_meta(job)
+    with trace.span("cache_key", cat="build"):
+        result.cache_key = build_key(job.shots if files is None else files, meta)
+    outputs = [str(job.docx_path), str(job.html_path)]
+    if (
+        result.cache_key == job.cached_key
+        and job.docx_path.exists()
+        and job.html_path.exists()
+    ):
+        result.outputs, result.ok, result.skipped = outputs, True, True
+        return
+
+    # 1) Привести картинки к формату и, если задано, к фиксированной ширине
+    with trace.span("images", cat="build"):
+        if files is None:
+            shots = _resize_shots(job.shots, job.width_px)
+        else:
+            shots = _resize_files(files, job.width_px)
+            if shots != files:
+                if job.files is not None:
+                    # формат мог сменить расширение — обновляем пути в базе
+                    results.set_artifacts(job.hotel_id, shots)
+                # файлы перекодированы на месте: следующий запуск увидит уже их
+                with trace.span("cache_key", cat="build"):
+                    result.cache_key = build_key(shots, meta)
+
+    with trace.span("docx", cat="build"):
+        create_word_file(
+            job.title_hotel,
+            job.folder_path,
+            job.url_hotel,
+            job.mapping_paragraph,
+            job.reports_dir,
+            shots,
+            docx_path=job.docx_path,
+        )
+    with trace.span("html", cat="build"):
+        html_path = write_inline_html_file(
+            job.html_path,
+            job.title_hotel,
+            job.url_hotel,
+            job.mapping_paragraph,
+            job.folder_path,
+            shots,
+        )
+    print(f"✔ Inline HTML (fallback) created: {html_path}")
+    result.outputs = outputs
+    result.ok = True
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import io
 import os
 import re
 import base64
 import mimetypes
 from html import escape
 from pathlib import Path
-from typing import Dict
+from typing import Dict, TextIO
 
-from config_app import IMAGE_WIDTH_INCHES, CURRENT_MONTH, CURRENT_YEAR
+from artifact_store import ShotSource, Shots, folder_shots
+from config_app import (
+    IMAGE_WIDTH_INCHES,
+    CURRENT_MONTH,
+    CURRENT_YEAR,
+)
 
 
 def _linkify(text: str) -> str:
@@ -19,20 +25,49 @@ def _linkify(text: str) -> str:
     )
 
 
-def _img_to_data_uri(path: Path) -> str:
-    mime, _ = mimetypes.guess_type(path.name)
-    if not mime:
-        mime = "application/octet-stream"
-    data = base64.b64encode(path.read_bytes()).decode("ascii")
-    return f"data:{mime};base64,{data}"
+# Кратно 3 байтам: base64 кусков склеивается без паддинга посередине
+_B64_CHUNK = 3 * 64 * 1024
 
 
-def _build_inline_html(
+def _mime(file_name: str) -> str:
+    mime, _ = mimetypes.guess_type(file_name)
+    return mime or "application/octet-stream"
+
+
+def _write_data_uri(out: TextIO, file_name: str, source: ShotSource) -> None:
+    """
+    Пишет data:-URI картинки в поток кусками по _B64_CHUNK байт исходника —
+    ни сырые байты файла, ни base64 целиком в памяти не держатся.
+    """
+    out.write(f"data:{_mime(file_name)};base64,")
+    if isinstance(source, bytes):
+        view = memoryview(source)
+        for i in range(0, len(view), _B64_CHUNK):
+            out.write(base64.b64encode(view[i : i + _B64_CHUNK]).decode("ascii"))
+        return
+    with open(source, "rb") as f:
+        while chunk := f.read(_B64_CHUNK):
+            out.write(base64.b64encode(chunk).decode("ascii"))
+
+
+def _img_to_data_uri(file_name: str, source: ShotSource) -> str:
+    buf = io.StringIO()
+    _write_data_uri(buf, file_name, source)
+    return buf.getvalue()
+
+
+def _write_inline_html(
+    out: TextIO,
     title_hotel: str,
     url_hotel: str,
     mapping_paragraph: Dict[str, str],
     folder_path: Path,
-) -> str:
+    shots: Shots | None = None,
+) -> None:
+    """
+    Пишет HTML-версию отчёта в поток по частям: шапка, подписи и картинки
+    (base64 кусками). Память не зависит от размера картинок.
+    """
     max_width_px = int(IMAGE_WIDTH_INCHES * 96)
     css = f"""
     body{{font-family:Arial,Helvetica,sans-serif; color:#111;font-size: 13pt;}}
@@ -41,48 +76,47 @@ def _build_inline_html(
     a{{color:#0645AD;}}
     """
 
-    parts = []
-    parts.append(
+    out.write(
         f"<!doctype html><html><head><meta charset='utf-8'>"
         f"<meta name='viewport' content='width=device-width,initial-scale=1'>"
         f"<style>{css}</style></head><body><div class='wrap'>"
     )
-    parts.append(
+    out.write(
         f"<h2 style='font-size:14pt; font-family:Arial,Helvetica,sans-serif;'>Hi, Name. <br>Monthly Statistics Report {escape(CURRENT_MONTH)} {escape(CURRENT_YEAR)}  <a href='{escape(url_hotel)}' target='_blank'>{escape(title_hotel.upper())}</a></h2>"
     )
 
-    for file_name in sorted(os.listdir(folder_path)):
-        if not file_name.lower().endswith((".png", ".jpg", ".jpeg")):
-            continue
+    if shots is None:
+        shots = folder_shots(folder_path)
 
+    for file_name, source in shots:
         # --- подпись как UL/LI с отступами сверху/снизу ---
-        caption = mapping_paragraph.get(file_name)
+        caption = mapping_paragraph.get(Path(file_name).stem)
         if caption is not None:
             if caption:
-                parts.append(
+                out.write(
                     f"<ul style='margin:20px 0; padding-left:26px; font-size:12pt; line-height:1.5; font-family:Arial,Helvetica,sans-serif;'>"
                 )
-                parts.append(
+                out.write(
                     f"<li style='margin:8px 0; font-size:12pt; line-height:1.5; font-family:Arial,Helvetica,sans-serif;'>{_linkify(caption)}</li>"
                 )
-                parts.append("</ul>")
+                out.write("</ul>")
 
         # --- картинка ---
-        img_path = folder_path / file_name
         try:
-            data_uri = _img_to_data_uri(img_path)
-            parts.append(
-                f"<br><div class='imgbox'><img src='{data_uri}' alt=''></div><br>"
-            )
+            if not isinstance(source, bytes) and not os.path.isfile(source):
+                raise FileNotFoundError(f"Файл {source} не найден.")
+            out.write("<br><div class='imgbox'><img src='")
+            _write_data_uri(out, file_name, source)
+            out.write("' alt=''></div><br>")
         except Exception as e:
-            parts.append(
+            out.write(
                 f"<div style='color:#b00; font-size:12pt'>[Image error: {escape(str(e))}]</div>"
             )
 
     # # --- подпись: таблица с логотипом и текстом ---
     # try:
     #     logo_path = Path("th_logo") / "logo_1.jpg"
-    #     logo_data_uri = _img_to_data_uri(logo_path) if logo_path.exists() else ""
+    #     logo_data_uri = _img_to_data_uri(logo_path.name, logo_path) if logo_path.exists() else ""
     # except Exception:
     #     logo_data_uri = ""
     #
@@ -94,7 +128,7 @@ def _build_inline_html(
     #     else ""
     # )
     #
-    # parts.append(f"""
+    # out.write(f"""
     # <br>
     # <table border="0" cellspacing="0" cellpadding="0" width="600" style="border-collapse:collapse;">
     #   <tr>
@@ -131,5 +165,40 @@ def _build_inline_html(
     #
     # # --- конец подписи ---
 
-    parts.append("</div></body></html>")
-    return "".join(parts)
+    out.write("</div></body></html>")
+
+
+def _build_inline_html(
+    title_hotel: str,
+    url_hotel: str,
+    mapping_paragraph: Dict[str, str],
+    folder_path: Path,
+    shots: Shots | None = None,
+) -> str:
+    """HTML-версия отчёта одной строкой (для совместимости; держит всё в памяти)."""
+    buf = io.StringIO()
+    _write_inline_html(
+        buf, title_hotel, url_hotel, mapping_paragraph, folder_path, shots
+    )
+    return buf.getvalue()
+
+
+def write_inline_html_file(
+    html_path: Path,
+    title_hotel: str,
+    url_hotel: str,
+    mapping_paragraph: Dict[str, str],
+    folder_path: Path,
+    shots: Shots | None = None,
+) -> Path:
+    """
+    Потоково пишет HTML прямо в файл (через .tmp + os.replace, чтобы
+    при падении не оставался обрезанный отчёт).
+    """
+    tmp_path = html_path.with_name(html_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+        _write_inline_html(
+            out, title_hotel, url_hotel, mapping_paragraph, folder_path, shots
+        )
+    os.replace(tmp_path, html_path)
+    return html_path
@@ -1,41 +1,43 @@
 from __future__ import annotations
 
-import os
+import copy
+import io
+from functools import lru_cache
+from pathlib import Path
+
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 from docx.shared import Inches, Pt
 
+from artifact_store import Shots, folder_shots
+from word_modules.ooxml_writer import write_docx
 from word_modules.docs_helpers import (
     add_header_image,
     ensure_normal_style_arial,
     set_run_arial,
     add_hyperlink,
     add_text_with_links,
+    report_safe_name,
 )
 
-try:
-    import win32com.client as win32  # type: ignore
-
-    _HAS_WORD = True
-except Exception:
-    _HAS_WORD = False
-
 from config_app import (
     CURRENT_MONTH,
     CURRENT_YEAR,
+    DOCX_ENGINE,
     FONT_SIZE_TITLE,
     FONT_SIZE_HOTEL_LINK,
     FONT_SIZE_CAPTION,
     IMAGE_WIDTH_INCHES,
-    PAGE_BREAK_FILES,
+    PAGE_BREAK_SHOTS,
 )
 
+# Менять при любом изменении «каркаса» отчёта (шапка, стили, заголовок)
+TEMPLATE_VERSION = 1
 
-def create_word_file(
-    title_hotel, folder_path, url_hotel, mapping_paragraph, reports_dir
-):
-    # 3) DOCX
+
+def _build_scaffold() -> Document:
+    """Общий для всех отелей каркас: логотип в шапке, стили, начало заголовка."""
     doc = Document()
     add_header_image(doc, "th_logo/logo_1.jpg", width_inches=1.5, bottom_margin_cm=0.2)
     ensure_normal_style_arial(doc)
@@ -46,6 +48,60 @@ def create_word_file(
         f"Monthly Statistics Report {CURRENT_MONTH} {CURRENT_YEAR}  "
     )
     set_run_arial(run_1, size_pt=FONT_SIZE_TITLE)
+    return doc
+
+
+@lru_cache(maxsize=1)
+def _template() -> Document:
+    """Каркас собирается один раз на процесс (в т.ч. на каждый воркер пула)."""
+    return _build_scaffold()
+
+
+def _new_report_document(fresh: bool = False) -> Document:
+    """
+    Документ отчёта из готового каркаса. Копируются только пакет и часть
+    document.xml (с её связями); стили, нумерация, header с логотипом и прочие
+    части, которые отчёт не меняет, остаются общими с шаблоном.
+    fresh=True — собрать каркас с нуля (как раньше; для бенчмарка).
+    """
+    if fresh:
+        return _build_scaffold()
+    package = _template().part.package
+    main = package.main_document_part
+    shared = {id(part): part for part in package.iter_parts() if part is not main}
+    return copy.deepcopy(package, shared).main_document_part.document
+
+
+def create_word_file(
+    title_hotel,
+    folder_path,
+    url_hotel,
+    mapping_paragraph,
+    reports_dir,
+    shots: Shots | None = None,
+    docx_path: Path | None = None,
+    engine: str | None = None,
+) -> Path:
+    """
+    shots — список (имя файла, байты | путь); по умолчанию берутся из folder_path.
+    docx_path — куда сохранить; по умолчанию reports_dir / <safe_name>.docx.
+    engine — движок DOCX (по умолчанию DOCX_ENGINE): python-docx или ooxml.
+    """
+    if shots is None:
+        shots = folder_shots(folder_path)
+    if docx_path is None:
+        docx_path = reports_dir / f"{report_safe_name(title_hotel)}.docx"
+
+    if (engine or DOCX_ENGINE) == "ooxml":
+        write_docx(
+            docx_path, _template, title_hotel, url_hotel, mapping_paragraph, shots
+        )
+        print(f"✔ Report created: {docx_path}")
+        return docx_path
+
+    # 3) DOCX — из общего каркаса, дописываем только переменные части
+    doc = _new_report_document()
+    title_1 = doc.paragraphs[0]
 
     add_hyperlink(
         title_1,
@@ -55,13 +111,12 @@ def create_word_file(
         bold=True,
     )
 
-    for file_name in sorted(os.listdir(folder_path)):
-        if not file_name.lower().endswith((".png", ".jpg", ".jpeg")):
-            continue
-        if file_name in PAGE_BREAK_FILES:
+    for file_name, source in shots:
+        shot = Path(file_name).stem
+        if shot in PAGE_BREAK_SHOTS:
             doc.add_page_break()
 
-        caption = mapping_paragraph.get(file_name)
+        caption = mapping_paragraph.get(shot)
         if caption is not None:
             p = doc.add_paragraph(style="List Bullet")
             p.alignment = WD_ALIGN_PARAGRAPH.LEFT
@@ -74,16 +129,16 @@ def create_word_file(
             p.paragraph_format.space_before = Pt(6)  # пробел сверху
             p.paragraph_format.space_after = Pt(6)  # пробел снизу
 
-        image_path = folder_path / file_name
         try:
-            # Вставка с фиксированной шириной страницы (как и было)
-            doc.add_picture(str(image_path), width=Inches(IMAGE_WIDTH_INCHES))
+            # Вставка с фиксированной шириной страницы (как и было);
+            # байты из памяти идут в python-docx как поток, без файла
+            image = io.BytesIO(source) if isinstance(source, bytes) else str(source)
+            doc.add_picture(image, width=Inches(IMAGE_WIDTH_INCHES))
         except Exception as e:
             err_p = doc.add_paragraph(f"[Image error: {e}]")
             for r in err_p.runs:
                 set_run_arial(r, size_pt=FONT_SIZE_CAPTION)
 
-    safe_name = title_hotel.replace(" ", "_").replace("*", "")
-    docx_path = reports_dir / f"{safe_name}.docx"
     doc.save(docx_path)
     print(f"✔ Report created: {docx_path}")
+    return docx_path
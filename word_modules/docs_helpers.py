@@ -119,16 +119,21 @@ def build_mapping(
     base = base_url_pro_without_ssa + "hotel/" + str(hotel_id)
     rating_url = rating_url or f"{base}/new_stat/rating-hotels"
     return {
-        "01_top_element.png": "",
-        "02_populars_element.png": "Popularity of the hotel\n",
-        "03_reviews.png": f"Rating and recommendations \n",
-        "04_attendance.png": f"Hotel profile attendance by month: {base}/new_stat/attendance\n",
-        "06_service_prices.png": f"Log of booking requests: {base}/stat/profile?group=week&vw=grouped\n",
-        "07_rating_in_hurghada.png": f"Ranking of {city} {star} for the last 2 years: {rating_url}\n",
-        "08_activity.png": f"Last month's activities: {base}/activity/index\n",
+        "01_top_element": "",
+        "02_populars_element": "Popularity of the hotel\n",
+        "03_reviews": f"Rating and recommendations \n",
+        "04_attendance": f"Hotel profile attendance by month: {base}/new_stat/attendance\n",
+        "06_service_prices": f"Log of booking requests: {base}/stat/profile?group=week&vw=grouped\n",
+        "07_rating_in_hurghada": f"Ranking of {city} {star} for the last 2 years: {rating_url}\n",
+        "08_activity": f"Last month's activities: {base}/activity/index\n",
     }
 
 
+def report_safe_name(title_hotel: str) -> str:
+    """Имя файла отчёта из названия отеля (без пробелов и звёздочек)."""
+    return title_hotel.replace(" ", "_").replace("*", "")
+
+
 def build_reports_dir(curr_year: str, curr_month: str, city: str, chain:str) -> Path:
     raw_path = os.getenv("PATH_FOR_REPORTS")
     base_dir = normalize_windows_path(raw_path) if raw_path else get_desktop_dir()
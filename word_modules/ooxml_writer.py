@@ -0,0 +1,270 @@
+"""
+Прямая запись DOCX (DOCX_ENGINE=ooxml): document.xml, связи и картинки пишутся
+сразу в zip, без дерева python-docx и без перекодирования картинок.
+
+Всё общее (шапка с логотипом, стили, нумерация, тема, начало заголовка) берётся
+из того же каркаса, что и у python-docx (create_word_file._template): он один раз
+на процесс сохраняется в память и разбирается на части. Переменная часть отчёта
+(ссылка на отель, подписи, картинки, разрывы страниц) повторяет XML, который
+генерирует python-docx, поэтому документы эквивалентны.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zipfile
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List
+from xml.sax.saxutils import escape, quoteattr
+
+from docx.image.image import Image as DocxImage
+from docx.shared import Inches
+
+from artifact_store import Shots, read_shot
+from config_app import (
+    FONT_NAME,
+    FONT_SIZE_CAPTION,
+    FONT_SIZE_HOTEL_LINK,
+    IMAGE_WIDTH_INCHES,
+    PAGE_BREAK_SHOTS,
+    URL_RE,
+)
+
+_DOCUMENT = "word/document.xml"
+_DOCUMENT_RELS = "word/_rels/document.xml.rels"
+_CONTENT_TYPES = "[Content_Types].xml"
+
+_RT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_RT_HYPERLINK = f"{_RT}/hyperlink"
+_RT_IMAGE = f"{_RT}/image"
+_PKG_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+@dataclass(frozen=True)
+class _Skeleton:
+    """Каркас, разобранный на части для потоковой записи."""
+
+    parts: Dict[str, bytes]  # неизменные части пакета (шапка, стили, логотип, ...)
+    body_head: str  # document.xml до конца первого абзаца (заголовок), без </w:p>
+    body_tail: str  # sectPr и закрывающие теги
+    rels: List[str]  # <Relationship .../> каркаса
+    next_rid: int
+    next_media: int
+    content_types: str
+    extensions: frozenset
+
+
+@lru_cache(maxsize=1)
+def _skeleton(template: Callable) -> _Skeleton:
+    """template — фабрика каркаса (create_word_file._template); кэш — по ней."""
+    buf = BytesIO()
+    template().save(buf)
+    with zipfile.ZipFile(buf) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+
+    document = parts.pop(_DOCUMENT).decode("utf-8")
+    end_title = document.index("</w:p>")
+    rels_xml = parts.pop(_DOCUMENT_RELS).decode("utf-8")
+    content_types = parts.pop(_CONTENT_TYPES).decode("utf-8")
+
+    rids = [int(x) for x in re.findall(r'Id="rId(\d+)"', rels_xml)]
+    media = [n for n in parts if n.startswith("word/media/")]
+    return _Skeleton(
+        parts=parts,
+        body_head=document[:end_title],
+        body_tail=document[end_title + len("</w:p>") :],
+        rels=re.findall(r"<Relationship [^>]*/>", rels_xml),
+        next_rid=max(rids, default=0) + 1,
+        next_media=len(media) + 1,
+        content_types=content_types,
+        extensions=frozenset(
+            re.findall(r'<Default Extension="([^"]+)"', content_types)
+        ),
+    )
+
+
+def _rpr(size_pt: int, *, link: bool = False, bold: bool = False) -> str:
+    fonts = (
+        f'<w:rFonts w:ascii="{FONT_NAME}" w:hAnsi="{FONT_NAME}" '
+        f'w:eastAsia="{FONT_NAME}"/>'
+    )
+    if not link:
+        return f'<w:rPr>{fonts}<w:sz w:val="{size_pt * 2}"/></w:rPr>'
+    b = "<w:b/>" if bold else '<w:b w:val="0"/>'
+    return (
+        f'<w:rPr>{fonts}{b}<w:color w:val="0000FF"/>'
+        f'<w:sz w:val="{size_pt * 2}"/><w:u w:val="single"/></w:rPr>'
+    )
+
+
+def _text(text: str) -> str:
+    """Содержимое run: \\n — <w:br/>, \\t — <w:tab/> (как в python-docx)."""
+    out = []
+    for i, line in enumerate(text.split("\n")):
+        if i:
+            out.append("<w:br/>")
+        for j, chunk in enumerate(line.split("\t")):
+            if j:
+                out.append("<w:tab/>")
+            if not chunk:
+                continue
+            space = ' xml:space="preserve"' if chunk != chunk.strip() else ""
+            out.append(f"<w:t{space}>{escape(chunk)}</w:t>")
+    return "".join(out)
+
+
+class _Rels:
+    """Связи document.xml, добавляемые отчётом (ссылки и картинки)."""
+
+    def __init__(self, skeleton: _Skeleton) -> None:
+        self._next = skeleton.next_rid
+        self.items: List[str] = []
+
+    def add(self, rel_type: str, target: str, external: bool = False) -> str:
+        r_id = f"rId{self._next}"
+        self._next += 1
+        mode = ' TargetMode="External"' if external else ""
+        self.items.append(
+            f'<Relationship Id="{r_id}" Type="{rel_type}" '
+            f"Target={quoteattr(target)}{mode}/>"
+        )
+        return r_id
+
+
+def _hyperlink(rels: _Rels, text: str, url: str, size_pt: int, bold: bool) -> str:
+    r_id = rels.add(_RT_HYPERLINK, url, external=True)
+    return (
+        f'<w:hyperlink r:id="{r_id}"><w:r>{_rpr(size_pt, link=True, bold=bold)}'
+        f"{_text(text)}</w:r></w:hyperlink>"
+    )
+
+
+def _caption(rels: _Rels, caption: str) -> str:
+    """Абзац-подпись со списком и ссылками (аналог add_text_with_links)."""
+    xml = [
+        '<w:p><w:pPr><w:pStyle w:val="ListBullet"/>'
+        '<w:spacing w:before="120" w:after="120"/><w:jc w:val="left"/></w:pPr>'
+    ]
+    plain = _rpr(FONT_SIZE_CAPTION)
+    pos = 0
+    for m in URL_RE.finditer(caption):
+        if m.start() > pos:
+            xml.append(f"<w:r>{plain}{_text(caption[pos : m.start()])}</w:r>")
+        url = m.group(1)
+        xml.append(_hyperlink(rels, url, url, FONT_SIZE_CAPTION, bold=False))
+        pos = m.end()
+    if pos < len(caption):
+        xml.append(f"<w:r>{plain}{_text(caption[pos:])}</w:r>")
+    xml.append("</w:p>")
+    return "".join(xml)
+
+
+def _picture(r_id: str, pic_id: int, name: str, cx: int, cy: int) -> str:
+    return (
+        "<w:p><w:r><w:drawing>"
+        '<wp:inline xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<wp:extent cx="{cx}" cy="{cy}"/>'
+        f'<wp:docPr id="{pic_id}" name="Picture {pic_id}"/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/>'
+        "</wp:cNvGraphicFramePr><a:graphic>"
+        '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<pic:pic><pic:nvPicPr><pic:cNvPr id="0" name={quoteattr(name)}/>'
+        f'<pic:cNvPicPr/></pic:nvPicPr><pic:blipFill><a:blip r:embed="{r_id}"/>'
+        "<a:stretch><a:fillRect/></a:stretch></pic:blipFill>"
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"/></pic:spPr></pic:pic></a:graphicData></a:graphic>'
+        "</wp:inline></w:drawing></w:r></w:p>"
+    )
+
+
+_PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _content_types(skeleton: _Skeleton, media_types: Dict[str, str]) -> str:
+    extra = "".join(
+        f'<Default Extension="{ext}" ContentType="{ctype}"/>'
+        for ext, ctype in sorted(media_types.items())
+        if ext not in skeleton.extensions
+    )
+    return re.sub(
+        r"(<Types [^>]*>)", lambda m: m.group(1) + extra, skeleton.content_types, 1
+    )
+
+
+def write_docx(
+    docx_path: Path,
+    template: Callable,
+    title_hotel: str,
+    url_hotel: str,
+    mapping_paragraph: Dict[str, str],
+    shots: Shots,
+) -> Path:
+    """
+    Пишет отчёт в docx_path (через .tmp + os.replace). В памяти одновременно
+    только одна картинка: она сразу уходит в zip как есть, из неё берутся лишь
+    размеры для разметки.
+    """
+    skeleton = _skeleton(template)
+    rels = _Rels(skeleton)
+    media_types: Dict[str, str] = {}
+    body: List[str] = [
+        skeleton.body_head,
+        _hyperlink(
+            rels, title_hotel.upper(), url_hotel, FONT_SIZE_HOTEL_LINK, bold=True
+        ),
+        "</w:p>",
+    ]
+
+    tmp = docx_path.with_name(docx_path.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in skeleton.parts.items():
+            zf.writestr(name, data)
+
+        media_no, pic_id = skeleton.next_media, 1
+        for file_name, source in shots:
+            shot = Path(file_name).stem
+            if shot in PAGE_BREAK_SHOTS:
+                body.append(_PAGE_BREAK)
+
+            caption = mapping_paragraph.get(shot)
+            if caption is not None:
+                body.append(_caption(rels, caption))
+
+            try:
+                blob = read_shot(source)
+                image = DocxImage.from_blob(blob)
+                cx, cy = image.scaled_dimensions(Inches(IMAGE_WIDTH_INCHES), None)
+            except Exception as e:
+                body.append(
+                    f"<w:p><w:r>{_rpr(FONT_SIZE_CAPTION)}"
+                    f"{_text(f'[Image error: {e}]')}</w:r></w:p>"
+                )
+                continue
+
+            target = f"media/image{media_no}.{image.ext}"
+            media_no += 1
+            zf.writestr(f"word/{target}", blob)
+            media_types[image.ext] = image.content_type
+            r_id = rels.add(_RT_IMAGE, target)
+            body.append(_picture(r_id, pic_id, file_name, cx, cy))
+            pic_id += 1
+            del blob
+
+        body.append(skeleton.body_tail)
+        with zf.open(_DOCUMENT, "w") as f:
+            for chunk in body:
+                f.write(chunk.encode("utf-8"))
+        zf.writestr(
+            _DOCUMENT_RELS,
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<Relationships xmlns="{_PKG_RELS}">'
+            f"{''.join(skeleton.rels + rels.items)}</Relationships>",
+        )
+        zf.writestr(_CONTENT_TYPES, _content_types(skeleton, media_types))
+    os.replace(tmp, docx_path)
+    return docx_path
@@ -1,35 +1,94 @@
 from __future__ import annotations
 
+import io
 import os
 
 from pathlib import Path
+from typing import List, Optional, Tuple
+
 from PIL import Image
 
+from config_app import IMAGE_EXTENSIONS
+from word_modules.shot_formats import (
+    encode_image,
+    is_encoded,
+    shot_policy,
+    target_name,
+)
+
+
+def _process_image(
+    im: Image.Image, name: str, width_px: int | None
+) -> Optional[Tuple[str, bytes]]:
+    """
+    Ресайз до width_px (если задан) и кодирование по политике формата.
+    Возвращает (новое имя, байты) или None, если картинка уже в нужном виде.
+    """
+    policy = shot_policy(name)
+    w, h = im.size
+    need_resize = bool(width_px) and width_px > 0 and w != width_px
+    if not need_resize and is_encoded(im, name, policy):
+        return None
+    if need_resize:
+        scale = width_px / float(w)
+        new_h = max(1, int(round(h * scale)))
+        src = im.convert("RGBA") if im.mode == "P" else im
+        im = src.resize((width_px, new_h), Image.LANCZOS)
+    return target_name(name, policy), encode_image(im, policy)
+
+
+def _resize_all_images(folder_path: Path, width_px: int | None) -> None:
+    """
+    Пройтись по всем .png/.jpg/.jpeg в папке, привести их к фиксированной ширине (px)
+    с сохранением пропорций и перекодировать по политике формата (SHOT_FORMATS).
+    Ресайз и кодирование — за одно сохранение; если формат меняет расширение,
+    исходный файл удаляется.
+    """
+    files = [
+        (name, folder_path / name)
+        for name in sorted(os.listdir(folder_path))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    _resize_files(files, width_px)
 
-def _resize_all_images(folder_path: Path, width_px: int) -> None:
+
+def _resize_files(
+    files: List[Tuple[str, Path]], width_px: int | None
+) -> List[Tuple[str, Path]]:
     """
-    Пройтись по всем .png/.jpg/.jpeg в папке и привести их к фиксированной ширине (px),
-    сохраняя пропорции. Перезапись *на месте* (in-place).
+    То же, что _resize_all_images, но по списку файлов (шоты из results_store).
+    Возвращает (имя, путь) после перекодирования, в порядке имён.
     """
-    if width_px <= 0:
-        return
-    for name in sorted(os.listdir(folder_path)):
-        if not name.lower().endswith((".png", ".jpg", ".jpeg")):
-            continue
-        p = folder_path / name
+    result = []
+    for name, p in files:
         try:
             with Image.open(p) as im:
-                w, h = im.size
-                if w == width_px:
-                    continue
-                scale = width_px / float(w)
-                new_h = max(1, int(round(h * scale)))
-                im = im.resize((width_px, new_h), Image.LANCZOS)
-                # сохраняем с тем же форматом, максимально без потери видимого качества
-                if p.suffix.lower() in (".jpg", ".jpeg"):
-                    im.save(p, quality=95, optimize=True, progressive=True)
-                else:
-                    # для PNG — без потерь, с оптимизацией
-                    im.save(p, optimize=True)
+                processed = _process_image(im, name, width_px)
+            if processed is not None:
+                new_name, data = processed
+                out = p.with_name(new_name)
+                out.write_bytes(data)
+                if out != p:
+                    p.unlink()
+                name, p = new_name, out
         except Exception as e:
             print(f"[WARN] Resize failed for {p.name}: {e}")
+        result.append((name, p))
+    return sorted(result)
+
+
+def _resize_shots(
+    shots: List[Tuple[str, bytes]], width_px: int | None
+) -> List[Tuple[str, bytes]]:
+    """То же, что _resize_all_images, но для шотов в памяти (ARTIFACT_MODE=memory)."""
+    result = {}
+    for name, data in shots:
+        try:
+            with Image.open(io.BytesIO(data)) as im:
+                processed = _process_image(im, name, width_px)
+            if processed is not None:
+                name, data = processed
+        except Exception as e:
+            print(f"[WARN] Resize failed for {name}: {e}")
+        result[name] = data
+    return sorted(result.items())
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+from PIL import Image
+
+from config_app import (
+    SHOT_FORMATS,
+    SHOT_FORMAT_DEFAULT,
+    JPEG_QUALITY,
+    PNG_PALETTE_COLORS,
+)
+
+FORMAT_SUFFIX = {"png": ".png", "png8": ".png", "jpeg": ".jpg"}
+
+
+def shot_policy(file_name: str) -> str:
+    """Политика формата для шота по имени файла (расширение не важно)."""
+    return SHOT_FORMATS.get(Path(file_name).stem, SHOT_FORMAT_DEFAULT)
+
+
+def target_name(file_name: str, policy: str | None = None) -> str:
+    """Имя файла после применения политики: меняется только расширение."""
+    policy = policy or shot_policy(file_name)
+    return Path(file_name).stem + FORMAT_SUFFIX[policy]
+
+
+def is_encoded(im: Image.Image, file_name: str, policy: str) -> bool:
+    """
+    True, если файл уже лежит в нужном формате — повторное кодирование
+    не нужно (и для JPEG вредно: потери накапливаются).
+    """
+    suffix = Path(file_name).suffix.lower()
+    if policy == "jpeg":
+        return suffix in (".jpg", ".jpeg")
+    if policy == "png8":
+        return suffix == ".png" and im.mode == "P"
+    return suffix == ".png" and im.mode != "P"
+
+
+def _flatten_alpha(im: Image.Image) -> Image.Image:
+    """RGBA/LA/P -> RGB на белом фоне (JPEG и квантизация не умеют альфу)."""
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        rgba = im.convert("RGBA")
+        bg = Image.new("RGB", rgba.size, (255, 255, 255))
+        bg.paste(rgba, mask=rgba.getchannel("A"))
+        return bg
+    return im.convert("RGB") if im.mode != "RGB" else im
+
+
+def encode_image(im: Image.Image, policy: str) -> bytes:
+    """Кодирует картинку по политике и возвращает байты файла."""
+    buf = io.BytesIO()
+    if policy == "jpeg":
+        _flatten_alpha(im).save(
+            buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+        )
+    elif policy == "png8":
+        quantized = _flatten_alpha(im).quantize(
+            colors=PNG_PALETTE_COLORS,
+            method=Image.Quantize.MEDIANCUT,
+            dither=Image.Dither.NONE,  # дизеринг даёт «шум» на тексте и сетке таблиц
+        )
+        quantized.save(buf, "PNG", optimize=True)
+    else:
+        im.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
@@ -0,0 +1,257 @@
+"""
+Общая очередь отелей для нескольких машин: координатор и узлы сбора.
+
+Очередь — SQLite-файл WORK_QUEUE_DB на общем диске. Координатор заливает в
+неё ID из HOTELS_IDS_FILE (seed) и следит за прогрессом; узлы арендуют ID
+пачками (lease) на WORK_LEASE_TTL_S и продлевают аренду, пока работают
+(heartbeat). Аренда умершего узла истекает, и отель достаётся другому.
+
+Статусы отеля:
+    pending — ждёт узла;
+    leased  — арендован узлом owner до lease_until;
+    done    — все шоты собраны и выгружены в WORK_ARTIFACTS_DIR;
+    failed  — не собран за MAX_ATTEMPTS_RUN аренд.
+
+Каждое изменение — одна короткая транзакция BEGIN IMMEDIATE, без WAL: WAL
+не работает на сетевых дисках.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config_app import MAX_ATTEMPTS_RUN, WORK_ARTIFACTS_DIR, WORK_QUEUE_DB
+from results_store import results
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hotels (
+    hotel_id    TEXT PRIMARY KEY,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    title       TEXT,
+    steps       TEXT,
+    updated     REAL
+);
+CREATE INDEX IF NOT EXISTS hotels_status ON hotels (status, lease_until);
+CREATE TABLE IF NOT EXISTS nodes (
+    node      TEXT PRIMARY KEY,
+    last_seen REAL,
+    done      INTEGER NOT NULL DEFAULT 0,
+    failed    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class WorkQueue:
+    """Очередь в SQLite-файле. Соединение на каждый вызов — можно из потоков."""
+
+    def __init__(
+        self, path: Path = WORK_QUEUE_DB, max_attempts: int = MAX_ATTEMPTS_RUN
+    ) -> None:
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=60)) as db:
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with closing(
+            sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        ) as db:
+            db.row_factory = sqlite3.Row
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    # ---------- координатор ----------
+
+    def seed(self, hotel_ids: Iterable[str], reset: bool = False) -> int:
+        """Добавляет новые ID (старые не трогает). reset — начать месяц заново."""
+        now = time.time()
+        with self._tx() as db:
+            if reset:
+                db.execute("DELETE FROM hotels")
+                db.execute("DELETE FROM nodes")
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO hotels (hotel_id, updated) VALUES (?, ?)",
+                [(hid, now) for hid in hotel_ids],
+            )
+            return db.total_changes - before
+
+    def requeue_failed(self) -> int:
+        """failed -> pending с обнулёнными попытками (новый заход по упавшим)."""
+        with self._tx() as db:
+            return db.execute(
+                "UPDATE hotels SET status = 'pending', attempts = 0, owner = NULL,"
+                " updated = ? WHERE status = 'failed'",
+                (time.time(),),
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Число отелей по статусам; просроченные аренды — отдельно (expired)."""
+        now = time.time()
+        with self._tx() as db:
+            counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0, "expired": 0}
+            for row in db.execute(
+                "SELECT status, lease_until < ? AS expired, COUNT(*) AS n"
+                " FROM hotels GROUP BY status, expired",
+                (now,),
+            ):
+                expired = row["status"] == "leased" and row["expired"]
+                counts["expired" if expired else row["status"]] += row["n"]
+            return counts
+
+    def nodes(self) -> List[dict]:
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT n.node, n.last_seen, n.done, n.failed,"
+                " (SELECT COUNT(*) FROM hotels h WHERE h.owner = n.node"
+                "  AND h.status = 'leased') AS leased"
+                " FROM nodes n ORDER BY n.node"
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def hotels(self, status: Optional[str] = None) -> List[dict]:
+        with self._tx() as db:
+            rows = db.execute(
+                "SELECT * FROM hotels WHERE ? IS NULL OR status = ? ORDER BY rowid",
+                (status, status),
+            ).fetchall()
+        return [
+            dict(r) | {"steps": json.loads(r["steps"]) if r["steps"] else {}}
+            for r in rows
+        ]
+
+    def open_count(self) -> int:
+        """Сколько отелей ещё может достаться узлу (pending + leased)."""
+        with self._tx() as db:
+            return db.execute(
+                "SELECT COUNT(*) FROM hotels WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0]
+
+    # ---------- узел ----------
+
+    def lease(self, node: str, n: int, ttl_s: float) -> List[str]:
+        """
+        До n ID: ожидающие и с просроченной арендой, меньше попыток — раньше.
+        Просроченные, у которых попытки кончились, сразу уходят в failed.
+        """
+        now = time.time()
+        with self._tx() as db:
+            self._touch(db, node, now)
+            db.execute(
+                "UPDATE hotels SET status = 'failed', owner = NULL, updated = ?"
+                " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            ids = [
+                r[0]
+                for r in db.execute(
+                    "SELECT hotel_id FROM hotels"
+                    " WHERE status = 'pending'"
+                    " OR (status = 'leased' AND lease_until < ?)"
+                    " ORDER BY attempts, rowid LIMIT ?",
+                    (now, n),
+                )
+            ]
+            db.executemany(
+                "UPDATE hotels SET status = 'leased', owner = ?, lease_until = ?,"
+                " attempts = attempts + 1, updated = ? WHERE hotel_id = ?",
+                [(node, now + ttl_s, now, hid) for hid in ids],
+            )
+        return ids
+
+    def heartbeat(self, node: str, hotel_ids: Iterable[str], ttl_s: float) -> int:
+        """Продлевает аренду своих ID; возвращает, сколько ещё за узлом."""
+        now = time.time()
+        with self._tx() as db:
+            self._touch(db, node, now)
+            return db.executemany(
+                "UPDATE hotels SET lease_until = ? WHERE hotel_id = ?"
+                " AND owner = ? AND status = 'leased'",
+                [(now + ttl_s, hid, node) for hid in hotel_ids],
+            ).rowcount
+
+    def finish(
+        self,
+        node: str,
+        hotel_id: str,
+        complete: bool,
+        title: Optional[str] = None,
+        steps: Optional[Dict[str, bool]] = None,
+    ) -> Optional[str]:
+        """
+        Итог аренды: done, либо обратно в pending (или failed, если попытки
+        кончились). None — аренду уже забрал другой узел, итог не записан.
+        """
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT attempts FROM hotels WHERE hotel_id = ? AND owner = ?"
+                " AND status = 'leased'",
+                (hotel_id, node),
+            ).fetchone()
+            if row is None:
+                return None
+            if complete:
+                status = "done"
+            else:
+                status = "failed" if row[0] >= self.max_attempts else "pending"
+            db.execute(
+                "UPDATE hotels SET status = ?, owner = CASE WHEN ? = 'done'"
+                " THEN owner END, lease_until = NULL, title = COALESCE(?, title),"
+                " steps = ?, updated = ? WHERE hotel_id = ?",
+                (status, status, title, json.dumps(steps or {}), now, hotel_id),
+            )
+            if status in ("done", "failed"):
+                db.execute(
+                    f"UPDATE nodes SET {status} = {status} + 1 WHERE node = ?",
+                    (node,),
+                )
+            return status
+
+    def release(self, node: str) -> int:
+        """Вернуть в pending всё, что арендовано узлом (штатная остановка)."""
+        with self._tx() as db:
+            return db.execute(
+                "UPDATE hotels SET status = 'pending', owner = NULL,"
+                " lease_until = NULL, attempts = MAX(attempts - 1, 0), updated = ?"
+                " WHERE owner = ? AND status = 'leased'",
+                (time.time(), node),
+            ).rowcount
+
+    @staticmethod
+    def _touch(db: sqlite3.Connection, node: str, now: float) -> None:
+        db.execute(
+            "INSERT INTO nodes (node, last_seen) VALUES (?, ?)"
+            " ON CONFLICT (node) DO UPDATE SET last_seen = excluded.last_seen",
+            (node, now),
+        )
+
+
+def collect(src: Path = WORK_ARTIFACTS_DIR) -> int:
+    """
+    Отели, выгруженные узлами, -> локальный results_store и папки шотов,
+    чтобы сборка отчётов (cli.py build) шла как после обычного прогона.
+    Возвращает число отелей; недописанные (.tmp) пропускаются.
+    """
+    copied = 0
+    if not src.exists():
+        return copied
+    for folder in sorted(src.iterdir()):
+        if folder.is_dir() and not folder.name.startswith("."):
+            copied += results.import_hotel(folder) is not None
+    return copied